@@ -9,6 +9,7 @@ from . import stock_price_agent
 from . import financial_metrics_agent
 from . import company_analysis_agent
 from . import finance_assistant_swarm_agent
+from . import market_data
 
 # Import specific functions and classes for convenience
 from .stock_price_agent import get_stock_prices, create_stock_price_agent
@@ -21,6 +22,7 @@ from .company_analysis_agent import (
     get_stock_news,
     create_company_analysis_agent,
 )
+from .market_data import MarketDataService, record_fixture
 from .finance_assistant_swarm_agent import (
     StockAnalysisSwarm,
     create_orchestration_agent,
@@ -32,11 +34,13 @@ __all__ = [
     "financial_metrics_agent",
     "company_analysis_agent",
     "finance_assistant_swarm_agent",
+    "market_data",
     # Functions
     "get_stock_prices",
     "get_financial_metrics",
     "get_company_info",
     "get_stock_news",
+    "record_fixture",
     # Agent creators
     "create_stock_price_agent",
     "create_financial_metrics_agent",
@@ -44,4 +48,5 @@ __all__ = [
     "create_orchestration_agent",
     # Classes
     "StockAnalysisSwarm",
+    "MarketDataService",
 ]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the concurrent news fetcher
+
+Serves MarketWatch, CNBC, Seeking Alpha and Google News shaped pages from a
+local stub HTTP server and compares the old one-source-after-another loop
+with NewsFetcher. One source answers slowly, one always fails and one
+repeats headlines from another, so the run shows the deadline, dedupe and
+health-based skipping. No network access or AWS credentials are needed.
+
+Usage:
+    python benchmark_news_fetcher.py --requests 5 --slow-delay 3
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import requests
+from bs4 import BeautifulSoup
+
+from news_fetcher import (
+    NewsFetcher,
+    NewsSource,
+    _parse_cnbc,
+    _parse_google_news,
+    _parse_marketwatch,
+    _parse_seeking_alpha,
+    html_source,
+)
+
+MARKETWATCH_PAGE = "".join(
+    f'<div class="article__content"><h3 class="article__headline">Example Corp headline {i}</h3>'
+    f'<a class="link" href="/story/example-{i}">read</a></div>'
+    for i in range(3)
+)
+CNBC_PAGE = "".join(
+    f'<div class="SearchResult-searchResultContent"><span class="Card-title">CNBC on Example Corp {i}</span>'
+    f'<a class="resultlink" href="https://www.cnbc.com/example-{i}">read</a></div>'
+    for i in range(3)
+)
+# Two of these repeat MarketWatch stories and should be dropped as duplicates
+GOOGLE_PAGE = "".join(
+    f'<div class="SoaBEf"><a href="{url}">{title}</a></div>'
+    for url, title in [
+        ("https://news.example.com/syndicated", "Example Corp Headline 0!"),
+        ("{marketwatch}/story/example-1/", "Example Corp headline 1, syndicated"),
+        ("https://news.example.com/a", "An independent Example Corp story"),
+    ]
+)
+
+
+def start_stub_server(slow_delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/mw/"):
+                time.sleep(0.05)
+                body = MARKETWATCH_PAGE
+            elif self.path.startswith("/cnbc/"):
+                time.sleep(slow_delay)
+                body = CNBC_PAGE
+            elif self.path.startswith("/google/"):
+                time.sleep(0.2)
+                body = GOOGLE_PAGE.replace("{marketwatch}", f"http://{self.headers['Host']}/mw")
+            else:
+                self.send_error(503)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except BrokenPipeError:
+                pass  # the fetcher gave up on this source at its deadline
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_sources(base: str) -> List[NewsSource]:
+    return [
+        html_source("MarketWatch", f"{base}/mw", "/investing/stock/{ticker}", _parse_marketwatch),
+        html_source("CNBC", f"{base}/cnbc", "/search/?query={company}", _parse_cnbc),
+        html_source("Seeking Alpha", f"{base}/sa", "/symbol/{symbol}/news", _parse_seeking_alpha),
+        html_source("Google News", f"{base}/google", "/search?q={company}", _parse_google_news),
+    ]
+
+
+def fetch_sequential(base: str, ticker: str, timeout: float) -> int:
+    """The previous get_stock_news loop: a new connection per source, stop at five items"""
+    parsers = [
+        (f"{base}/mw/investing/stock/{ticker}", _parse_marketwatch, f"{base}/mw"),
+        (f"{base}/cnbc/search/?query={ticker}", _parse_cnbc, f"{base}/cnbc"),
+        (f"{base}/sa/symbol/{ticker}/news", _parse_seeking_alpha, f"{base}/sa"),
+        (f"{base}/google/search?q={ticker}", _parse_google_news, f"{base}/google"),
+    ]
+    items = []
+    for url, parse, source_base in parsers:
+        if len(items) >= 5:
+            break
+        try:
+            response = requests.get(url, timeout=timeout)
+            if response.status_code == 200:
+                for item in parse(BeautifulSoup(response.text, "html.parser"), source_base):
+                    if item not in items:
+                        items.append(item)
+        except Exception:
+            pass
+    return len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent news fetcher")
+    parser.add_argument("--requests", type=int, default=5, help="get_stock_news calls per strategy")
+    parser.add_argument("--slow-delay", type=float, default=3.0, help="seconds the slow source takes")
+    parser.add_argument("--deadline", type=float, default=1.0, help="NewsFetcher global deadline")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.slow_delay)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    fetcher = NewsFetcher(sources=stub_sources(base))
+
+    print(f"{'request':<8} {'sequential':>12} {'items':>6}   {'concurrent':>12} {'items':>6}  skipped")
+    for i in range(args.requests):
+        started = time.perf_counter()
+        sequential_items = fetch_sequential(base, "exmp", timeout=10)
+        sequential = time.perf_counter() - started
+
+        result = fetcher.fetch("EXMP", "Example Corp", deadline=args.deadline)
+        print(
+            f"{i + 1:<8} {sequential * 1000:10.0f}ms {sequential_items:>6}   "
+            f"{result['elapsed'] * 1000:10.0f}ms {len(result['items']):>6}  "
+            f"{', '.join(result['sources_skipped']) or '-'}"
+        )
+
+    print("\nSource health:")
+    for name, health in fetcher.health_status().items():
+        print(f"  {name:<14} score {health['score']:.2f}  available {health['available']}  "
+              f"last error {health['last_error']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,12 @@ import datetime as dt
 from typing import Dict, Union
 
 # Third-party imports
-import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
 
+from market_data import market_data
+
 
 @tool
 def get_financial_metrics(ticker: str) -> Union[Dict, str]:
@@ -22,8 +23,7 @@ def get_financial_metrics(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = market_data.get_info(ticker)
 
         # Get financial data
         try:
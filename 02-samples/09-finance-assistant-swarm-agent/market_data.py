@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Shared Market Data Service
+
+One process-wide cache in front of Yahoo Finance for the swarm agents.
+Company info, price history and news are cached per ticker and per field
+with their own TTLs, concurrent requests for the same data wait on a single
+in-flight fetch, and fetched data is persisted to SQLite so it survives
+restarts. Setting MARKET_DATA_FIXTURES to a directory of <TICKER>.json files
+serves everything from those fixtures without touching the network.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Third-party imports
+import pandas as pd
+import yfinance as yf
+
+MARKET_DATA_CACHE_PATH = os.environ.get(
+    "MARKET_DATA_CACHE_PATH", os.path.join(os.path.dirname(__file__), ".market_data.db")
+)
+MARKET_DATA_FIXTURES = os.environ.get("MARKET_DATA_FIXTURES")
+
+# Seconds each field stays fresh; info changes rarely, prices and news often
+FIELD_TTLS = {
+    "info": int(os.environ.get("MARKET_DATA_INFO_TTL", "3600")),
+    "history": int(os.environ.get("MARKET_DATA_HISTORY_TTL", "900")),
+    "news": int(os.environ.get("MARKET_DATA_NEWS_TTL", "600")),
+}
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+
+def _encode_history(data: pd.DataFrame) -> str:
+    return data.to_json(orient="split", date_format="iso")
+
+
+def _decode_history(payload: str) -> pd.DataFrame:
+    return pd.read_json(io.StringIO(payload), orient="split")
+
+
+def _field_codec(field: str) -> Tuple[Callable[[Any], str], Callable[[str], Any]]:
+    if field.startswith("history"):
+        return _encode_history, _decode_history
+    return (lambda value: json.dumps(value, default=str)), json.loads
+
+
+def _is_empty(value: Any) -> bool:
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    return not value
+
+
+class MarketDataService:
+    """TTL-cached, coalescing access to Yahoo Finance data shared by all agents"""
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = MARKET_DATA_CACHE_PATH,
+        fixtures_dir: Optional[str] = MARKET_DATA_FIXTURES,
+        ttls: Optional[Dict[str, int]] = None,
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.ttls = {**FIELD_TTLS, **(ttls or {})}
+        self._memory: Dict[Tuple[str, str], CacheEntry] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "fetches": 0, "coalesced": 0, "stale": 0}
+
+        # Fixture mode is fully offline, so it never reads or writes the disk cache
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if cache_path and not fixtures_dir:
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS market_data (
+                    ticker TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, field)
+                )"""
+            )
+            self._db.commit()
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        """Company profile and fundamentals, as returned by yf.Ticker(t).info"""
+        return self._get(ticker, "info", lambda t: yf.Ticker(t).info)
+
+    def get_history(self, ticker: str, period: str = "3mo") -> pd.DataFrame:
+        """Daily OHLCV history; the returned frame is shared and must not be modified"""
+        return self._get(
+            ticker, f"history:{period}", lambda t: yf.Ticker(t).history(period=period)
+        )
+
+    def get_news(self, ticker: str) -> List[Dict[str, Any]]:
+        """Recent news items from the Yahoo Finance API"""
+        return self._get(ticker, "news", lambda t: yf.Ticker(t).news)
+
+    def invalidate(self, ticker: Optional[str] = None) -> None:
+        """Drop cached data for one ticker, or everything when no ticker is given"""
+        symbol = ticker.strip().upper() if ticker else None
+        with self._lock:
+            for key in [k for k in self._memory if symbol is None or k[0] == symbol]:
+                del self._memory[key]
+        if self._db:
+            with self._db_lock:
+                if symbol is None:
+                    self._db.execute("DELETE FROM market_data")
+                else:
+                    self._db.execute("DELETE FROM market_data WHERE ticker = ?", (symbol,))
+                self._db.commit()
+
+    def _get(self, ticker: str, field: str, fetch: Callable[[str], Any]) -> Any:
+        key = (ticker.strip().upper(), field)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry.expires_at > time.time():
+                self.stats["hits"] += 1
+                return entry.value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = self._load(key, fetch)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _load(self, key: Tuple[str, str], fetch: Callable[[str], Any]) -> Any:
+        ticker, field = key
+        ttl = self.ttls[field.split(":", 1)[0]]
+        encode, decode = _field_codec(field)
+
+        if self.fixtures_dir:
+            value = decode(self._read_fixture(ticker, field))
+            self._remember(key, value, time.time() + ttl)
+            return value
+
+        stored = self._read_disk(key)
+        if stored and stored[1] + ttl > time.time():
+            value = decode(stored[0])
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            self._remember(key, value, stored[1] + ttl)
+            return value
+
+        with self._lock:
+            self.stats["fetches"] += 1
+        try:
+            value = fetch(ticker)
+        except Exception as e:
+            if not stored:
+                raise
+            # Serve the expired copy rather than fail the agent on a flaky fetch
+            print(f"Fetching {field} for {ticker} failed, using cached data: {str(e)}")
+            with self._lock:
+                self.stats["stale"] += 1
+            return decode(stored[0])
+
+        # Empty results usually mean a bad ticker or a transient error; don't pin them
+        if not _is_empty(value):
+            fetched_at = time.time()
+            self._write_disk(key, encode(value), fetched_at)
+            self._remember(key, value, fetched_at + ttl)
+        return value
+
+    def _remember(self, key: Tuple[str, str], value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = CacheEntry(value, expires_at)
+
+    def _read_disk(self, key: Tuple[str, str]) -> Optional[Tuple[str, float]]:
+        if not self._db:
+            return None
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT payload, fetched_at FROM market_data WHERE ticker = ? AND field = ?",
+                key,
+            ).fetchone()
+
+    def _write_disk(self, key: Tuple[str, str], payload: str, fetched_at: float) -> None:
+        if not self._db:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO market_data (ticker, field, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (*key, payload, fetched_at),
+            )
+            self._db.commit()
+
+    def _read_fixture(self, ticker: str, field: str) -> str:
+        path = os.path.join(self.fixtures_dir, f"{ticker}.json")
+        try:
+            with open(path) as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No market data fixture for {ticker} in {self.fixtures_dir}")
+        if field not in fixture:
+            raise ValueError(f"Fixture {path} has no '{field}' data")
+        return json.dumps(fixture[field])
+
+
+def record_fixture(ticker: str, fixtures_dir: str, period: str = "3mo") -> str:
+    """Save live info, history and news for a ticker in the fixture format"""
+    service = MarketDataService(cache_path=None, fixtures_dir=None)
+    fixture = {
+        "info": service.get_info(ticker),
+        f"history:{period}": json.loads(_encode_history(service.get_history(ticker, period))),
+        "news": service.get_news(ticker),
+    }
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"{ticker.strip().upper()}.json")
+    with open(path, "w") as f:
+        json.dump(fixture, f, indent=2, default=str)
+    return path
+
+
+# Process-wide instance shared by every agent's tools
+market_data = MarketDataService()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python market_data.py <fixtures_dir> <TICKER> [<TICKER> ...]")
+        sys.exit(1)
+    for symbol in sys.argv[2:]:
+        print(f"Recorded {record_fixture(symbol, sys.argv[1])}")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Concurrent News Fetcher
+
+Queries every news source for a ticker at once over a pooled HTTP session
+and returns as soon as enough unique items are in or the deadline passes.
+Each source keeps a health score; a source that keeps failing is skipped
+for a cooldown period instead of costing every request its full timeout.
+"""
+
+import datetime as dt
+import os
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# Third-party imports
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from market_data import market_data
+
+NEWS_TARGET_ITEMS = int(os.environ.get("NEWS_TARGET_ITEMS", "5"))
+NEWS_DEADLINE = float(os.environ.get("NEWS_DEADLINE", "8"))
+NEWS_SOURCE_TIMEOUT = float(os.environ.get("NEWS_SOURCE_TIMEOUT", "5"))
+NEWS_FETCH_WORKERS = int(os.environ.get("NEWS_FETCH_WORKERS", "8"))
+
+# Health is a moving average of successes; below the threshold a source sits out
+# a cooldown that doubles with each further failure
+HEALTH_DECAY = 0.3
+HEALTH_THRESHOLD = 0.3
+HEALTH_COOLDOWN = 60.0
+HEALTH_MAX_COOLDOWN = 900.0
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
+}
+
+NewsItem = Dict[str, str]
+
+
+@dataclass
+class NewsSource:
+    name: str
+    fetch: Callable[[requests.Session, str, str, float], List[NewsItem]]
+
+
+@dataclass
+class SourceHealth:
+    score: float = 1.0
+    failures: int = 0
+    retry_at: float = 0.0
+    last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return self.score >= HEALTH_THRESHOLD or now >= self.retry_at
+
+    def record(self, ok: bool, error: Optional[str] = None) -> None:
+        self.score = (1 - HEALTH_DECAY) * self.score + HEALTH_DECAY * (1.0 if ok else 0.0)
+        if ok:
+            self.failures = 0
+            self.last_error = None
+            return
+        self.failures += 1
+        self.last_error = error
+        if self.score < HEALTH_THRESHOLD:
+            cooldown = HEALTH_COOLDOWN * 2 ** max(0, self.failures - 1)
+            self.retry_at = time.time() + min(cooldown, HEALTH_MAX_COOLDOWN)
+
+
+def _news_item(title: str, url: str, source: str, summary: str = "", date: str = "") -> NewsItem:
+    return {
+        "title": title,
+        "summary": summary,
+        "url": url,
+        "source": source,
+        "date": date or dt.datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+def _absolute(link: str, base_url: str) -> str:
+    return link if not link or link.startswith("http") else f"{base_url}{link}"
+
+
+def _parse_marketwatch(soup: BeautifulSoup, base_url: str) -> List[NewsItem]:
+    items = []
+    for article in soup.select(".article__content")[:5]:
+        title_elem = article.select_one(".article__headline")
+        link_elem = article.select_one("a.link")
+        if title_elem and link_elem:
+            link = _absolute(link_elem.get("href", ""), base_url)
+            items.append(_news_item(title_elem.text.strip(), link, "MarketWatch"))
+    return items
+
+
+def _parse_cnbc(soup: BeautifulSoup, base_url: str) -> List[NewsItem]:
+    items = []
+    for article in soup.select(".SearchResult-searchResultContent")[:5]:
+        title_elem = article.select_one(".Card-title")
+        link_elem = article.select_one("a.resultlink")
+        if title_elem and link_elem:
+            items.append(_news_item(title_elem.text.strip(), link_elem.get("href", ""), "CNBC"))
+    return items
+
+
+def _parse_seeking_alpha(soup: BeautifulSoup, base_url: str) -> List[NewsItem]:
+    items = []
+    for article in soup.select("article")[:5]:
+        title_elem = article.select_one('a[data-test-id="post-list-item-title"]')
+        if title_elem:
+            link = _absolute(title_elem.get("href", ""), base_url)
+            items.append(_news_item(title_elem.text.strip(), link, "Seeking Alpha"))
+    return items
+
+
+def _parse_google_news(soup: BeautifulSoup, base_url: str) -> List[NewsItem]:
+    news_elements = []
+    for selector in ["div.SoaBEf", "div.dbsr", "g-card", ".WlydOe", ".ftSUBd"]:
+        if not news_elements:
+            news_elements = soup.select(selector)
+
+    # If still no results, try to find any links with news-like content
+    if not news_elements:
+        news_elements = [
+            link
+            for link in soup.find_all("a")
+            if "news" in link.get("href", "").lower()
+            and link.text
+            and len(link.text.strip()) > 20
+        ]
+
+    items = []
+    for element in news_elements[:5]:
+        link_elem = element if element.name == "a" else element.find("a")
+        if not link_elem:
+            continue
+        title = link_elem.text.strip()
+        link = link_elem.get("href", "")
+        if link.startswith("/url?q="):
+            link = link.split("/url?q=")[1].split("&")[0]
+        if title and link and len(title) > 10:
+            items.append(_news_item(title, link, "Google News"))
+    return items
+
+
+def html_source(
+    name: str,
+    base_url: str,
+    path: str,
+    parse: Callable[[BeautifulSoup, str], List[NewsItem]],
+) -> NewsSource:
+    """A source that scrapes one page; path may use {ticker}, {symbol} and {company}"""
+
+    def fetch(session: requests.Session, ticker: str, company_name: str, timeout: float):
+        url = base_url + path.format(
+            ticker=ticker.lower(),
+            symbol=ticker.upper(),
+            company=urllib.parse.quote(company_name),
+        )
+        response = session.get(url, headers=HEADERS, timeout=timeout)
+        response.raise_for_status()
+        return parse(BeautifulSoup(response.text, "html.parser"), base_url)
+
+    return NewsSource(name, fetch)
+
+
+def _fetch_yahoo(session: requests.Session, ticker: str, company_name: str, timeout: float):
+    items = []
+    for item in (market_data.get_news(ticker) or [])[:5]:
+        items.append(
+            _news_item(
+                item.get("title", ""),
+                item.get("link", ""),
+                item.get("publisher", "Yahoo Finance"),
+                summary=(item.get("summary") or "")[:300],
+                date=dt.datetime.fromtimestamp(item.get("providerPublishTime", 0)).strftime(
+                    "%Y-%m-%d"
+                ),
+            )
+        )
+    return items
+
+
+# In priority order; results are reported in this order whichever answers first
+DEFAULT_SOURCES = [
+    NewsSource("Yahoo Finance API", _fetch_yahoo),
+    html_source(
+        "MarketWatch", "https://www.marketwatch.com", "/investing/stock/{ticker}", _parse_marketwatch
+    ),
+    html_source(
+        "CNBC",
+        "https://www.cnbc.com",
+        "/search/?query={company}%20stock&qsearchterm={company}%20stock",
+        _parse_cnbc,
+    ),
+    html_source(
+        "Seeking Alpha", "https://seekingalpha.com", "/symbol/{symbol}/news", _parse_seeking_alpha
+    ),
+    html_source(
+        "Google News",
+        "https://www.google.com",
+        "/search?q={company}%20stock%20news&tbm=nws",
+        _parse_google_news,
+    ),
+]
+
+
+def _dedupe_keys(item: NewsItem) -> List[str]:
+    parts = urllib.parse.urlsplit(item["url"])
+    url_key = f"{parts.netloc.lower().removeprefix('www.')}{parts.path.rstrip('/')}"
+    title_key = re.sub(r"[^a-z0-9]+", " ", item["title"].lower()).strip()
+    return [f"url:{url_key}", f"title:{title_key}"]
+
+
+def _dedupe(items: List[NewsItem]) -> List[NewsItem]:
+    """Drop items without a title or URL and later repeats of a URL or title"""
+    seen = set()
+    unique = []
+    for item in items:
+        keys = _dedupe_keys(item)
+        if item["title"] and item["url"] and not seen.intersection(keys):
+            seen.update(keys)
+            unique.append(item)
+    return unique
+
+
+class NewsFetcher:
+    """Fans a ticker out to all healthy sources and gathers unique items"""
+
+    def __init__(
+        self,
+        sources: Optional[List[NewsSource]] = None,
+        max_workers: int = NEWS_FETCH_WORKERS,
+    ):
+        self.sources = sources or DEFAULT_SOURCES
+        self.health: Dict[str, SourceHealth] = {s.name: SourceHealth() for s in self.sources}
+        self._health_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news")
+
+        # One keep-alive connection pool shared by every source and request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.sources), pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(
+        self,
+        ticker: str,
+        company_name: str,
+        target: int = NEWS_TARGET_ITEMS,
+        deadline: float = NEWS_DEADLINE,
+        source_timeout: float = NEWS_SOURCE_TIMEOUT,
+    ) -> Dict:
+        """Collect up to target unique items; returns items, sources checked and skipped"""
+        started = time.time()
+        with self._health_lock:
+            healthy = [s for s in self.sources if self.health[s.name].available(started)]
+        skipped = [s.name for s in self.sources if s not in healthy]
+
+        timeout = min(source_timeout, deadline)
+        pending = {}
+        for priority, source in enumerate(healthy):
+            future = self._executor.submit(source.fetch, self.session, ticker, company_name, timeout)
+            # Late answers still count towards the source's health
+            future.add_done_callback(lambda f, name=source.name: self._record(name, f))
+            pending[future] = (priority, source.name)
+
+        collected = []
+        unique = []
+        while pending and len(unique) < target:
+            remaining = deadline - (time.time() - started)
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                priority, name = pending.pop(future)
+                if future.exception():
+                    print(f"Error with {name}: {str(future.exception())}")
+                    continue
+                items = future.result()
+                print(f"Found {len(items)} news items from {name}")
+                collected.extend((priority, item) for item in items)
+            # Dedupe in priority order, so a repeat keeps the copy from the better source
+            collected.sort(key=lambda entry: entry[0])
+            unique = _dedupe([item for _, item in collected])
+
+        timed_out = [name for _, name in pending.values()]
+        if timed_out:
+            print(f"Not waiting for {', '.join(timed_out)}")
+
+        return {
+            "items": unique[:target],
+            "sources_checked": [s.name for s in healthy],
+            "sources_skipped": skipped,
+            "elapsed": time.time() - started,
+        }
+
+    def health_status(self) -> Dict[str, Dict]:
+        with self._health_lock:
+            return {
+                name: {
+                    "score": round(health.score, 3),
+                    "failures": health.failures,
+                    "available": health.available(time.time()),
+                    "last_error": health.last_error,
+                }
+                for name, health in self.health.items()
+            }
+
+    def _record(self, name: str, future) -> None:
+        error = future.exception()
+        ok = error is None and bool(future.result())
+        with self._health_lock:
+            self.health[name].record(ok, str(error) if error else None if ok else "no items")
+
+
+# Process-wide instance so the connection pool and health scores are shared
+news_fetcher = NewsFetcher()
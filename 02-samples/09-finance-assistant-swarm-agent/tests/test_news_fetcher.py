@@ -0,0 +1,210 @@
+"""
+Unit tests for the concurrent news fetcher.
+
+Sources are scraped from a local stub HTTP server, so no network access is
+needed.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_fetcher import (  # noqa: E402
+    NewsFetcher,
+    _parse_cnbc,
+    _parse_google_news,
+    _parse_marketwatch,
+    _parse_seeking_alpha,
+    html_source,
+)
+
+MARKETWATCH_PAGE = "".join(
+    f'<div class="article__content"><h3 class="article__headline">Example Corp headline {i}</h3>'
+    f'<a class="link" href="/story/example-{i}">read</a></div>'
+    for i in range(3)
+)
+CNBC_PAGE = "".join(
+    f'<div class="SearchResult-searchResultContent"><span class="Card-title">CNBC on Example Corp {i}</span>'
+    f'<a class="resultlink" href="https://www.cnbc.com/example-{i}">read</a></div>'
+    for i in range(3)
+)
+# The first repeats a MarketWatch title, the second a MarketWatch URL
+GOOGLE_PAGE = "".join(
+    f'<div class="SoaBEf"><a href="{url}">{title}</a></div>'
+    for url, title in [
+        ("https://news.example.com/syndicated", "Example Corp Headline 0!"),
+        ("{marketwatch}/story/example-1/", "Example Corp headline 1, syndicated"),
+        ("https://news.example.com/a", "An independent Example Corp story"),
+    ]
+)
+
+
+class StubNewsServer:
+    """Serves source pages by path prefix with a per-source delay, counting requests
+
+    With cnbc_trickle CNBC answers at once but sends its page in three parts
+    that far apart, so it finishes late without tripping the read timeout.
+    """
+
+    def __init__(self, cnbc_delay=0.0, cnbc_trickle=0.0):
+        self.delays = {"/mw/": 0.0, "/cnbc/": cnbc_delay, "/google/": 0.05}
+        self.cnbc_trickle = cnbc_trickle
+        self.requests = {prefix: 0 for prefix in ["/mw/", "/cnbc/", "/sa/", "/google/"]}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                prefix = "/" + self.path.split("/")[1] + "/"
+                stub.requests[prefix] = stub.requests.get(prefix, 0) + 1
+                time.sleep(stub.delays.get(prefix, 0.0))
+                pages = {
+                    "/mw/": MARKETWATCH_PAGE,
+                    "/cnbc/": CNBC_PAGE,
+                    "/google/": GOOGLE_PAGE.replace("{marketwatch}", f"{stub.base}/mw"),
+                }
+                if prefix not in pages:
+                    self.send_error(503)
+                    return
+                data = pages[prefix].encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    if prefix == "/cnbc/" and stub.cnbc_trickle:
+                        third = len(data) // 3
+                        for start in (0, third):
+                            self.wfile.write(data[start : start + third])
+                            self.wfile.flush()
+                            time.sleep(stub.cnbc_trickle)
+                        data = data[2 * third :]
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def sources(self):
+        return [
+            html_source("MarketWatch", f"{self.base}/mw", "/investing/stock/{ticker}", _parse_marketwatch),
+            html_source("CNBC", f"{self.base}/cnbc", "/search/?query={company}", _parse_cnbc),
+            html_source("Seeking Alpha", f"{self.base}/sa", "/symbol/{symbol}/news", _parse_seeking_alpha),
+            html_source("Google News", f"{self.base}/google", "/search?q={company}", _parse_google_news),
+        ]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestNewsFetcher(unittest.TestCase):
+    def start_server(self, **kwargs):
+        server = StubNewsServer(**kwargs)
+        self.addCleanup(server.close)
+        return server
+
+    def test_returns_at_the_deadline_without_the_slow_source(self):
+        server = self.start_server(cnbc_delay=2.0)
+        fetcher = NewsFetcher(sources=server.sources())
+
+        started = time.monotonic()
+        result = fetcher.fetch("EXMP", "Example Corp", target=20, deadline=0.5, source_timeout=5)
+        elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertLess(elapsed, 1.0)
+        self.assertIn("CNBC", result["sources_checked"])
+        self.assertNotIn("CNBC", {item["source"] for item in result["items"]})
+
+    def test_returns_early_once_the_target_is_reached(self):
+        server = self.start_server(cnbc_delay=2.0)
+        fetcher = NewsFetcher(sources=server.sources())
+
+        result = fetcher.fetch("EXMP", "Example Corp", target=3, deadline=5)
+
+        self.assertLess(result["elapsed"], 1.0)
+        self.assertEqual(len(result["items"]), 3)
+
+    def test_duplicates_are_dropped_by_url_and_title(self):
+        server = self.start_server(cnbc_delay=2.0)
+        fetcher = NewsFetcher(sources=server.sources())
+
+        result = fetcher.fetch("EXMP", "Example Corp", target=20, deadline=0.5)
+
+        titles = [item["title"] for item in result["items"]]
+        self.assertEqual(
+            titles,
+            [
+                "Example Corp headline 0",
+                "Example Corp headline 1",
+                "Example Corp headline 2",
+                "An independent Example Corp story",
+            ],
+        )
+        # Results are ordered by source priority, not by arrival
+        self.assertEqual([item["source"] for item in result["items"]], ["MarketWatch"] * 3 + ["Google News"])
+
+    def test_failing_source_is_skipped_during_its_cooldown(self):
+        server = self.start_server()
+        fetcher = NewsFetcher(sources=server.sources())
+
+        skipped_after = None
+        for attempt in range(1, 11):
+            requests_before = server.requests["/sa/"]
+            failures_before = fetcher.health["Seeking Alpha"].failures
+            result = fetcher.fetch("EXMP", "Example Corp", target=20, deadline=1)
+            if "Seeking Alpha" in result["sources_skipped"]:
+                skipped_after = attempt
+                break
+            # Health is recorded by a done-callback that can trail the fetch
+            wait_until(lambda: fetcher.health["Seeking Alpha"].failures > failures_before)
+
+        self.assertIsNotNone(skipped_after, "Seeking Alpha was never skipped")
+        self.assertEqual(server.requests["/sa/"], requests_before)
+        self.assertNotIn("Seeking Alpha", result["sources_checked"])
+        status = fetcher.health_status()["Seeking Alpha"]
+        self.assertFalse(status["available"])
+        self.assertIn("503", status["last_error"])
+        # Sources that answer stay in rotation
+        self.assertIn("MarketWatch", result["sources_checked"])
+        self.assertTrue(fetcher.health_status()["MarketWatch"]["available"])
+
+    def test_late_results_are_dropped_but_count_towards_health(self):
+        # CNBC finishes after the deadline; each read still beats the timeout
+        server = self.start_server(cnbc_trickle=0.2)
+        fetcher = NewsFetcher(sources=server.sources())
+        fetcher.health["CNBC"].record(False, "earlier failure")
+
+        result = fetcher.fetch("EXMP", "Example Corp", target=20, deadline=0.3)
+        items = list(result["items"])
+        self.assertNotIn("CNBC", {item["source"] for item in items})
+        self.assertEqual(fetcher.health["CNBC"].failures, 1)
+
+        # The late answer resets the failure count but not the returned result
+        wait_until(lambda: fetcher.health["CNBC"].failures == 0)
+        self.assertEqual(result["items"], items)
+        self.assertIsNone(fetcher.health_status()["CNBC"]["last_error"])
+        self.assertGreater(fetcher.health_status()["CNBC"]["score"], 0.7)
+
+
+if __name__ == "__main__":
+    unittest.main()
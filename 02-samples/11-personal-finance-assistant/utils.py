@@ -3,16 +3,135 @@ Utility functions for the Multi-Agent Portfolio Orchestrator
 """
 
 from strands import tool
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Tuple
+from dataclasses import dataclass, replace
+from types import MappingProxyType
 import pandas as pd
 import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yfinance as yf
 import numpy as np
-from datetime import datetime
+import pyarrow as pa
+import pyarrow.ipc
+from statistics import NormalDist
 import time
 import matplotlib.pyplot as plt
 
 
+SIMPLE_FIELDS = ('return_pct', 'volatility_pct', 'sharpe_ratio', 'current_price')
+COMPREHENSIVE_FIELDS = ('annual_return', 'volatility', 'sharpe_ratio', 'current_price')
+
+
+@dataclass(frozen=True)
+class StockSnapshot:
+    """
+    Immutable, column-oriented stock summary data.
+
+    Numeric fields are read-only float arrays and company/sector are tuples,
+    all aligned with tickers, so one snapshot can be shared by every tool call.
+    """
+    tickers: Tuple[str, ...]
+    company: Tuple[str, ...]
+    sector: Tuple[str, ...]
+    fields: Mapping[str, np.ndarray]
+    period: str = 'Unknown'
+    source: str = 'unknown'
+    csv_filename: str = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, field_names: Tuple[str, ...], source: str,
+                   csv_filename: str = None) -> 'StockSnapshot':
+        """Build from a DataFrame indexed by ticker"""
+        def text(column):
+            return tuple(df[column].fillna('Unknown').astype(str)) if column in df.columns else ('Unknown',) * len(df)
+
+        fields = {}
+        for name in field_names:
+            values = df[name].to_numpy(dtype=float, copy=True) if name in df.columns else np.zeros(len(df))
+            values.setflags(write=False)
+            fields[name] = values
+        period = df['period'].iloc[0] if 'period' in df.columns and len(df) else 'Unknown'
+        return cls(tuple(df.index), text('company'), text('sector'), MappingProxyType(fields),
+                   period, source, csv_filename)
+
+    @classmethod
+    def from_stocks(cls, stocks: Dict[str, Dict[str, Any]], field_names: Tuple[str, ...] = SIMPLE_FIELDS,
+                    period: str = 'Unknown', source: str = 'unknown') -> 'StockSnapshot':
+        """Build from the 'stocks' mapping the stock data tools return"""
+        df = pd.DataFrame.from_dict(stocks, orient='index')
+        return replace(cls.from_frame(df, field_names, source), period=period)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def to_stocks(self) -> Dict[str, Dict[str, Any]]:
+        """Per-ticker dicts in the tool result format (a new dict on every call)"""
+        columns = [self.fields[name].tolist() for name in self.fields]
+        return {
+            ticker: {'company': company, 'sector': sector,
+                     **dict(zip(self.fields, values))}
+            for ticker, company, sector, *values in zip(self.tickers, self.company, self.sector, *columns)
+        }
+
+    def to_result(self) -> Dict[str, Any]:
+        """Tool result as returned by the CSV loaders"""
+        return {
+            'success': True,
+            'stocks': self.to_stocks(),
+            'period': self.period,
+            'count': len(self),
+            'source': self.source,
+            'csv_filename': self.csv_filename
+        }
+
+
+# Parsed CSVs keyed by absolute path, reused until the file's mtime or size changes
+_snapshot_cache: Dict[tuple, Tuple[int, int, StockSnapshot]] = {}
+_snapshot_lock = threading.Lock()
+
+
+def load_stock_snapshot(csv_filename: str, field_names: Tuple[str, ...] = SIMPLE_FIELDS) -> StockSnapshot:
+    """
+    Parse a stock data CSV into a StockSnapshot, at most once per file version.
+
+    Raises:
+        FileNotFoundError: if the CSV doesn't exist
+    """
+    path = os.path.abspath(csv_filename)
+    stat = os.stat(path)
+    key = (path, field_names)
+    with _snapshot_lock:
+        cached = _snapshot_cache.get(key)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+    df = pd.read_csv(path, index_col='ticker')
+    snapshot = StockSnapshot.from_frame(df, field_names, 'csv_cache', csv_filename)
+    with _snapshot_lock:
+        _snapshot_cache[key] = (stat.st_mtime_ns, stat.st_size, snapshot)
+    return snapshot
+
+
+def _load_stock_data_from_csv(csv_filename: str, field_names: Tuple[str, ...]) -> Dict[str, Any]:
+    """Shared body of the CSV loaders: a tool result dict, or an error dict"""
+    try:
+        snapshot = load_stock_snapshot(csv_filename, field_names)
+        if len(snapshot) == 0:
+            return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
+        return snapshot.to_result()
+    except FileNotFoundError:
+        return {
+            'success': False,
+            'error': f'CSV file {csv_filename} not found',
+            'action': 'file_missing'
+        }
+    except Exception as e:
+        return {'success': False, 'error': f'CSV load failed: {str(e)}', 'action': 'load_error'}
+
+
 def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_stock_data.csv") -> Dict[str, Any]:
     """
     Load comprehensive stock data from CSV (annual_return, volatility fields).
@@ -23,43 +142,7 @@ def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_s
     Returns:
         Stock data with annual_return, volatility, sharpe_ratio
     """
-    try:
-        if not os.path.exists(csv_filename):
-            return {
-                'success': False,
-                'error': f'CSV file {csv_filename} not found',
-                'action': 'file_missing'
-            }
-        
-        df = pd.read_csv(csv_filename, index_col='ticker')
-        if df.empty:
-            return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
-        
-        stocks = {}
-        period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
-        
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'annual_return': float(row.get('annual_return', 0)),
-                'volatility': float(row.get('volatility', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
-        
-        return {
-            'success': True,
-            'stocks': stocks,
-            'period': period,
-            'count': len(stocks),
-            'source': 'csv_cache',
-            'csv_filename': csv_filename
-        }
-        
-    except Exception as e:
-        return {'success': False, 'error': f'CSV load failed: {str(e)}', 'action': 'load_error'}
+    return _load_stock_data_from_csv(csv_filename, COMPREHENSIVE_FIELDS)
 
 
 def _load_simple_stock_data_from_csv(csv_filename: str = "simple_stock_data.csv") -> Dict[str, Any]:
@@ -72,43 +155,7 @@ def _load_simple_stock_data_from_csv(csv_filename: str = "simple_stock_data.csv"
     Returns:
         Stock data with return_pct, volatility_pct, sharpe_ratio
     """
-    try:
-        if not os.path.exists(csv_filename):
-            return {
-                'success': False,
-                'error': f'CSV file {csv_filename} not found',
-                'action': 'file_missing'
-            }
-        
-        df = pd.read_csv(csv_filename, index_col='ticker')
-        if df.empty:
-            return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
-        
-        stocks = {}
-        period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
-        
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'return_pct': float(row.get('return_pct', 0)),
-                'volatility_pct': float(row.get('volatility_pct', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
-        
-        return {
-            'success': True,
-            'stocks': stocks,
-            'period': period,
-            'count': len(stocks),
-            'source': 'csv_cache',
-            'csv_filename': csv_filename
-        }
-        
-    except Exception as e:
-        return {'success': False, 'error': f'CSV load failed: {str(e)}', 'action': 'load_error'}
+    return _load_stock_data_from_csv(csv_filename, SIMPLE_FIELDS)
 
 
 # Create tool versions for Strands
@@ -134,6 +181,245 @@ load_simple_stock_data_from_csv_func = _load_simple_stock_data_from_csv
 _stock_data_cache = None
 _cache_timestamp = None
 
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_store"))
+PRICE_FETCH_BATCH_SIZE = int(os.environ.get("PRICE_FETCH_BATCH_SIZE", "25"))
+PRICE_FETCH_WORKERS = int(os.environ.get("PRICE_FETCH_WORKERS", "4"))
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Seconds before today's (possibly intraday) bar, or a range that came back empty, is downloaded again
+PRICE_REFETCH_TTL = int(os.environ.get("PRICE_REFETCH_TTL", "900"))
+
+
+class PriceStore:
+    """
+    Per-ticker daily price store backed by Arrow IPC files.
+
+    Each ticker lives in its own uncompressed .arrow file that records the date
+    range it covers, so only missing tickers and missing ranges are downloaded.
+    Reads memory-map the files instead of parsing CSVs. Company info (name and
+    sector) is kept alongside in info.json.
+    """
+
+    def __init__(self, directory: str = PRICE_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # ticker -> (start, end, monotonic time) of the last download that left a range uncovered
+        self._uncovered_downloads: Dict[str, Tuple[pd.Timestamp, pd.Timestamp, float]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.directory, f"{ticker.upper()}.arrow")
+
+    def coverage(self, ticker: str):
+        """(start, end) dates already stored for a ticker, end exclusive, or None"""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        return pd.Timestamp(metadata[b'start'].decode()), pd.Timestamp(metadata[b'end'].decode())
+
+    def read(self, ticker: str, start: str = None, end: str = None) -> pd.DataFrame:
+        """Stored daily prices for one ticker, optionally limited to [start, end)"""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+        with pa.memory_map(path) as source:
+            prices = pa.ipc.open_file(source).read_all().to_pandas().set_index('Date')
+        if start is not None:
+            prices = prices[prices.index >= pd.Timestamp(start)]
+        if end is not None:
+            prices = prices[prices.index < pd.Timestamp(end)]
+        return prices
+
+    def closes(self, tickers: List[str], start: str = None, end: str = None) -> pd.DataFrame:
+        """Closing prices as one column per ticker, indexed by date"""
+        return pd.DataFrame({ticker: self.read(ticker, start, end)['Close'] for ticker in tickers})
+
+    def missing_ranges(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp):
+        """
+        Date ranges to download so the stored range covers [start, end).
+
+        Stored data stays one contiguous range, so a request that doesn't touch
+        it also fetches the gap in between.
+        """
+        covered = self.coverage(ticker)
+        if covered is None:
+            return [(start, end)]
+        covered_start, covered_end = covered
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            ranges.append((covered_end, end))
+        return ranges
+
+    def ensure(self, tickers: List[str], start: str, end: str, refresh: bool = False) -> List[str]:
+        """
+        Download whatever is missing for [start, end) and merge it into the store.
+
+        Tickers that need the same range are downloaded together in batches,
+        and batches run concurrently.
+
+        Returns:
+            Tickers that had data downloaded
+        """
+        start = pd.Timestamp(start).normalize()
+        # Download up to and including today; _merge never marks today as covered
+        end = min(pd.Timestamp(end).normalize(), pd.Timestamp.today().normalize() + pd.Timedelta(days=1))
+
+        by_range: Dict[tuple, List[str]] = {}
+        for ticker in tickers:
+            if refresh:
+                ranges = [(start, end)]
+            else:
+                ranges = [r for r in self.missing_ranges(ticker, start, end) if not self._recently_downloaded(ticker, *r)]
+            for date_range in ranges:
+                by_range.setdefault(date_range, []).append(ticker)
+
+        batches = [
+            (date_range, group[i:i + PRICE_FETCH_BATCH_SIZE])
+            for date_range, group in by_range.items()
+            for i in range(0, len(group), PRICE_FETCH_BATCH_SIZE)
+        ]
+        if not batches:
+            return []
+
+        print(f"🌐 Downloading prices for {sum(len(b) for _, b in batches)} ticker ranges in {len(batches)} batches...")
+        fetched = set()
+        today = pd.Timestamp.today().normalize()
+        with ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS) as executor:
+            futures = {executor.submit(self._download, batch, *date_range): (batch, date_range)
+                       for date_range, batch in batches}
+            for future in as_completed(futures):
+                batch, (range_start, range_end) = futures[future]
+                try:
+                    frames = future.result()
+                except Exception as e:
+                    print(f"Warning: Could not fetch prices for {', '.join(batch)}: {e}")
+                    continue
+                for ticker in batch:
+                    prices = frames.get(ticker)
+                    if prices is not None and not prices.empty:
+                        self._merge(ticker, prices, range_start, range_end, replace=refresh)
+                        fetched.add(ticker)
+                        if range_end > today:
+                            # Today stays uncovered until the session is over; don't refetch it every call
+                            self._remember_uncovered(ticker, today, range_end)
+                    elif range_end <= today and len(pd.bdate_range(range_start, range_end - pd.Timedelta(days=1))) == 0:
+                        # A past weekend has no trading days to wait for
+                        self._merge(ticker, pd.DataFrame(columns=PRICE_COLUMNS), range_start, range_end)
+                    else:
+                        # yfinance returns an empty frame on rate limits and many errors (and on
+                        # holidays); try the range again once the refetch TTL has passed
+                        self._remember_uncovered(ticker, range_start, range_end)
+        return sorted(fetched)
+
+    def _remember_uncovered(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> None:
+        with self._lock:
+            self._uncovered_downloads[ticker] = (start, end, time.monotonic())
+
+    def _recently_downloaded(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        """Whether [start, end) was downloaded within PRICE_REFETCH_TTL without becoming covered"""
+        with self._lock:
+            attempt = self._uncovered_downloads.get(ticker)
+        return (attempt is not None and attempt[0] <= start and end <= attempt[1]
+                and time.monotonic() - attempt[2] < PRICE_REFETCH_TTL)
+
+    def _download(self, batch: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        data = yf.download(batch, start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'),
+                           group_by='ticker', auto_adjust=True, threads=False, progress=False)
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        for ticker in batch:
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            prices = data[ticker].dropna(how='all')
+            prices.index = pd.DatetimeIndex(prices.index).tz_localize(None).normalize()
+            frames[ticker] = prices.reindex(columns=PRICE_COLUMNS).astype(float)
+        return frames
+
+    def _merge(self, ticker: str, prices: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp,
+               replace: bool = False) -> None:
+        """Combine downloaded prices with the stored file and widen its covered range"""
+        # Today's bar may still be intraday, so coverage stops at the last completed session
+        # and the next call downloads today again, replacing the stored bar
+        end = min(end, pd.Timestamp.today().normalize())
+        with self._lock:
+            covered = None if replace else self.coverage(ticker)
+            stored = self.read(ticker) if covered else pd.DataFrame(columns=PRICE_COLUMNS)
+            combined = pd.concat([stored, prices])
+            combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+            combined = combined.reindex(columns=PRICE_COLUMNS).astype(float)
+            combined.index = pd.DatetimeIndex(combined.index, name='Date')
+
+            if covered:
+                start, end = min(start, covered[0]), max(end, covered[1])
+            table = pa.Table.from_pandas(combined.reset_index(), preserve_index=False)
+            table = table.replace_schema_metadata({'start': start.isoformat(), 'end': end.isoformat()})
+
+            # Write to a temporary file first so readers never see a partial file
+            path = self._path(ticker)
+            temporary = f"{path}.tmp"
+            with pa.OSFile(temporary, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temporary, path)
+
+    def info(self, tickers: List[str], refresh: bool = False) -> Dict[str, Dict[str, str]]:
+        """Company name and sector per ticker, fetching only the ones not stored yet"""
+        path = os.path.join(self.directory, 'info.json')
+        with self._lock:
+            stored = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    stored = json.load(f)
+
+        missing = [t for t in tickers if refresh or t not in stored]
+        if missing:
+            def fetch(ticker):
+                info = yf.Ticker(ticker).info
+                return {'company': info.get('longName', ticker), 'sector': info.get('sector', 'Unknown')}
+
+            with ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS) as executor:
+                for ticker, future in zip(missing, [executor.submit(fetch, t) for t in missing]):
+                    try:
+                        stored[ticker] = future.result()
+                    except Exception as e:
+                        print(f"Warning: Could not fetch info for {ticker}: {e}")
+
+            with self._lock:
+                with open(f"{path}.tmp", 'w') as f:
+                    json.dump(stored, f, indent=2)
+                os.replace(f"{path}.tmp", path)
+
+        return {t: stored.get(t, {'company': t, 'sector': 'Unknown'}) for t in tickers}
+
+
+_price_store = None
+
+
+def get_price_store() -> PriceStore:
+    """Shared price store, created on first use"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore()
+    return _price_store
+
+
+def _period_start(period: str) -> pd.Timestamp:
+    """Start date for a yfinance-style period such as '5d', '3mo', '1y' or 'ytd'"""
+    today = pd.Timestamp.today().normalize()
+    if period == 'ytd':
+        return today.replace(month=1, day=1)
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period '{period}'")
+    count, unit = int(match.group(1)), match.group(2)
+    offsets = {'d': pd.DateOffset(days=count), 'wk': pd.DateOffset(weeks=count),
+               'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}
+    return today - offsets[unit]
+
 
 @tool
 def get_stock_data(tickers: List[str], start_date: str = "2023-01-01", end_date: str = "2024-12-31", save_csv: bool = False, use_cache: bool = True) -> Dict[str, Any]:
@@ -143,84 +429,66 @@ def get_stock_data(tickers: List[str], start_date: str = "2023-01-01", end_date:
     Args:
         tickers: List of stock symbols
         start_date: Start date for data fetch
-        end_date: End date for data fetch
+        end_date: End date for data fetch (exclusive)
         save_csv: Whether to save CSV files including daily prices
-        use_cache: Whether to check/use CSV cache first
+        use_cache: Whether to reuse prices already in the local price store
     
     Returns:
         Stock performance data WITH daily prices and summary metrics
     """
-    # Try to load from cache first if enabled
-    if use_cache:
-        cache_result = load_comprehensive_stock_data_from_csv()
-        if cache_result['success']:
-            cached_tickers = set(cache_result['stocks'].keys())
-            needed_tickers = set(tickers)
-            
-            if needed_tickers.issubset(cached_tickers):
-                print(f"📁 Using cached comprehensive data with daily prices")
-                filtered_stocks = {t: cache_result['stocks'][t] for t in tickers if t in cache_result['stocks']}
-                return {
-                    'success': True,
-                    'stocks': filtered_stocks,
-                    'period': cache_result['period'],
-                    'source': 'cache'
-                }
-    
-    # Fetch fresh data
-    print("🌐 Fetching fresh comprehensive stock data with daily prices...")
+    store = get_price_store()
     try:
+        # Only tickers and date ranges missing from the store are downloaded
+        fetched = store.ensure(tickers, start_date, end_date, refresh=not use_cache)
+        if not fetched:
+            print(f"📁 Using stored daily prices for {len(tickers)} tickers")
+        info = store.info(tickers)
+        
         stock_data = {}
         daily_prices = {}
         
         for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
-                info = stock.info
+            hist = store.read(ticker, start_date, end_date)
+            
+            if len(hist) > 0:
+                start_price = hist['Close'].iloc[0]
+                end_price = hist['Close'].iloc[-1]
+                total_return = ((end_price - start_price) / start_price) * 100
                 
-                if len(hist) > 0:
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
-                    total_return = ((end_price - start_price) / start_price) * 100
-                    
-                    daily_returns = hist['Close'].pct_change().dropna()
-                    volatility = daily_returns.std() * np.sqrt(252) * 100
-                    
-                    # Calculate annual return
-                    years = len(hist) / 252
-                    annual_return = total_return / years if years > 0 else total_return
-                    sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
-                    
-                    # Summary metrics
-                    stock_data[ticker] = {
-                        'company': info.get('longName', ticker),
-                        'sector': info.get('sector', 'Unknown'),
-                        'annual_return': round(annual_return, 2),
-                        'volatility': round(volatility, 2),
-                        'sharpe_ratio': round(sharpe_ratio, 2),
-                        'current_price': round(end_price, 2)
-                    }
-                    
-                    # Store DAILY PRICES (key difference from get_stock_analysis)
-                    daily_prices[ticker] = hist['Close'].round(2).to_dict()
-                    
-            except Exception as e:
-                print(f"Warning: Could not fetch data for {ticker}: {e}")
-                continue
+                daily_returns = hist['Close'].pct_change().dropna()
+                volatility = daily_returns.std() * np.sqrt(252) * 100
+                
+                # Calculate annual return
+                years = len(hist) / 252
+                annual_return = total_return / years if years > 0 else total_return
+                sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
+                
+                # Summary metrics
+                stock_data[ticker] = {
+                    'company': info[ticker]['company'],
+                    'sector': info[ticker]['sector'],
+                    'annual_return': round(float(annual_return), 2),
+                    'volatility': round(float(volatility), 2),
+                    'sharpe_ratio': round(float(sharpe_ratio), 2),
+                    'current_price': round(float(end_price), 2)
+                }
+                
+                # Store DAILY PRICES (key difference from get_stock_analysis)
+                daily_prices[ticker] = {date.strftime('%Y-%m-%d'): price
+                                        for date, price in hist['Close'].round(2).items()}
+            else:
+                print(f"Warning: No price data for {ticker}")
         
         result = {
             'success': True, 
             'stocks': stock_data, 
             'daily_prices': daily_prices,  # This is what makes it comprehensive
             'period': f"{start_date} to {end_date}", 
-            'source': 'fresh'
+            'source': 'fresh' if fetched else 'cache'
         }
         
         # Save to CSV if requested
         if save_csv and stock_data:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             # Save summary data
             df = pd.DataFrame.from_dict(stock_data, orient='index')
             df.to_csv("comprehensive_stock_data.csv", index_label='ticker')
@@ -228,7 +496,7 @@ def get_stock_data(tickers: List[str], start_date: str = "2023-01-01", end_date:
             # Save DAILY PRICES (comprehensive feature)
             if daily_prices:
                 prices_df = pd.DataFrame(daily_prices)
-                prices_df.to_csv(f"stock_daily_prices_{start_date}_to_{end_date}_{timestamp}.csv")
+                prices_df.to_csv(f"stock_daily_prices_{start_date}_to_{end_date}.csv")
                 print(f"💾 Comprehensive data + daily prices saved to CSV")
         
         return result
@@ -245,7 +513,7 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     Args:
         tickers: List of stock symbols (defaults to major stocks)
         period: Time period for data ("1y", "6mo", "3mo")
-        use_cache: Whether to check/use CSV cache first
+        use_cache: Whether to reuse stored prices and save the summary CSV
     
     Returns:
         Stock analysis with SUMMARY METRICS ONLY (return_pct, volatility_pct)
@@ -254,33 +522,23 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     if tickers is None:
         tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'JPM', 'JNJ', 'V']
     
-    # Try to load from cache first if enabled
-    if use_cache:
-        cache_result = load_simple_stock_data_from_csv()
-        if cache_result['success']:
-            cached_tickers = set(cache_result['stocks'].keys())
-            needed_tickers = set(tickers)
-            
-            if needed_tickers.issubset(cached_tickers):
-                print(f"📁 Using cached simple analysis (summary metrics only)")
-                filtered_stocks = {t: cache_result['stocks'][t] for t in tickers if t in cache_result['stocks']}
-                return {
-                    'success': True,
-                    'period': cache_result['period'],
-                    'stocks': filtered_stocks,
-                    'count': len(filtered_stocks),
-                    'source': 'cache'
-                }
+    store = get_price_store()
+    try:
+        start = _period_start(period)
+        end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        # Repeat calls only download the days added since the last one
+        fetched = store.ensure(tickers, start, end, refresh=not use_cache)
+        if not fetched:
+            print("📁 Using stored prices for summary analysis")
+        info = store.info(tickers)
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'period': period, 'stocks': {}, 'count': 0}
     
-    # Fetch fresh data
-    print("🌐 Fetching fresh market data for summary analysis...")
     stock_data = {}
     
     for ticker in tickers:
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            info = stock.info
+            hist = store.read(ticker, start, end)
             
             if len(hist) > 0:
                 start_price = hist['Close'].iloc[0]
@@ -293,12 +551,12 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
                 
                 # SUMMARY METRICS ONLY (no daily prices)
                 stock_data[ticker] = {
-                    'company': info.get('longName', ticker),
-                    'sector': info.get('sector', 'Unknown'),
-                    'return_pct': round(total_return, 1),
-                    'volatility_pct': round(volatility, 1),
-                    'sharpe_ratio': round(sharpe_ratio, 2),
-                    'current_price': round(end_price, 2)
+                    'company': info[ticker]['company'],
+                    'sector': info[ticker]['sector'],
+                    'return_pct': round(float(total_return), 1),
+                    'volatility_pct': round(float(volatility), 1),
+                    'sharpe_ratio': round(float(sharpe_ratio), 2),
+                    'current_price': round(float(end_price), 2)
                 }
                 
         except Exception as e:
@@ -310,7 +568,7 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
         'period': period,
         'stocks': stock_data,
         'count': len(stock_data),
-        'source': 'fresh'
+        'source': 'fresh' if fetched else 'cache'
         # Note: NO daily_prices key - this is summary only
     }
     
@@ -323,6 +581,171 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     return result
 
 
+# Vectorized portfolio engine shared by the portfolio tools
+RISK_FREE_RATE = 2.0  # percent, same rate the stock analysis tools use for Sharpe
+TRADING_DAYS = 252
+
+
+class PortfolioEngine:
+    """
+    Evaluates many portfolios at once from expected returns and a covariance matrix.
+
+    All figures are in percent: annualized (or per analysis period) returns, and
+    volatility as the standard deviation of that return. The covariance matrix is
+    computed once per engine; each call to evaluate() scores a whole matrix of
+    weight vectors with a handful of NumPy operations.
+    """
+
+    def __init__(self, tickers: List[str], expected_returns: np.ndarray, covariance: np.ndarray):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.expected_returns = np.asarray(expected_returns, dtype=float)
+        self.covariance = np.asarray(covariance, dtype=float)
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame) -> 'PortfolioEngine':
+        """
+        Build from daily closing prices (one column per ticker).
+
+        Rows are aligned on dates every ticker traded; returns and covariance are
+        annualized from daily simple returns.
+        """
+        returns = prices.sort_index().pct_change().dropna(how='any').to_numpy()
+        expected = returns.mean(axis=0) * TRADING_DAYS * 100
+        covariance = np.cov(returns, rowvar=False) * TRADING_DAYS * 100 ** 2
+        return cls(prices.columns, expected, np.atleast_2d(covariance))
+
+    @classmethod
+    def from_summary(cls, snapshot: StockSnapshot, return_key: str = 'return_pct',
+                     volatility_key: str = 'volatility_pct', prices: pd.DataFrame = None) -> 'PortfolioEngine':
+        """
+        Build from per-stock summary metrics in a StockSnapshot.
+
+        Expected returns come from the summary. The covariance comes from daily
+        prices when they cover every ticker; otherwise the stocks are treated as
+        perfectly correlated, which matches the weighted sum of volatilities the
+        tools used before and is an upper bound on portfolio volatility.
+        """
+        tickers = list(snapshot.tickers)
+        expected = snapshot.fields[return_key]
+
+        if prices is not None and set(tickers).issubset(prices.columns):
+            covariance = cls.from_prices(prices[tickers]).covariance
+        else:
+            volatility = snapshot.fields[volatility_key]
+            covariance = np.outer(volatility, volatility)
+        return cls(tickers, expected, covariance)
+
+    def weight_matrix(self, portfolios: Dict[str, Dict[str, float]], normalize: bool = False):
+        """
+        Convert percentage allocations to a (strategies x tickers) weight matrix.
+
+        Tickers the engine doesn't know are dropped. With normalize=True weights
+        are divided by each portfolio's total allocation first.
+
+        Returns:
+            (weights, matched) where matched counts known tickers per portfolio
+        """
+        weights = np.zeros((len(portfolios), len(self.tickers)))
+        matched = np.zeros(len(portfolios), dtype=int)
+        for row, allocation in enumerate(portfolios.values()):
+            total = sum(allocation.values()) if normalize else 100.0
+            for ticker, percentage in allocation.items():
+                column = self.index.get(ticker)
+                if column is not None and total:
+                    weights[row, column] += percentage / total
+                    matched[row] += 1
+        return weights, matched
+
+    def evaluate(self, weights: np.ndarray, risk_free_rate: float = RISK_FREE_RATE,
+                 confidence: float = 0.95) -> Dict[str, np.ndarray]:
+        """
+        Score every row of a (portfolios x tickers) weight matrix.
+
+        Returns:
+            Arrays of expected return, volatility, Sharpe ratio and parametric
+            (normal) value at risk, all in percent of the amount invested
+        """
+        weights = np.atleast_2d(weights)
+        expected = weights @ self.expected_returns
+        variance = ((weights @ self.covariance) * weights).sum(axis=1)
+        volatility = np.sqrt(np.clip(variance, 0, None))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(volatility > 0, (expected - risk_free_rate) / volatility, 0.0)
+
+        z_score = NormalDist().inv_cdf(confidence)
+        # Long-only portfolios can't lose more than the amount invested
+        value_at_risk = np.clip(z_score * volatility - expected, 0, 100)
+
+        return {
+            'expected_return': expected,
+            'volatility': volatility,
+            'sharpe_ratio': sharpe,
+            'value_at_risk': value_at_risk
+        }
+
+
+def _as_lists(metrics: Dict[str, np.ndarray]) -> Dict[str, List[float]]:
+    """Plain Python floats, so tool results serialize cleanly for the agents"""
+    return {name: values.tolist() for name, values in metrics.items()}
+
+
+def _risk_level(volatility: float) -> str:
+    """Risk bucket used across the portfolio tools"""
+    if volatility < 20:
+        return "Low"
+    elif volatility < 30:
+        return "Moderate"
+    return "High"
+
+
+def _load_daily_prices(tickers: List[str]) -> pd.DataFrame:
+    """Stored closing prices on the dates all tickers share, if the price store has every one"""
+    store = get_price_store()
+    tickers = list(tickers)
+    if not all(store.coverage(ticker) for ticker in tickers):
+        return None
+    try:
+        prices = store.closes(tickers).dropna(how='any')
+    except Exception as e:
+        print(f"⚠️ Could not read stored daily prices: {e}")
+        return None
+    # Need at least two daily returns for a covariance estimate
+    return prices if len(prices) > 2 else None
+
+
+def _analysis_snapshot(stock_analysis: Any = None) -> StockSnapshot:
+    """
+    Snapshot for a tool's stock analysis argument.
+
+    None loads the cached simple stock data CSV (parsed at most once per file
+    version); a tool result dict is converted; a StockSnapshot is used as is.
+    Returns None when no usable data is available.
+    """
+    if isinstance(stock_analysis, StockSnapshot):
+        return stock_analysis
+    if stock_analysis is None:
+        try:
+            snapshot = load_stock_snapshot("simple_stock_data.csv")
+        except Exception:
+            return None
+        return snapshot if len(snapshot) else None
+    if not stock_analysis.get('success'):
+        return None
+    return StockSnapshot.from_stocks(stock_analysis['stocks'], period=stock_analysis.get('period', 'Unknown'),
+                                     source=stock_analysis.get('source', 'unknown'))
+
+
+def _period_label(snapshot: StockSnapshot, default: str) -> str:
+    """Period the snapshot's data covers, or default when the data didn't record one"""
+    return snapshot.period if snapshot.period and snapshot.period != 'Unknown' else default
+
+
+def _summary_engine(snapshot: StockSnapshot) -> PortfolioEngine:
+    return PortfolioEngine.from_summary(snapshot, prices=_load_daily_prices(snapshot.tickers))
+
+
 # Portfolio creation functions moved from lab3
 @tool
 def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_count: int = 4) -> Dict[str, Any]:
@@ -336,45 +759,34 @@ def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_co
     Returns:
         Dictionary with portfolio allocations and metrics
     """
-    # Get stock analysis if not provided (load from cache)
-    if stock_analysis is None:
-        stock_analysis = load_simple_stock_data_from_csv()
-    
-    if not stock_analysis.get('success'):
+    snapshot = _analysis_snapshot(stock_analysis)
+    if snapshot is None:
         return {'success': False, 'error': 'No cached stock analysis available. Run stock_data_agent first.'}
     
-    stocks = stock_analysis['stocks']
-    
-    # Sort stocks by return percentage (growth focus) - simple analysis uses return_pct
-    sorted_stocks = sorted(stocks.items(), 
-                          key=lambda x: x[1]['return_pct'], 
-                          reverse=True)
-    
-    # Select top performers for growth portfolio
-    selected_stocks = sorted_stocks[:allocation_count]
+    # Top performers by return percentage (growth focus) - simple analysis uses return_pct
+    selected = np.argsort(-snapshot.fields['return_pct'], kind='stable')[:allocation_count]
     
     # Create simple equal-weight allocation
-    allocation_pct = 100.0 / len(selected_stocks)
-    
-    portfolio = {}
-    for ticker, data in selected_stocks:
-        portfolio[ticker] = round(allocation_pct, 1)
+    allocation_pct = 100.0 / len(selected)
+    portfolio = {snapshot.tickers[i]: round(allocation_pct, 1) for i in selected}
     
     # Calculate portfolio metrics - simple analysis uses return_pct, volatility_pct
-    total_return = sum(stocks[ticker]['return_pct'] * (allocation_pct/100) 
-                      for ticker in portfolio.keys())
-    
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (allocation_pct/100) 
-                        for ticker in portfolio.keys())
+    engine = _summary_engine(snapshot)
+    weights, _ = engine.weight_matrix({'Growth': portfolio})
+    metrics = _as_lists(engine.evaluate(weights))
+    total_return = metrics['expected_return'][0]
+    volatility = metrics['volatility'][0]
     
     return {
         'success': True,
         'strategy': 'Growth',
         'portfolio': portfolio,
         'expected_return': round(total_return, 1),
-        'risk_level': 'High' if avg_volatility > 25 else 'Moderate',
+        'portfolio_volatility': round(volatility, 1),
+        'sharpe_ratio': round(metrics['sharpe_ratio'][0], 2),
+        'risk_level': 'High' if volatility > 25 else 'Moderate',
         'stock_count': len(portfolio),
-        'data_source': stock_analysis.get('source', 'unknown')
+        'data_source': snapshot.source
     }
 
 
@@ -390,38 +802,25 @@ def create_diversified_portfolio(stock_analysis: Dict[str, Any] = None, allocati
     Returns:
         Dictionary with portfolio allocations and metrics
     """
-    # Get stock analysis if not provided (load from cache)
-    if stock_analysis is None:
-        stock_analysis = load_simple_stock_data_from_csv()
-    
-    if not stock_analysis.get('success'):
+    snapshot = _analysis_snapshot(stock_analysis)
+    if snapshot is None:
         return {'success': False, 'error': 'No cached stock analysis available. Run stock_data_agent first.'}
     
-    stocks = stock_analysis['stocks']
-    
-    # Sort stocks by Sharpe ratio (risk-adjusted returns for diversification)
-    sorted_stocks = sorted(stocks.items(), 
-                          key=lambda x: x[1]['sharpe_ratio'], 
-                          reverse=True)
-    
-    # Select top risk-adjusted performers
-    selected_stocks = sorted_stocks[:allocation_count]
+    # Top risk-adjusted performers by Sharpe ratio (diversification focus)
+    selected = np.argsort(-snapshot.fields['sharpe_ratio'], kind='stable')[:allocation_count]
     
     # Create sector-aware allocation (diversification focus)
     sectors = {}
-    for ticker, data in selected_stocks:
-        sector = data['sector']
-        if sector not in sectors:
-            sectors[sector] = []
-        sectors[sector].append(ticker)
+    for i in selected:
+        sectors.setdefault(snapshot.sector[i], []).append(snapshot.tickers[i])
     
     # Allocate based on diversification principle
     portfolio = {}
-    base_allocation = 100.0 / len(selected_stocks)
+    base_allocation = 100.0 / len(selected)
     
-    for ticker, data in selected_stocks:
+    for i in selected:
         # Slightly reduce allocation if sector is over-represented
-        sector_count = len(sectors[data['sector']])
+        sector_count = len(sectors[snapshot.sector[i]])
         total_sectors = len(sectors)
         
         # Diversification adjustment (simple but effective)
@@ -430,28 +829,71 @@ def create_diversified_portfolio(stock_analysis: Dict[str, Any] = None, allocati
         else:
             adjustment = 1.0
             
-        portfolio[ticker] = round(base_allocation * adjustment, 1)
+        portfolio[snapshot.tickers[i]] = round(base_allocation * adjustment, 1)
     
     # Normalize to 100%
     total = sum(portfolio.values())
     portfolio = {k: round(v * 100 / total, 1) for k, v in portfolio.items()}
     
     # Calculate portfolio metrics - simple analysis uses return_pct, volatility_pct
-    total_return = sum(stocks[ticker]['return_pct'] * (allocation/100) 
-                      for ticker, allocation in portfolio.items())
-    
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (allocation/100) 
-                        for ticker, allocation in portfolio.items())
+    engine = _summary_engine(snapshot)
+    weights, _ = engine.weight_matrix({'Diversified': portfolio})
+    metrics = _as_lists(engine.evaluate(weights))
+    total_return = metrics['expected_return'][0]
+    volatility = metrics['volatility'][0]
     
     return {
         'success': True,
         'strategy': 'Diversified',
         'portfolio': portfolio,
         'expected_return': round(total_return, 1),
-        'risk_level': 'Low' if avg_volatility < 20 else 'Moderate',
+        'portfolio_volatility': round(volatility, 1),
+        'sharpe_ratio': round(metrics['sharpe_ratio'][0], 2),
+        'risk_level': 'Low' if volatility < 20 else 'Moderate',
         'sectors': len(sectors),
         'stock_count': len(portfolio),
-        'data_source': stock_analysis.get('source', 'unknown')
+        'data_source': snapshot.source
+    }
+
+
+def _portfolio_performance(portfolios: Dict[str, Dict[str, float]], investment_amount: float,
+                           snapshot: StockSnapshot) -> Dict[str, Any]:
+    """Performance of every strategy against one snapshot, scored in a single engine pass"""
+    try:
+        engine = _summary_engine(snapshot)
+        weights, _ = engine.weight_matrix(portfolios)
+        metrics = _as_lists(engine.evaluate(weights))
+    except Exception as e:
+        return {'success': False, 'error': f'Calculation failed: {str(e)}'}
+    
+    results = {}
+    for row, strategy in enumerate(portfolios.keys()):
+        total_return = metrics['expected_return'][row]
+        total_volatility = metrics['volatility'][row]
+        
+        # Calculate investment outcome
+        final_value = investment_amount * (1 + total_return / 100.0)
+        profit = final_value - investment_amount
+        
+        results[strategy] = {
+            'expected_return_pct': round(total_return, 1),
+            'portfolio_volatility': round(total_volatility, 1),
+            'sharpe_ratio': round(metrics['sharpe_ratio'][row], 2),
+            'value_at_risk_95': round(investment_amount * metrics['value_at_risk'][row] / 100.0, 2),
+            'risk_level': _risk_level(total_volatility),
+            'initial_investment': investment_amount,
+            'final_value': round(final_value, 2),
+            'profit': round(profit, 2),
+            'profit_percentage': round((profit / investment_amount) * 100, 1),
+            'data_source': snapshot.source
+        }
+    
+    return {
+        'success': True,
+        'investment_amount': investment_amount,
+        'results': results,
+        'portfolio_count': len(results),
+        'data_source': snapshot.source
     }
 
 
@@ -471,59 +913,11 @@ def calculate_portfolio_performance(portfolios: Dict[str, Dict[str, float]], inv
         return {'success': False, 'error': 'No portfolios provided'}
     
     # Get cached stock analysis for calculations
-    stock_analysis = load_simple_stock_data_from_csv()
-    if not stock_analysis.get('success'):
+    snapshot = _analysis_snapshot()
+    if snapshot is None:
         return {'success': False, 'error': 'No cached stock analysis available. Run stock_data_agent first.'}
     
-    stocks = stock_analysis['stocks']
-    results = {}
-    
-    for strategy, allocation in portfolios.items():
-        try:
-            # Calculate weighted portfolio return
-            total_return = 0.0
-            total_volatility = 0.0
-            
-            for ticker, percentage in allocation.items():
-                if ticker in stocks:
-                    weight = percentage / 100.0
-                    # Use simple analysis field names: return_pct, volatility_pct
-                    total_return += stocks[ticker]['return_pct'] * weight
-                    total_volatility += stocks[ticker]['volatility_pct'] * weight
-            
-            # Calculate investment outcome
-            final_value = investment_amount * (1 + total_return / 100.0)
-            profit = final_value - investment_amount
-            
-            # Risk assessment
-            if total_volatility < 20:
-                risk_level = "Low"
-            elif total_volatility < 30:
-                risk_level = "Moderate"
-            else:
-                risk_level = "High"
-            
-            results[strategy] = {
-                'expected_return_pct': round(total_return, 1),
-                'portfolio_volatility': round(total_volatility, 1),
-                'risk_level': risk_level,
-                'initial_investment': investment_amount,
-                'final_value': round(final_value, 2),
-                'profit': round(profit, 2),
-                'profit_percentage': round((profit / investment_amount) * 100, 1),
-                'data_source': stock_analysis.get('source', 'unknown')
-            }
-            
-        except Exception as e:
-            results[strategy] = {'error': f'Calculation failed: {str(e)}'}
-    
-    return {
-        'success': True,
-        'investment_amount': investment_amount,
-        'results': results,
-        'portfolio_count': len(results),
-        'data_source': stock_analysis.get('source', 'unknown')
-    }
+    return _portfolio_performance(portfolios, investment_amount, snapshot)
 
 
 # Visualization functions moved from lab3
@@ -700,6 +1094,39 @@ def visualize_performance_comparison(performance_data: Dict[str, float], title:
 
 
 # Validation functions for portfolio analysis accuracy
+def _validate_portfolios(portfolios: Dict[str, Dict[str, float]], snapshot: StockSnapshot,
+                         validation_period: str = 'Current') -> Dict[str, Dict[str, Any]]:
+    """Validation metrics for every strategy against one snapshot, scored in a single engine pass"""
+    # Weights are normalized by total allocation; tickers missing from the validation data are skipped
+    engine = _summary_engine(snapshot)
+    weights, matched = engine.weight_matrix(portfolios, normalize=True)
+    # Sharpe ratio here is return per unit of risk, without a risk-free rate
+    metrics = _as_lists(engine.evaluate(weights, risk_free_rate=0.0))
+    
+    results = {}
+    for row, (strategy, allocations) in enumerate(portfolios.items()):
+        if sum(allocations.values()) == 0:
+            results[strategy] = {'success': False, 'error': 'No valid allocations'}
+            continue
+        if matched[row] == 0:
+            results[strategy] = {'success': False, 'error': 'No valid stocks found in validation data'}
+            continue
+        
+        actual_volatility = metrics['volatility'][row]
+        results[strategy] = {
+            'success': True,
+            'actual_return': round(metrics['expected_return'][row], 1),
+            'actual_volatility': round(actual_volatility, 1),
+            'actual_sharpe': round(metrics['sharpe_ratio'][row], 2),
+            'value_at_risk_95': round(metrics['value_at_risk'][row], 1),
+            'risk_level': _risk_level(actual_volatility),
+            'validation_period': validation_period,
+            'stocks_validated': int(matched[row]),
+            'total_stocks': len(allocations)
+        }
+    return results
+
+
 @tool
 def validate_portfolio_performance(portfolio_allocations: Dict[str, float], 
                                  validation_data: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -720,55 +1147,13 @@ def validate_portfolio_performance(portfolio_allocations: Dict[str, float],
     if validation_data is None:
         validation_data = get_stock_analysis()
     
-    if not validation_data.get('success'):
+    snapshot = _analysis_snapshot(validation_data)
+    if snapshot is None:
         return {'success': False, 'error': 'No validation market data available'}
     
-    validation_stocks = validation_data['stocks']
-    
-    # Calculate portfolio performance using validation data
-    total_allocation = sum(portfolio_allocations.values())
-    if total_allocation == 0:
-        return {'success': False, 'error': 'No valid allocations'}
-    
-    # Normalize allocations to percentages
-    normalized_alloc = {k: v/total_allocation for k, v in portfolio_allocations.items()}
-    
-    # Calculate weighted return using validation data
-    actual_return = 0.0
-    actual_volatility = 0.0
-    valid_stocks = 0
-    
-    for ticker, weight in normalized_alloc.items():
-        if ticker in validation_stocks:
-            # Use return_pct from validation data
-            actual_return += validation_stocks[ticker]['return_pct'] * weight
-            actual_volatility += validation_stocks[ticker]['volatility_pct'] * weight
-            valid_stocks += 1
-    
-    if valid_stocks == 0:
-        return {'success': False, 'error': 'No valid stocks found in validation data'}
-    
-    # Calculate Sharpe ratio using validation data
-    actual_sharpe = actual_return / actual_volatility if actual_volatility > 0 else 0
-    
-    # Determine risk level
-    if actual_volatility < 20:
-        risk_level = "Low"
-    elif actual_volatility < 30:
-        risk_level = "Moderate"
-    else:
-        risk_level = "High"
-    
-    return {
-        'success': True,
-        'actual_return': round(actual_return, 1),
-        'actual_volatility': round(actual_volatility, 1),
-        'actual_sharpe': round(actual_sharpe, 2),
-        'risk_level': risk_level,
-        'validation_period': validation_data.get('period', 'Current'),
-        'stocks_validated': valid_stocks,
-        'total_stocks': len(portfolio_allocations)
-    }
+    results = _validate_portfolios({'validation': portfolio_allocations}, snapshot,
+                                   _period_label(snapshot, 'Current'))
+    return results['validation']
 
 
 @tool
@@ -789,25 +1174,25 @@ def compare_analysis_accuracy(portfolios: Dict[str, Dict[str, float]],
     if not portfolios:
         return {'success': False, 'error': 'No portfolios provided'}
     
-    # Get historical data if not provided
-    if historical_data is None:
-        historical_data = load_simple_stock_data_from_csv()
+    # Historical data defaults to the cached simple stock data CSV
+    historical = _analysis_snapshot(historical_data)
     
     # Get validation data if not provided  
     if validation_data is None:
         validation_data = get_stock_analysis()
+    validation = _analysis_snapshot(validation_data)
     
-    if not historical_data.get('success') or not validation_data.get('success'):
+    if historical is None or validation is None:
         return {'success': False, 'error': 'Missing historical or validation data'}
     
+    # Analyzed (historical) and actual (validation) performance for all strategies at once
+    analyzed_performance = _portfolio_performance(portfolios, 1000.0, historical)
+    actual_performances = _validate_portfolios(portfolios, validation, _period_label(validation, 'Current'))
+    
     validation_results = {}
     
-    for strategy, allocations in portfolios.items():
-        # Get analyzed performance (from historical data)
-        analyzed_performance = calculate_portfolio_performance({strategy: allocations})
-        
-        # Get actual performance (from validation data)
-        actual_performance = validate_portfolio_performance(allocations, validation_data)
+    for strategy in portfolios:
+        actual_performance = actual_performances[strategy]
         
         if (analyzed_performance.get('success') and 
             actual_performance.get('success') and 
@@ -846,8 +1231,8 @@ def compare_analysis_accuracy(portfolios: Dict[str, Dict[str, float]],
                 'best_analyzer': best_analyzer,
                 'worst_analyzer': worst_analyzer,
                 'total_strategies': len(validation_results),
-                'historical_period': historical_data.get('period', 'Historical'),
-                'validation_period': validation_data.get('period', 'Current')
+                'historical_period': _period_label(historical, 'Historical'),
+                'validation_period': _period_label(validation, 'Current')
             }
         }
     else:
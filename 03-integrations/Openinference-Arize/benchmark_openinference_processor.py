@@ -0,0 +1,197 @@
+"""
+Benchmark for StrandsToOpenInferenceProcessor
+
+Generates synthetic Strands-shaped traces (agent -> cycles -> model invoke and
+tool spans) with the OpenTelemetry SDK and reports, for each processor mode:
+
+- time spent in on_end on the thread that ends the span (what the agent waits for)
+- end-to-end CPU cost per span, relative to no processor
+- RSS sampled over the run, to check memory stays flat in steady state
+- spans still tracked in the processor's hierarchy at the end
+
+No exporter or network is involved; transformed spans go to a counting processor.
+A real agent spends most of its time waiting on the model, which is when the
+batch worker runs; --io-wait-us adds such a pause after every trace. Without it
+the worker competes with the span producer for the GIL, so batching shortens
+on_end but does not lower the total CPU spent per span.
+
+Usage:
+    python benchmark_openinference_processor.py --spans 1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from typing import List, Optional
+
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+
+from strands_to_openinference_mapping import StrandsToOpenInferenceProcessor
+
+PROMPT = json.dumps([
+    {"role": "user", "content": "Find me a table for two in San Francisco tonight"},
+    {"role": "assistant", "content": "Let me check the available restaurants.",
+     "toolUse": [{"toolUseId": "tool-1", "name": "retrieve", "input": {"text": "restaurants in San Francisco"}}]},
+])
+COMPLETION = json.dumps([{"role": "assistant", "content": "Here are three options for tonight."}])
+TOOLS = json.dumps([
+    {"name": "retrieve", "description": "Search the knowledge base", "input_schema": {"type": "object"}},
+    {"name": "create_booking", "description": "Create a booking", "input_schema": {"type": "object"}},
+])
+
+
+class TimedProcessor(SpanProcessor):
+    """Measures how long the wrapped processor's on_end blocks the ending thread"""
+
+    def __init__(self, processor: SpanProcessor, sample_every: int = 100):
+        self.processor = processor
+        self.sample_every = sample_every
+        self.calls = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+
+    def on_start(self, span, parent_context=None):
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        start = time.perf_counter()
+        self.processor.on_end(span)
+        elapsed = time.perf_counter() - start
+        self.total += elapsed
+        self.calls += 1
+        if self.calls % self.sample_every == 0:
+            self.samples.append(elapsed)
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000):
+        return self.processor.force_flush(timeout_millis)
+
+
+class CountingProcessor(SpanProcessor):
+    """Stands in for an exporter: counts finished spans and drops them"""
+
+    def __init__(self):
+        self.count = 0
+
+    def on_end(self, span):
+        self.count += 1
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def emit_trace(tracer, cycles: int) -> int:
+    """One agent invocation; returns the number of spans it produced"""
+    spans = 1
+    with tracer.start_as_current_span("invoke_agent", attributes={
+        "gen_ai.agent.name": "restaurant-assistant", "gen_ai.prompt": "Find me a table", "gen_ai.agent.tools": TOOLS,
+        "gen_ai.request.model": "us.anthropic.claude-3-7-sonnet", "session.id": "bench-session",
+    }):
+        for cycle in range(cycles):
+            with tracer.start_as_current_span(f"Cycle {cycle}", attributes={"event_loop.cycle_id": f"cycle-{cycle}"}):
+                with tracer.start_as_current_span("Model invoke", attributes={
+                    "gen_ai.prompt": PROMPT, "gen_ai.completion": COMPLETION,
+                    "gen_ai.request.model": "us.anthropic.claude-3-7-sonnet",
+                    "gen_ai.usage.prompt_tokens": 812, "gen_ai.usage.completion_tokens": 64,
+                    "gen_ai.usage.total_tokens": 876, "temperature": 0.3, "max_tokens": 1024,
+                }):
+                    pass
+                with tracer.start_as_current_span("Tool: retrieve", attributes={
+                    "tool.name": "retrieve", "tool.id": f"tool-{cycle}", "tool.status": "success",
+                    "tool.parameters": json.dumps({"text": "restaurants in San Francisco"}),
+                    "tool.result": json.dumps({"content": [{"text": "Nopa, Zuni Cafe, State Bird"}]}),
+                }):
+                    pass
+            spans += 3
+    return spans
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def run(mode: str, total_spans: int, samples: int, cycles: int, io_wait: float) -> dict:
+    sink = CountingProcessor()
+    provider = TracerProvider()
+    processor: Optional[StrandsToOpenInferenceProcessor] = None
+    if mode == "sync":
+        processor = StrandsToOpenInferenceProcessor(span_processor=sink)
+    elif mode == "batch":
+        processor = StrandsToOpenInferenceProcessor(span_processor=sink, batch_transform=True)
+    timed = TimedProcessor(processor or sink)
+    provider.add_span_processor(timed)
+    tracer = provider.get_tracer("benchmark")
+
+    rss: List[float] = []
+    sample_every = max(1, total_spans // samples)
+    next_sample = sample_every
+    emitted = 0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    while emitted < total_spans:
+        emitted += emit_trace(tracer, cycles)
+        if io_wait:
+            time.sleep(io_wait)
+        if emitted >= next_sample:
+            rss.append(current_rss_mb())
+            next_sample += sample_every
+    provider.force_flush()
+    cpu_elapsed = time.process_time() - cpu_started
+    wall_elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": mode,
+        "spans": emitted,
+        "on_end_us": timed.total / timed.calls * 1e6,
+        "on_end_p99_us": percentile(timed.samples, 99) * 1e6,
+        "cpu_us_per_span": cpu_elapsed / emitted * 1e6,
+        "wall_s": wall_elapsed,
+        "rss": rss,
+        "tracked": len(processor.span_hierarchy) if processor else 0,
+        "queue_full": processor.queue_full_count if processor else 0,
+        "exported": sink.count,
+    }
+    provider.shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Strands to OpenInference span processor")
+    parser.add_argument("--spans", type=int, default=1_000_000, help="synthetic spans per mode")
+    parser.add_argument("--cycles", type=int, default=3, help="event loop cycles per agent trace")
+    parser.add_argument("--samples", type=int, default=10, help="RSS samples per mode")
+    parser.add_argument("--modes", default="none,sync,batch", help="comma-separated: none, sync, batch")
+    parser.add_argument("--io-wait-us", type=float, default=0, help="simulated model wait after each trace")
+    args = parser.parse_args()
+
+    results = [run(mode, args.spans, args.samples, args.cycles, args.io_wait_us / 1e6) for mode in args.modes.split(",")]
+    baseline = next((r for r in results if r["mode"] == "none"), None)
+
+    print(f"Spans per mode: {args.spans:,}  cycles per trace: {args.cycles}  io wait per trace: {args.io_wait_us:.0f} us")
+    for r in results:
+        overhead = r["cpu_us_per_span"] - baseline["cpu_us_per_span"] if baseline else float("nan")
+        rss = r["rss"]
+        print(f"{r['mode']:<6} on_end mean {r['on_end_us']:6.1f} us  p99 {r['on_end_p99_us']:7.1f} us  "
+              f"CPU {r['cpu_us_per_span']:6.1f} us/span (overhead {overhead:+6.1f})  wall {r['wall_s']:6.1f} s")
+        print(f"       RSS first/mid/last sample: {rss[0]:.1f} / {rss[len(rss) // 2]:.1f} / {rss[-1]:.1f} MB  "
+              f"exported {r['exported']:,}  tracked at end {r['tracked']}  queue full {r['queue_full']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ to OpenInference format for compatibility with Arize AI.
 
 import json
 import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
 
@@ -15,24 +19,71 @@ from opentelemetry.trace import Span
 
 logger = logging.getLogger(__name__)
 
+# Spans still open are tracked so children can find their parent's name; spans
+# that never end are evicted oldest-first once this many are tracked.
+MAX_TRACKED_SPANS = 10000
+
+# Appended to string values cut at max_value_length
+TRUNCATION_MARKER = "...[truncated]"
+
 class StrandsToOpenInferenceProcessor(SpanProcessor):
     """
     SpanProcessor that converts Strands telemetry attributes to OpenInference format
     for compatibility with Arize AI.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        max_tracked_spans: int = MAX_TRACKED_SPANS,
+        max_value_length: Optional[int] = None,
+        span_processor: Optional[SpanProcessor] = None,
+        batch_transform: bool = False,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        schedule_delay_millis: float = 100,
+    ):
         """
         Initialize the processor.
         
         Args:
             debug: Whether to log debug information
+            max_tracked_spans: Upper bound on open spans kept for parent lookups
+            max_value_length: Truncate prompt, completion, tool and metadata strings
+                longer than this many characters (no limit when None)
+            span_processor: Processor (e.g. a BatchSpanProcessor) that receives spans
+                after they are transformed
+            batch_transform: Transform spans in batches on a background thread instead
+                of on the thread that ends the span; requires span_processor so spans are
+                only exported once transformed
+            max_queue_size: Spans waiting for a batch transform; when full, spans are
+                transformed on the ending thread instead of being dropped
+            max_batch_size: Spans transformed per batch
+            schedule_delay_millis: How long the worker waits to fill a batch
         """
         super().__init__()
+        if batch_transform and span_processor is None:
+            raise ValueError("batch_transform requires a span_processor to forward transformed spans to")
+        
         self.debug = debug
-        self.processed_spans = set()
+        self.processed_count = 0
+        self.queue_full_count = 0
         self.current_cycle_id = None
-        self.span_hierarchy = {}
+        self.max_tracked_spans = max_tracked_spans
+        self.max_value_length = max_value_length
+        self.span_hierarchy: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._hierarchy_lock = threading.Lock()
+        self.span_processor = span_processor
+        
+        self.batch_transform = batch_transform
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay_millis / 1000
+        self._queue: Optional[queue.Queue] = None
+        self._worker: Optional[threading.Thread] = None
+        if batch_transform:
+            self._queue = queue.Queue(maxsize=max_queue_size)
+            self._worker = threading.Thread(target=self._run_batches, name="openinference-transform", daemon=True)
+            self._worker.start()
 
     def on_start(self, span, parent_context=None):
         """Called when a span is started. Track span hierarchy."""
@@ -43,53 +94,106 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             parent_id = parent_context.span_id
         elif span.parent and hasattr(span.parent, 'span_id'):
             parent_id = span.parent.span_id
-            
-        self.span_hierarchy[span_id] = {
-            'name': span.name,
-            'span_id': span_id,
-            'parent_id': parent_id,
-            'start_time': datetime.now().isoformat()
-        }
+        
+        with self._hierarchy_lock:
+            # Parents are still open while their children start, so resolve the name now
+            parent_info = self.span_hierarchy.get(parent_id, {}) if parent_id else {}
+            self.span_hierarchy[span_id] = {
+                'name': span.name,
+                'span_id': span_id,
+                'parent_id': parent_id,
+                'parent_name': parent_info.get('name', ''),
+                'start_time': datetime.now().isoformat()
+            }
+            while len(self.span_hierarchy) > self.max_tracked_spans:
+                self.span_hierarchy.popitem(last=False)
+        
+        if self.span_processor:
+            self.span_processor.on_start(span, parent_context=parent_context)
 
     def on_end(self, span: Span):
         """
         Called when a span ends. Transform the span attributes from Strands format
         to OpenInference format.
         """
+        span_id = span.get_span_context().span_id
+        with self._hierarchy_lock:
+            span_info = self.span_hierarchy.pop(span_id, None) or {}
+        
         if not hasattr(span, '_attributes') or not span._attributes:
+            self._forward(span)
             return
-
-        original_attrs = dict(span._attributes)
-        span_id = span.get_span_context().span_id
         
-        if span_id in self.span_hierarchy:
-            self.span_hierarchy[span_id]['attributes'] = original_attrs
+        if "event_loop.cycle_id" in span._attributes:
+            self.current_cycle_id = span._attributes.get("event_loop.cycle_id")
         
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait((span, span_info))
+                return
+            except queue.Full:
+                self.queue_full_count += 1
+        
+        self._transform_span(span, span_info)
+        self._forward(span)
+
+    def _transform_span(self, span: Span, span_info: Dict[str, Any]):
+        """Replace the span's attributes with their OpenInference form."""
+        original_attrs = dict(span._attributes)
         try:
-            if "event_loop.cycle_id" in original_attrs:
-                self.current_cycle_id = original_attrs.get("event_loop.cycle_id")
-            
-            transformed_attrs = self._transform_attributes(original_attrs, span)
-            span._attributes.clear()
-            span._attributes.update(transformed_attrs)
-            self.processed_spans.add(span_id)
+            transformed_attrs = self._transform_attributes(original_attrs, span, span_info)
+            # Ended SDK spans have immutable attributes, so swap in the transformed mapping
+            span._attributes = transformed_attrs
+            self.processed_count += 1
             
             if self.debug:
                 logger.info(f"Transformed span '{span.name}': {len(original_attrs)} -> {len(transformed_attrs)} attributes")
                 
         except Exception as e:
             logger.error(f"Failed to transform span '{span.name}': {e}", exc_info=True)
-            span._attributes.clear()
-            span._attributes.update(original_attrs)
 
-    def _transform_attributes(self, attrs: Dict[str, Any], span: Span) -> Dict[str, Any]:
+    def _forward(self, span: Span):
+        """Hand a finished span to the downstream processor, if any."""
+        if self.span_processor:
+            self.span_processor.on_end(span)
+
+    def _run_batches(self):
+        """Worker loop: collect up to max_batch_size spans, transform and forward them."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=self.schedule_delay)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            for span, span_info in batch:
+                self._transform_span(span, span_info)
+                self._forward(span)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _transform_attributes(self, attrs: Dict[str, Any], span: Span,
+                              span_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Transform Strands attributes to OpenInference format.
         """
         result = {}
         span_kind = self._determine_span_kind(span, attrs)
         result["openinference.span.kind"] = span_kind
-        self._set_graph_node_attributes(span, attrs, result)
+        self._set_graph_node_attributes(span, attrs, result, span_info or {})
         prompt = attrs.get("gen_ai.prompt")
         completion = attrs.get("gen_ai.completion")
         model_id = attrs.get("gen_ai.request.model")
@@ -112,6 +216,9 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             elif isinstance(tags, str):
                 result[f"tag.{tags}"] = str(tags)
         
+        # Token usage first, so the LLM output.value can include it
+        self._map_token_usage(attrs, result)
+        
         # Handle different span types
         if span_kind == "LLM":
             self._handle_chain_and_llm_span(attrs, result, prompt, completion)
@@ -122,9 +229,6 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         elif span_kind == "CHAIN":
             self._handle_chain_and_llm_span(attrs, result, prompt, completion)
         
-        # Handle token usage
-        self._map_token_usage(attrs, result)
-        
         important_attrs = [
             "session.id", "user.id", "llm.prompt_template.template",
             "llm.prompt_template.version", "llm.prompt_template.variables",
@@ -152,7 +256,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             return "CHAIN"
         return "CHAIN"
     
-    def _set_graph_node_attributes(self, span: Span, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _set_graph_node_attributes(self, span: Span, attrs: Dict[str, Any], result: Dict[str, Any],
+                                   span_info: Dict[str, Any]):
         """
         Set graph node attributes for Arize visualization.
         Hierarchy: Agent -> Cycles -> (LLMs and/or Tools)
@@ -161,11 +266,9 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         span_kind = result["openinference.span.kind"]        
         span_id = span.get_span_context().span_id
         
-        # Get parent information from span hierarchy
-        span_info = self.span_hierarchy.get(span_id, {})
+        # Parent information captured from the span hierarchy when the span started
         parent_id = span_info.get('parent_id')
-        parent_info = self.span_hierarchy.get(parent_id, {}) if parent_id else {}
-        parent_name = parent_info.get('name', '')
+        parent_name = span_info.get('parent_name', '')
         
         if span_kind == "AGENT":
             result["graph.node.id"] = "strands_agent"
@@ -199,7 +302,6 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             logger.info(f"span_id: {span_id}")
             logger.info(f"span_info: {span_info}")
             logger.info(f"parent_id: {parent_id}")
-            logger.info(f"parent_info: {parent_info}")
             logger.info(f"parent_name: {parent_name}")
             logger.info("==========================")
             logger.info(f"Span: {span_name} || (ID: {span_id})")
@@ -208,14 +310,10 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
 
     def _handle_chain_and_llm_span(self, attrs: Dict[str, Any], result: Dict[str, Any], prompt: Any, completion: Any):
         """Handle LLM-specific attributes."""
-        if prompt:
-            self._map_messages(prompt, result, is_input=True)
-        
-        if completion:
-            self._map_messages(completion, result, is_input=False)
-        
-        self._add_input_output_values(attrs, result)
-        self._map_invocation_parameters(attrs, result)
+        input_messages = self._map_messages(prompt, result, is_input=True) if prompt else None
+        output_messages = self._map_messages(completion, result, is_input=False) if completion else None
+        invocation_params = self._map_invocation_parameters(attrs, result)
+        self._add_input_output_values(attrs, result, input_messages, output_messages, invocation_params)
     
     def _handle_tool_span(self, attrs: Dict[str, Any], result: Dict[str, Any]):
         """Handle tool-specific attributes."""
@@ -232,46 +330,49 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             result["tool.description"] = tool_description
         
         if tool_params := attrs.get("tool.parameters"):
-            result["tool.parameters"] = self._serialize_value(tool_params)
+            # Serialized once and shared by every attribute that carries the arguments
+            arguments = self._serialize_value(self._truncate(tool_params))
+            result["tool.parameters"] = arguments
             tool_call = {
                 "tool_call.id": attrs.get("tool.id", ""),
                 "tool_call.function.name": attrs.get("tool.name", ""),
-                "tool_call.function.arguments": self._serialize_value(tool_params)
+                "tool_call.function.arguments": arguments
             }
             
             input_message = {
                 "message.role": "assistant",
                 "message.tool_calls": [tool_call]
             }
-            result["llm.input_messages"] = json.dumps([input_message], separators=(",", ":"))
+            result["llm.input_messages"] = self._dumps([input_message])
             result["llm.input_messages.0.message.role"] = "assistant"
             result["tool_call.id"] = attrs.get("tool.id", "")
             result["tool_call.function.name"] = attrs.get("tool.name", "")
-            result["tool_call.function.arguments"] = self._serialize_value(tool_params)
+            result["tool_call.function.arguments"] = arguments
         
             for key, value in tool_call.items():
                 result[f"llm.input_messages.0.message.tool_calls.0.{key}"] = value
         
         # Map tool result
         if tool_result := attrs.get("tool.result"):
-            result["tool.result"] = self._serialize_value(tool_result)
-            tool_result_content = tool_result
+            serialized_result = self._serialize_value(self._truncate(tool_result))
+            result["tool.result"] = serialized_result
+            result_content = serialized_result
             if isinstance(tool_result, dict):
-                tool_result_content = tool_result.get("content", tool_result)
+                result_content = self._serialize_value(self._truncate(tool_result.get("content", tool_result)))
                 if "error" in tool_result:
                     result["tool.error"] = self._serialize_value(tool_result.get("error"))
 
             output_message = {
                 "message.role": "tool",
-                "message.content": self._serialize_value(tool_result_content),
+                "message.content": result_content,
                 "message.tool_call_id": attrs.get("tool.id", "")
             }
 
             if tool_name := attrs.get("tool.name"):
                 output_message["message.name"] = tool_name
-            result["llm.output_messages"] = json.dumps([output_message], separators=(",", ":"))
+            result["llm.output_messages"] = self._dumps([output_message])
             result["llm.output_messages.0.message.role"] = "tool"
-            result["llm.output_messages.0.message.content"] = self._serialize_value(tool_result_content)
+            result["llm.output_messages.0.message.content"] = result_content
             result["llm.output_messages.0.message.tool_call_id"] = attrs.get("tool.id", "")
             
             if tool_name:
@@ -283,13 +384,13 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         if end_time := attrs.get("gen_ai.event.end_time"):
             result["tool.end_time"] = end_time
 
-        tool_metadata = {}
-        for key, value in attrs.items():
-            if key.startswith("tool.") and key not in ["tool.name", "tool.id", "tool.parameters", "tool.result", "tool.status"]:
-                tool_metadata[key] = self._serialize_value(value)
+        tool_metadata = {
+            key: value for key, value in attrs.items()
+            if key.startswith("tool.") and key not in ["tool.name", "tool.id", "tool.parameters", "tool.result", "tool.status"]
+        }
         
         if tool_metadata:
-            result["tool.metadata"] = json.dumps(tool_metadata, separators=(",", ":"))
+            result["tool.metadata"] = self._dumps(self._truncate(tool_metadata))
     
     def _handle_agent_span(self, attrs: Dict[str, Any], result: Dict[str, Any], prompt: Any):
         """Handle agent-specific attributes."""
@@ -300,18 +401,23 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             self._map_tools(tools, result)
         
         if prompt:
+            prompt_text = self._truncate(str(prompt))
             input_message = {
                 "message.role": "user",
-                "message.content": str(prompt)
+                "message.content": prompt_text
             }
-            result["llm.input_messages"] = json.dumps([input_message], separators=(",", ":"))
-            result["input.value"] = str(prompt)
+            result["llm.input_messages"] = self._dumps([input_message])
+            result["input.value"] = prompt_text
             result["llm.input_messages.0.message.role"] = "user"
-            result["llm.input_messages.0.message.content"] = str(prompt)
+            result["llm.input_messages.0.message.content"] = prompt_text
         self._add_input_output_values(attrs, result)  
     
-    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool):
-        """Map Strands messages to OpenInference message format."""
+    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool) -> List[Dict[str, Any]]:
+        """Map Strands messages to OpenInference message format.
+        
+        Returns the normalized messages so later steps can reuse them instead of
+        parsing the serialized attribute again.
+        """
         key_prefix = "llm.input_messages" if is_input else "llm.output_messages"
         
         if isinstance(messages_data, str):
@@ -320,8 +426,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             except json.JSONDecodeError:
                 messages_data = [{"role": "user" if is_input else "assistant", "content": messages_data}]
         
-        messages_list = self._normalize_messages(messages_data)
-        result[key_prefix] = json.dumps(messages_list, separators=(",", ":"))
+        messages_list = self._truncate(self._normalize_messages(messages_data))
+        result[key_prefix] = self._dumps(messages_list)
 
         for idx, msg in enumerate(messages_list):
             if not isinstance(msg, dict):
@@ -340,6 +446,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                                 result[tool_dotted_key] = self._serialize_value(tool_val)
                 else:
                     result[dotted_key] = self._serialize_value(sub_val)
+        
+        return messages_list
     
     def _normalize_messages(self, data: Any) -> List[Dict[str, Any]]:
         """Normalize messages data to a consistent list format."""
@@ -421,7 +529,7 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             if value := attrs.get(strands_key):
                 result[openinf_key] = value
     
-    def _map_invocation_parameters(self, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _map_invocation_parameters(self, attrs: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """Map invocation parameters."""
         params = {}
         
@@ -436,124 +544,114 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 params[param_key] = attrs[key]
         
         if params:
-            result["llm.invocation_parameters"] = json.dumps(params, separators=(",", ":"))
+            result["llm.invocation_parameters"] = self._dumps(params)
+        return params
     
-    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any],
+                                 input_messages: Optional[List[Dict[str, Any]]] = None,
+                                 output_messages: Optional[List[Dict[str, Any]]] = None,
+                                 invocation_params: Optional[Dict[str, Any]] = None):
         """Add input.value and output.value for Arize compatibility."""
         span_kind = result.get("openinference.span.kind")
         model_name = result.get("llm.model_name") or attrs.get("gen_ai.request.model") or "unknown"
-        invocation_params = {}
-        if "llm.invocation_parameters" in result:
-            try:
-                invocation_params = json.loads(result["llm.invocation_parameters"])
-            except:
-                pass
+        invocation_params = invocation_params or {}
         
         if span_kind == "LLM":
-            if "llm.input_messages" in result:
-                try:
-                    input_messages = json.loads(result["llm.input_messages"])
-                    if input_messages:
-                        input_structure = {
-                            "messages": input_messages,
-                            "model": model_name
-                        }
-                        if max_tokens := invocation_params.get("max_tokens"):
-                            input_structure["max_tokens"] = max_tokens
-                        
-                        result["input.value"] = json.dumps(input_structure, separators=(",", ":"))
-                        result["input.mime_type"] = "application/json"
-                except:
-                    if prompt_content := result.get("llm.input_messages.0.message.content"):
-                        result["input.value"] = prompt_content
-                        result["input.mime_type"] = "application/json"
+            if input_messages:
+                # Embed the already serialized llm.input_messages rather than encoding the conversation again
+                parts = ['{"messages":', result["llm.input_messages"], ',"model":', json.dumps(model_name)]
+                if max_tokens := invocation_params.get("max_tokens"):
+                    parts += [',"max_tokens":', json.dumps(max_tokens)]
+                parts.append("}")
+                result["input.value"] = "".join(parts)
+                result["input.mime_type"] = "application/json"
 
-            if "llm.output_messages" in result:
-                try:
-                    output_messages = json.loads(result["llm.output_messages"])
-                    if output_messages and len(output_messages) > 0:
-                        first_msg = output_messages[0]
-                        content = first_msg.get("message.content", "")
-                        role = first_msg.get("message.role", "assistant")
-                        finish_reason = first_msg.get("message.finish_reason", "stop")
-                        output_structure = {
-                            "id": attrs.get("gen_ai.response.id"),
-                            "choices": [{
-                                "finish_reason": finish_reason,
-                                "index": 0,
-                                "logprobs": None,
-                                "message": {
-                                    "content": content,
-                                    "role": role,
-                                    "refusal": None,
-                                    "annotations": []
-                                }
-                            }],
-                            "model": model_name,
-                            "usage": {
-                                "completion_tokens": result.get("llm.token_count.completion"),
-                                "prompt_tokens": result.get("llm.token_count.prompt"),
-                                "total_tokens": result.get("llm.token_count.total")
-                            }
+            if output_messages:
+                first_msg = output_messages[0]
+                output_structure = {
+                    "id": attrs.get("gen_ai.response.id"),
+                    "choices": [{
+                        "finish_reason": first_msg.get("message.finish_reason", "stop"),
+                        "index": 0,
+                        "logprobs": None,
+                        "message": {
+                            "content": first_msg.get("message.content", ""),
+                            "role": first_msg.get("message.role", "assistant"),
+                            "refusal": None,
+                            "annotations": []
                         }
-                        
-                        result["output.value"] = json.dumps(output_structure, separators=(",", ":"))
-                        result["output.mime_type"] = "application/json"
-                except:
-                    if completion_content := result.get("llm.output_messages.0.message.content"):
-                        result["output.value"] = completion_content
-                        result["output.mime_type"] = "application/json"
+                    }],
+                    "model": model_name,
+                    "usage": {
+                        "completion_tokens": result.get("llm.token_count.completion"),
+                        "prompt_tokens": result.get("llm.token_count.prompt"),
+                        "total_tokens": result.get("llm.token_count.total")
+                    }
+                }
+                
+                result["output.value"] = self._dumps(output_structure)
+                result["output.mime_type"] = "application/json"
                     
         elif span_kind == "AGENT":
             if prompt := attrs.get("gen_ai.prompt"):
-                result["input.value"] = str(prompt)
+                result["input.value"] = result.get("input.value") or self._truncate(str(prompt))
                 result["input.mime_type"] = "text/plain"
 
             if completion := attrs.get("gen_ai.completion"):
-                result["output.value"] = str(completion)
+                result["output.value"] = self._truncate(str(completion))
                 result["output.mime_type"] = "text/plain"
                 
         elif span_kind == "TOOL":
-            if tool_params := attrs.get("tool.parameters"):
-                if isinstance(tool_params, str):
-                    result["input.value"] = tool_params
-                else:
-                    result["input.value"] = json.dumps(tool_params, separators=(",", ":"))
+            # Reuse the values serialized by _handle_tool_span
+            if "tool.parameters" in result:
+                arguments = result["tool.parameters"]
+                result["input.value"] = arguments if isinstance(arguments, str) else json.dumps(arguments)
                 result["input.mime_type"] = "application/json"
             
-            if tool_result := attrs.get("tool.result"):
-                if isinstance(tool_result, str):
-                    result["output.value"] = tool_result
-                else:
-                    result["output.value"] = json.dumps(tool_result, separators=(",", ":"))
+            if "tool.result" in result:
+                tool_result = result["tool.result"]
+                result["output.value"] = tool_result if isinstance(tool_result, str) else json.dumps(tool_result)
                 result["output.mime_type"] = "application/json"
                 
         elif span_kind == "CHAIN":
             if prompt := attrs.get("gen_ai.prompt"):
                 if isinstance(prompt, str):
-                    result["input.value"] = prompt
+                    result["input.value"] = self._truncate(prompt)
                 else:
-                    result["input.value"] = json.dumps(prompt, separators=(",", ":"))
+                    result["input.value"] = self._dumps(self._truncate(prompt))
                 result["input.mime_type"] = "text/plain" if isinstance(prompt, str) else "application/json"
             
             if completion := attrs.get("gen_ai.completion"):
                 if isinstance(completion, str):
-                    result["output.value"] = completion  
+                    result["output.value"] = self._truncate(completion)
                 else:
-                    result["output.value"] = json.dumps(completion, separators=(",", ":"))
+                    result["output.value"] = self._dumps(self._truncate(completion))
                 result["output.mime_type"] = "text/plain" if isinstance(completion, str) else "application/json"
     
     def _add_metadata(self, attrs: Dict[str, Any], result: Dict[str, Any]):
-        """Add remaining attributes to metadata."""
-        metadata = {}
+        """Add remaining attributes to metadata, serialized together in one pass."""
         skip_keys = {"gen_ai.prompt", "gen_ai.completion", "agent.tools", "gen_ai.agent.tools"}
-        
-        for key, value in attrs.items():
-            if key not in skip_keys and key not in result:
-                metadata[key] = self._serialize_value(value)
+        metadata = {key: value for key, value in attrs.items() if key not in skip_keys and key not in result}
         
         if metadata:
-            result["metadata"] = json.dumps(metadata, separators=(",", ":"))
+            result["metadata"] = self._dumps(self._truncate(metadata))
+    
+    def _truncate(self, value: Any) -> Any:
+        """Cut string values longer than max_value_length, including strings nested in lists and dicts."""
+        limit = self.max_value_length
+        if not limit:
+            return value
+        if isinstance(value, str):
+            return value if len(value) <= limit else value[:limit] + TRUNCATION_MARKER
+        if isinstance(value, dict):
+            return {key: self._truncate(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._truncate(item) for item in value]
+        return value
+    
+    def _dumps(self, value: Any) -> str:
+        """Compact JSON encoding used for every serialized attribute."""
+        return json.dumps(value, separators=(",", ":"), default=str)
     
     def _serialize_value(self, value: Any) -> Any:
         """Ensure a value is serializable."""
@@ -567,8 +665,26 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
 
     def shutdown(self):
         """Called when the processor is shutdown."""
-        pass
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self.span_processor:
+            self.span_processor.shutdown()
 
     def force_flush(self, timeout_millis=None):
-        """Called to force flush."""
+        """Called to force flush. Returns False if the timeout expired before every span was exported."""
+        deadline = time.monotonic() + (timeout_millis or 30000) / 1000
+        if self._queue is not None and self._worker.is_alive():
+            # Like queue.join(), but gives up at the deadline
+            with self._queue.all_tasks_done:
+                while self._queue.unfinished_tasks:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+        if self.span_processor:
+            remaining_millis = int((deadline - time.monotonic()) * 1000)
+            if remaining_millis <= 0:
+                return False
+            return self.span_processor.force_flush(remaining_millis)
         return True
\ No newline at end of file
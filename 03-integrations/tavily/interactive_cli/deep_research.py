@@ -1,11 +1,18 @@
+import atexit
 import os
+import queue
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 from strands import Agent, tool
 from strands.models import BedrockModel
 from tavily import TavilyClient
 from utils.prompts import RESEARCH_FORMATTER_PROMPT, SYSTEM_PROMPT
+from utils.research_cache import ResearchCache, cache_key
 from utils.utils import (
     format_crawl_results_for_agent,
     format_extract_results_for_agent,
@@ -25,7 +32,65 @@ if not os.getenv("TAVILY_API_KEY"):
         "TAVILY_API_KEY environment variable is not set. Please add it to your .env file."
     )
 
+# Tavily accepts at most 20 URLs per extract request; larger lists are split into
+# batches that are extracted concurrently
+EXTRACT_BATCH_SIZE = 20
+EXTRACT_MAX_WORKERS = int(os.getenv("TAVILY_EXTRACT_WORKERS", "4"))
+
+# One client and one formatter model for the whole session
 tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+formatter_model = BedrockModel(
+    model_id="anthropic.claude-3-5-haiku-20241022-v1:0",
+    region_name="us-east-1",
+)
+# Idle formatter agents; each call borrows one so concurrent calls never share history
+_formatter_agents: queue.SimpleQueue = queue.SimpleQueue()
+_extract_executor = ThreadPoolExecutor(
+    max_workers=EXTRACT_MAX_WORKERS, thread_name_prefix="tavily-extract"
+)
+
+# Search, extract and crawl results, kept across sessions so follow-up
+# questions don't re-fetch the same pages
+research_cache = ResearchCache(
+    path=os.getenv("RESEARCH_CACHE_PATH", ".research_cache/cache.json"),
+    ttl=float(os.getenv("RESEARCH_CACHE_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(os.getenv("RESEARCH_CACHE_MAX_MB", "20")) * 1024 * 1024,
+)
+# New results are written to disk in the background and on exit, not on every call
+research_cache.start_autosave(float(os.getenv("RESEARCH_CACHE_SAVE_INTERVAL", "60")))
+atexit.register(research_cache.close)
+
+
+def clean_url(url: str) -> str:
+    """Recover a URL the model passed as a JSON snippet and add a missing scheme."""
+    if url.strip().startswith("{") and '"url":' in url:
+        m = re.search(r'"url"\s*:\s*"([^"]+)"', url)
+        if m:
+            url = m.group(1)
+
+    if not url.startswith(("http://", "https://")):
+        url = "https://" + url
+    return url
+
+
+def url_match_key(url: str) -> str:
+    """Key under which a requested URL and the URL Tavily reports for it compare equal."""
+    parts = urlsplit(url)
+    host = parts.netloc.lower().removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+
+def extract_batch(urls: list[str], include_images: bool, extract_depth: str) -> dict:
+    """Extract one batch of URLs, reporting a failed request as failed results."""
+    try:
+        return tavily_client.extract(
+            urls=urls,  # List of URLs to extract content from
+            include_images=include_images,  # Whether to include image extraction
+            extract_depth=extract_depth,  # Depth of extraction (basic or advanced)
+        )
+    except Exception as e:
+        return {"results": [], "failed_results": [{"url": url, "error": str(e)} for url in urls]}
 
 
 @tool
@@ -50,22 +115,28 @@ def web_search(
     Returns:
         str: The formatted web search results
     """
-    client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-    formatted_results = format_search_results_for_agent(
-        client.search(
+    key = cache_key(query, max_results, time_range, include_domains)
+    api_response = research_cache.get("search", key)
+    if api_response is None:
+        api_response = tavily_client.search(
             query=query,  # The search query to execute with Tavily.
             max_results=max_results,
             time_range=time_range,
             # list of domains to specifically include in the search results.
             include_domains=include_domains,
         )
-    )
+        research_cache.put("search", key, api_response)
+
+    formatted_results = format_search_results_for_agent(api_response, query=query)
     return formatted_results
 
 
 @tool
 def web_extract(
-    urls: str | list[str], include_images: bool = False, extract_depth: str = "basic"
+    urls: str | list[str],
+    include_images: bool = False,
+    extract_depth: str = "basic",
+    query: Optional[str] = None,
 ) -> str:
     """Extract content from one or more web pages using Tavily's extract API.
 
@@ -76,10 +147,13 @@ def web_extract(
         extract_depth (str, optional): The depth of extraction. 'basic' provides standard
                                      content extraction, 'advanced' provides more detailed
                                      extraction. Defaults to "basic".
+        query (Optional[str], optional): What you are looking for in these pages. Long pages
+                                       are trimmed to the passages most relevant to it.
+                                       Defaults to None.
 
     Returns:
         str: A formatted string containing the extracted content from each URL, including
-             the full raw content, any images found (if requested), and information about
+             the most relevant page content, any images found (if requested), and information about
              any URLs that failed to be processed.
     """
     try:
@@ -89,30 +163,55 @@ def web_extract(
         else:
             urls_list = urls
 
-        # Clean and validate URLs
-        cleaned_urls = []
-        for url in urls_list:
-            if url.strip().startswith("{") and '"url":' in url:
-                import re
-
-                m = re.search(r'"url"\s*:\s*"([^"]+)"', url)
-                if m:
-                    url = m.group(1)
-
-            if not url.startswith(("http://", "https://")):
-                url = "https://" + url
-
-            cleaned_urls.append(url)
-
-        # Call Tavily extract API
-        api_response = tavily_client.extract(
-            urls=cleaned_urls,  # List of URLs to extract content from
-            include_images=include_images,  # Whether to include image extraction
-            extract_depth=extract_depth,  # Depth of extraction (basic or advanced)
-        )
+        started = time.time()
+        # Clean and validate URLs, dropping duplicates
+        cleaned_urls = list(dict.fromkeys(clean_url(url) for url in urls_list))
+
+        # Pages extracted earlier are served from the cache
+        extracted = {}
+        for url in cleaned_urls:
+            doc = research_cache.get("extract", cache_key(url, include_images, extract_depth))
+            if doc is not None:
+                extracted[url] = doc
+        missing = [url for url in cleaned_urls if url not in extracted]
+
+        # Call Tavily extract API, one request per batch, batches in parallel
+        batches = [
+            missing[i : i + EXTRACT_BATCH_SIZE]
+            for i in range(0, len(missing), EXTRACT_BATCH_SIZE)
+        ]
+        # Tavily may report a normalized URL; map it back to the URL as requested
+        missing_urls = set(missing)
+        requested = {url_match_key(url): url for url in missing}
+        failed_results = []
+        for batch_response in _extract_executor.map(
+            lambda batch: extract_batch(batch, include_images, extract_depth), batches
+        ):
+            for doc in batch_response.get("results", []):
+                returned_url = doc.get("url")
+                if returned_url in missing_urls:
+                    url = returned_url
+                else:
+                    url = requested.get(url_match_key(returned_url or ""), returned_url)
+                extracted[url] = doc
+                # Cache under both URLs so either one finds the page next time
+                for cached_url in {url, returned_url}:
+                    research_cache.put(
+                        "extract", cache_key(cached_url, include_images, extract_depth), doc
+                    )
+            failed_results.extend(batch_response.get("failed_results", []))
+
+        # Keep the requested order; pages that matched no requested URL go last
+        results = [extracted.pop(url) for url in cleaned_urls if url in extracted]
+        results.extend(extracted.values())
+        api_response = {
+            "results": results,
+            "failed_results": failed_results,
+            "response_time": round(time.time() - started, 2),
+        }
 
         # Format the results for the agent
-        formatted_results = format_extract_results_for_agent(api_response)
+        formatted_results = format_extract_results_for_agent(api_response, query=query)
         return formatted_results
 
     except Exception as e:
@@ -139,16 +238,18 @@ def format_research_response(
              clear structure, and appropriate style for the intended audience
     """
     try:
-        bedrock_model = BedrockModel(
-            model_id="anthropic.claude-3-5-haiku-20241022-v1:0",
-            region_name="us-east-1",
-        )
+        formatter_agent = _formatter_agents.get_nowait()
+    except queue.Empty:
         # Strands Agents SDK makes it easy to create a specialized agent
         formatter_agent = Agent(
-            model=bedrock_model,
+            model=formatter_model,
             system_prompt=RESEARCH_FORMATTER_PROMPT,
         )
 
+    try:
+        # Each formatting request starts from an empty conversation
+        formatter_agent.messages = []
+
         # Prepare the input for the formatter
         format_input = f"Research Content:\n{research_content}\n\n"
 
@@ -165,6 +266,8 @@ def format_research_response(
         return str(response)
     except Exception as e:
         return f"Error in research formatting: {str(e)}"
+    finally:
+        _formatter_agents.put(formatter_agent)
 
 
 @tool
@@ -191,24 +294,20 @@ def web_crawl(url: str, instructions: Optional[str] = None) -> str:
     max_depth = 2
     limit = 20
 
-    if url.strip().startswith("{") and '"url":' in url:
-        import re
-
-        m = re.search(r'"url"\s*:\s*"([^"]+)"', url)
-        if m:
-            url = m.group(1)
-
-    if not url.startswith(("http://", "https://")):
-        url = "https://" + url
+    url = clean_url(url)
 
     try:
-        # Crawls the web using Tavily API
-        api_response = tavily_client.crawl(
-            url=url,  # The URL to crawl
-            max_depth=max_depth,  # Defines how far from the base URL the crawler can explore
-            limit=limit,  # Limits the number of results returned
-            instructions=instructions,  # Optional instructions for the crawler
-        )
+        key = cache_key(url, max_depth, limit, instructions)
+        api_response = research_cache.get("crawl", key)
+        if api_response is None:
+            # Crawls the web using Tavily API
+            api_response = tavily_client.crawl(
+                url=url,  # The URL to crawl
+                max_depth=max_depth,  # Defines how far from the base URL the crawler can explore
+                limit=limit,  # Limits the number of results returned
+                instructions=instructions,  # Optional instructions for the crawler
+            )
+            research_cache.put("crawl", key, api_response)
 
         tavily_results = (
             api_response.get("results")
@@ -216,7 +315,7 @@ def web_crawl(url: str, instructions: Optional[str] = None) -> str:
             else api_response
         )
 
-        formatted = format_crawl_results_for_agent(tavily_results)
+        formatted = format_crawl_results_for_agent(tavily_results, query=instructions)
         return formatted
     except Exception as e:
         return f"Error: {e}\n" f"URL attempted: {url}\n" "Failed to crawl the website."
@@ -297,6 +396,7 @@ def run_interactive_session() -> None:
         query = input("\nResearch> ").strip()
         if query.lower() == "exit":
             print(f"\nUsage metrics:\n{web_agent.event_loop_metrics}")
+            print(f"Research cache: {research_cache.stats}")
             print("Goodbye! 👋")
             break
 
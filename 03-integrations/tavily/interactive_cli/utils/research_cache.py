@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class ResearchCache:
+    """
+    Least-recently-used cache for Tavily results, shared across research sessions.
+
+    Entries are grouped by namespace ("search", "extract", "crawl"), expire after
+    ttl seconds and are evicted oldest-first once the cache holds more than
+    max_entries items or max_bytes of JSON. The cache is loaded from path on
+    start-up and written back with save(), so follow-up questions in a new
+    session reuse pages fetched in an earlier one. put() only marks the cache
+    dirty; start_autosave() writes it back periodically.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        ttl: float = 24 * 3600,
+        max_entries: int = 2000,
+        max_bytes: int = 20 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (namespace, key) -> (stored_at, size in bytes, value)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._autosave_stop = threading.Event()
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return a cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or time.time() - entry[0] > self.ttl:
+                if entry is not None:
+                    self._drop((namespace, key))
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        """Store a JSON-serializable value, evicting the oldest entries if over the limits."""
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (namespace, key) in self._entries:
+                self._drop((namespace, key))
+            self._entries[(namespace, key)] = (time.time(), size, value)
+            self._bytes += size
+            self._dirty = True
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed since the last save."""
+        if not self.path:
+            return
+        # Snapshot under the save lock so a concurrent save can't overwrite newer entries
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = [
+                    [namespace, key, stored_at, value]
+                    for (namespace, key), (stored_at, _, value) in self._entries.items()
+                ]
+                self._dirty = False
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so an interrupted save never corrupts the cache
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+
+    def start_autosave(self, interval: float) -> None:
+        """Save in a background thread every interval seconds while there are unsaved changes."""
+
+        def run() -> None:
+            while not self._autosave_stop.wait(interval):
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"Could not save research cache {self.path}: {e}")
+
+        threading.Thread(target=run, name="research-cache-autosave", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the autosave thread and write any unsaved changes."""
+        self._autosave_stop.set()
+        self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._dirty = True
+
+    def _drop(self, cache_key) -> None:
+        _, size, _ = self._entries.pop(cache_key)
+        self._bytes -= size
+        self._dirty = True
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable research cache {self.path}: {e}")
+            return
+        now = time.time()
+        # Entries were saved least recently used first, so the LRU order carries over
+        for namespace, key, stored_at, value in entries:
+            if now - stored_at <= self.ttl:
+                size = len(json.dumps(value))
+                self._entries[(namespace, key)] = (stored_at, size, value)
+                self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        self._dirty = False
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for a call's arguments."""
+    return json.dumps(parts, sort_keys=True, default=str)
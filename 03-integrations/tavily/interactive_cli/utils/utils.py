@@ -1,14 +1,124 @@
+import math
 import re
 from datetime import datetime
-from typing import Dict, List
-
+from typing import Dict, List, Optional
+
+# Approximate token budgets for the text each tool returns to the agent
+SEARCH_TOKEN_BUDGET = 6000
+EXTRACT_TOKEN_BUDGET = 8000
+CRAWL_TOKEN_BUDGET = 8000
+
+# Content is split into passages of roughly this many characters before ranking
+PASSAGE_CHARS = 600
+
+# A passage whose word trigrams have mostly been seen already is a near-duplicate
+DUPLICATE_OVERLAP = 0.8
+
+STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "with", "that", "this", "from",
+    "what", "which", "who", "how", "why", "when", "where", "about", "into", "over",
+    "latest", "recent", "find", "tell", "does", "did", "has", "have", "their", "its",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS) -> List[str]:
+    """Split page content into passages, merging short lines and wrapping long ones."""
+    passages = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and size + len(line) > max_chars:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            passages.append(line[:cut])
+            line = line[cut:].strip()
+        if line:
+            current.append(line)
+            size += len(line) + 1
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def _query_terms(query: Optional[str]) -> set:
+    words = re.findall(r"\w+", query.lower()) if query else []
+    return {w for w in words if len(w) > 2 and w not in STOPWORDS}
+
+
+def select_passages(
+    documents: List[List[str]], query: Optional[str], token_budget: int
+) -> List[List[str]]:
+    """
+    Pick the passages of each document that fit in the token budget.
 
-def format_search_results_for_agent(tavily_result: Dict) -> str:
+    Near-duplicate passages (within or across documents, earlier documents win)
+    are dropped. The rest are ranked by how densely they mention the query terms,
+    with ties going to passages nearer the top of their page, so every document
+    gets its opening passage before any gets its second. Selected passages are
+    returned per document in their original order.
+    """
+    terms = _query_terms(query)
+    seen_shingles: set = set()
+    candidates = []
+    for doc_index, passages in enumerate(documents):
+        for position, passage in enumerate(passages):
+            words = re.findall(r"\w+", passage.lower())
+            if not words:
+                continue
+            shingles = {hash(tuple(words[i : i + 3])) for i in range(max(1, len(words) - 2))}
+            if len(shingles & seen_shingles) >= DUPLICATE_OVERLAP * len(shingles):
+                continue
+            seen_shingles |= shingles
+            hits = sum(1 for word in words if word in terms)
+            score = hits / math.sqrt(len(words))
+            candidates.append((-score, position, doc_index, passage))
+
+    chosen: List[Dict[int, str]] = [{} for _ in documents]
+    remaining = token_budget
+    for _, position, doc_index, passage in sorted(candidates, key=lambda c: c[:3]):
+        cost = estimate_tokens(passage)
+        if cost <= remaining:
+            chosen[doc_index][position] = passage
+            remaining -= cost
+    return [[doc[position] for position in sorted(doc)] for doc in chosen]
+
+
+def _content_lines(label: str, passages: List[str], total: int) -> List[str]:
+    if not passages:
+        return [f"{label}: (omitted to stay within the context budget)\n"]
+    lines = [f"{label}: {passages[0]}\n", *(f"{passage}\n" for passage in passages[1:])]
+    if len(passages) < total:
+        lines.append(f"[{len(passages)} of {total} passages shown, trimmed for relevance]\n")
+    return lines
+
+
+def _header_tokens(headers: List[List[str]]) -> int:
+    return sum(estimate_tokens(line) for lines in headers for line in lines)
+
+
+def format_search_results_for_agent(
+    tavily_result: Dict,
+    query: Optional[str] = None,
+    token_budget: int = SEARCH_TOKEN_BUDGET,
+) -> str:
     """
     Format Tavily search results into a well-structured string for language models.
 
     Args:
         tavily_result (Dict): A Tavily search result dictionary
+        query (Optional[str]): The search query, used to rank passages of long results
+        token_budget (int): Approximate number of tokens the formatted results may use
 
     Returns:
         str: A formatted string with search results organized for easy consumption by LLMs
@@ -20,32 +130,35 @@ def format_search_results_for_agent(tavily_result: Dict) -> str:
     ):
         return "No search results found."
 
-    formatted_results = []
-
+    headers = []
+    documents = []
+    labels = []
     for i, doc in enumerate(tavily_result["results"], 1):
         # Extract metadata
         title = doc.get("title", "No title")
         url = doc.get("url", "No URL")
-
-        # Create a formatted entry
-        formatted_doc = f"\nRESULT {i}:\n"
-        formatted_doc += f"Title: {title}\n"
-        formatted_doc += f"URL: {url}\n"
+        headers.append([f"\nRESULT {i}:\n", f"Title: {title}\n", f"URL: {url}\n"])
 
         raw_content = doc.get("raw_content")
 
         # Prefer raw_content if it's available and not just whitespace
         if raw_content and raw_content.strip():
-            formatted_doc += f"Raw Content: {raw_content.strip()}\n"
+            labels.append("Raw Content")
+            documents.append(split_passages(raw_content))
         else:
             # Fallback to content if raw_content is not suitable or not available
-            content = doc.get("content", "").strip()
-            formatted_doc += f"Content: {content}\n"
+            labels.append("Content")
+            documents.append(split_passages(doc.get("content") or ""))
 
-        formatted_results.append(formatted_doc)
+    selected = select_passages(documents, query, token_budget - _header_tokens(headers))
 
-    # Join all formatted results with a separator
-    return "\n" + "\n".join(formatted_results)
+    parts = ["\n"]
+    for i, header in enumerate(headers):
+        if i:
+            parts.append("\n")
+        parts.extend(header)
+        parts.extend(_content_lines(labels[i], selected[i], len(documents[i])))
+    return "".join(parts)
 
 
 def generate_filename(research_dir: str, question: str) -> str:
@@ -56,12 +169,18 @@ def generate_filename(research_dir: str, question: str) -> str:
     return f"{research_dir}/{timestamp}_{safe_question}.md"
 
 
-def format_crawl_results_for_agent(tavily_result: List[Dict]) -> str:
+def format_crawl_results_for_agent(
+    tavily_result: List[Dict],
+    query: Optional[str] = None,
+    token_budget: int = CRAWL_TOKEN_BUDGET,
+) -> str:
     """
     Format Tavily crawl results into a well-structured string for language models.
 
     Args:
         tavily_result (List[Dict]): A list of Tavily crawl result dictionaries
+        query (Optional[str]): What the crawl is looking for, used to rank passages
+        token_budget (int): Approximate number of tokens the formatted results may use
 
     Returns:
         formatted_results (str): The formatted crawl results
@@ -69,39 +188,45 @@ def format_crawl_results_for_agent(tavily_result: List[Dict]) -> str:
     if not tavily_result:
         return "No crawl results found."
 
-    formatted_results = []
-
+    headers = []
+    documents = []
     for i, doc in enumerate(tavily_result, 1):
         # Extract metadata
         url = doc.get("url", "No URL")
-        raw_content = doc.get("raw_content", "")
-
-        # Create a formatted entry
-        formatted_doc = f"\nRESULT {i}:\n"
-        formatted_doc += f"URL: {url}\n"
+        raw_content = doc.get("raw_content") or ""
 
+        header = [f"\nRESULT {i}:\n", f"URL: {url}\n"]
         if raw_content:
             # Extract a title from the first line if available
-            title_line = raw_content.split("\n")[0] if raw_content else "No title"
-            formatted_doc += f"Title: {title_line}\n"
-            formatted_doc += (
-                f"Content: {raw_content[:4000]}...\n"
-                if len(raw_content) > 4000
-                else f"Content: {raw_content}\n"
-            )
-
-        formatted_results.append(formatted_doc)
-
-    # Join all formatted results with a separator
-    return "\n" + "-" * 40 + "\n".join(formatted_results)
-
-
-def format_extract_results_for_agent(tavily_result):
+            title_line = raw_content.split("\n")[0]
+            header.append(f"Title: {title_line}\n")
+        headers.append(header)
+        documents.append(split_passages(raw_content))
+
+    selected = select_passages(documents, query, token_budget - _header_tokens(headers))
+
+    parts = ["\n", "-" * 40]
+    for i, header in enumerate(headers):
+        if i:
+            parts.append("\n")
+        parts.extend(header)
+        if documents[i]:
+            parts.extend(_content_lines("Content", selected[i], len(documents[i])))
+    return "".join(parts)
+
+
+def format_extract_results_for_agent(
+    tavily_result: Dict,
+    query: Optional[str] = None,
+    token_budget: int = EXTRACT_TOKEN_BUDGET,
+) -> str:
     """
     Format Tavily extract results into a well-structured string for language models.
 
     Args:
         tavily_result (Dict): A Tavily extract result dictionary
+        query (Optional[str]): What the extraction is looking for, used to rank passages
+        token_budget (int): Approximate number of tokens the formatted results may use
 
     Returns:
         str: A formatted string with extract results organized for easy consumption by LLMs
@@ -109,47 +234,46 @@ def format_extract_results_for_agent(tavily_result):
     if not tavily_result or "results" not in tavily_result:
         return "No extract results found."
 
-    formatted_results = []
-
     # Process successful results
     results = tavily_result.get("results", [])
+    headers = []
+    documents = []
     for i, doc in enumerate(results, 1):
         url = doc.get("url", "No URL")
-        raw_content = doc.get("raw_content", "")
         images = doc.get("images", [])
 
-        formatted_doc = f"\nEXTRACT RESULT {i}:\n"
-        formatted_doc += f"URL: {url}\n"
-
-        if raw_content:
-            # Truncate very long content for readability
-            if len(raw_content) > 5000:
-                formatted_doc += f"Content: {raw_content[:5000]}...\n"
-            else:
-                formatted_doc += f"Content: {raw_content}\n"
-        else:
-            formatted_doc += "Content: No content extracted\n"
-
+        header = [f"\nEXTRACT RESULT {i}:\n", f"URL: {url}\n"]
         if images:
-            formatted_doc += f"Images found: {len(images)} images\n"
+            header.append(f"Images found: {len(images)} images\n")
             for j, image_url in enumerate(images[:3], 1):  # Show up to 3 images
-                formatted_doc += f"  Image {j}: {image_url}\n"
+                header.append(f"  Image {j}: {image_url}\n")
             if len(images) > 3:
-                formatted_doc += f"  ... and {len(images) - 3} more images\n"
+                header.append(f"  ... and {len(images) - 3} more images\n")
+        headers.append(header)
+        documents.append(split_passages(doc.get("raw_content") or ""))
 
-        formatted_results.append(formatted_doc)
+    selected = select_passages(documents, query, token_budget - _header_tokens(headers))
+
+    parts = ["\n"]
+    for i, header in enumerate(headers):
+        parts.extend(header[:2])
+        if documents[i]:
+            parts.extend(_content_lines("Content", selected[i], len(documents[i])))
+        else:
+            parts.append("Content: No content extracted\n")
+        parts.extend(header[2:])
 
     # Process failed results if any
     failed_results = tavily_result.get("failed_results", [])
     if failed_results:
-        formatted_results.append("\nFAILED EXTRACTIONS:\n")
+        parts.append("\nFAILED EXTRACTIONS:\n")
         for i, failure in enumerate(failed_results, 1):
             url = failure.get("url", "Unknown URL")
             error = failure.get("error", "Unknown error")
-            formatted_results.append(f"Failed {i}: {url} - {error}\n")
+            parts.append(f"Failed {i}: {url} - {error}\n")
 
     # Add response time info
     response_time = tavily_result.get("response_time", 0)
-    formatted_results.append(f"\nResponse time: {response_time} seconds")
+    parts.append(f"\nResponse time: {response_time} seconds")
 
-    return "\n" + "".join(formatted_results)
+    return "".join(parts)
@@ -5,6 +5,7 @@ from strands_tools import current_time
 from pydantic import BaseModel
 import uvicorn
 from strands import Agent, tool
+from strands.agent.conversation_manager import NullConversationManager
 import boto3
 import json
 from uuid import uuid4
@@ -12,11 +13,10 @@ import os
 
 # Import my tools
 from tools import get_tables_information, load_file_content
-from postgresql_query_utils import run_sql_query_on_postgresql
+from postgresql_query_utils import run_sql_query_on_postgresql, get_connection_pool_metrics, query_result_cache
 from strands.models import BedrockModel
 from utils import save_raw_query_result
-from utils import read_messages_by_session
-from utils import save_messages
+from conversation_history import ConversationHistoryCache
 
 # Initialize the FastAPI application
 app = FastAPI(title="Data Analyst Assistant API")
@@ -44,15 +44,50 @@ def load_system_prompt():
 # Load the system prompt
 DATA_ANALYST_SYSTEM_PROMPT = load_system_prompt()
 
+# Recent session histories, kept per worker process and persisted to DynamoDB in the background
+conversation_history = ConversationHistoryCache(
+    max_sessions=int(os.environ.get("CONVERSATION_CACHE_SESSIONS", 256)),
+    history_window=int(os.environ.get("HISTORY_WINDOW_MESSAGES", 40))
+)
+
 @app.get('/health')
 def health_check():
     """
     Health check endpoint for the load balancer.
 
     Returns:
-        dict: A status message indicating the service is healthy
+        dict: A status message indicating the service is healthy, with the
+              PostgreSQL connection pool, query cache and conversation history
+              metrics of this worker
+    """
+    return {
+        "status": "healthy",
+        "postgresql_pool": get_connection_pool_metrics(),
+        "query_cache": query_result_cache.stats(),
+        "conversation_history": conversation_history.stats()
+    }
+
+
+class QueryCacheInvalidation(BaseModel):
+    table: str = None  # Optional, all entries are dropped if omitted
+
+
+@app.post('/query-cache/invalidate')
+def invalidate_query_cache(request: QueryCacheInvalidation):
+    """
+    Drop cached query results, to be called after a table has been reloaded.
+
+    The cache is kept per worker process, so this only clears the worker that
+    handles the request; other workers drop their entries as they expire.
+
+    Args:
+        request (QueryCacheInvalidation): The table that was reloaded, if known
+
+    Returns:
+        dict: The number of cache entries removed
     """
-    return {"status": "healthy"}
+    removed = query_result_cache.invalidate(request.table)
+    return {"invalidated": removed, "table": request.table}
 
 
 async def run_data_analyst_assistant_with_stream_response(bedrock_model, system_prompt: str, prompt: str, prompt_uuid: str, session_id: str):
@@ -130,22 +165,20 @@ async def run_data_analyst_assistant_with_stream_response(bedrock_model, system_
         except Exception as e:
             return json.dumps({"error": f"Unexpected error: {str(e)}"})
 
-    # Get conversation history
-    message_history = read_messages_by_session(user_session_id)
-    if len(message_history) > 0:
-        starting_message_id = len(message_history)
-    else:
-        starting_message_id = 0
-    print("Message history length: " + str(len(message_history)))
-    print("Messages: " + str(message_history))
+    # Get the most recent conversation history (bounded by HISTORY_WINDOW_MESSAGES)
+    message_history = conversation_history.get_messages(user_session_id)
+    history_length = len(message_history)
+    print("Message history length: " + str(history_length))
 
-    # Initialize the data analyst agent
+    # Initialize the data analyst agent. The history is already windowed, so the agent
+    # must not trim its messages: this turn's messages are taken from the end of the list.
     data_analyst_agent = Agent(
         messages=message_history,
         model=bedrock_model,
         system_prompt=system_prompt,
         tools=[get_tables_information, current_time, execute_sql_query],
-        callback_handler=None
+        callback_handler=None,
+        conversation_manager=NullConversationManager()
     )
 
     # Stream the response
@@ -161,8 +194,8 @@ async def run_data_analyst_assistant_with_stream_response(bedrock_model, system_
         elif "data" in item:
             yield item['data']
 
-    # Save the conversation
-    save_messages(user_session_id, user_prompt_uuid, starting_message_id, data_analyst_agent.messages)
+    # Save only the messages of this turn; the write to DynamoDB happens in the background
+    conversation_history.append(user_session_id, user_prompt_uuid, data_analyst_agent.messages[history_length:])
 
 
 class PromptRequest(BaseModel):
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import json
+import threading
+from typing import Any, Dict, List
+
+from utils import append_messages, messages_objects_to_strings, read_messages_by_session
+
+
+class SessionHistory:
+    """
+    The stored (filtered) messages of one session and its last pending write.
+    """
+
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self.messages = messages
+        self.pending_write = None
+
+
+class ConversationHistoryCache:
+    """
+    In-process LRU of session histories with write-behind persistence to DynamoDB.
+
+    The first request of a session reads its history from DynamoDB; later
+    requests only query for messages added since (for example by another worker
+    process). After a turn, only the new messages are filtered, appended to the
+    cached history and written to DynamoDB in the background, in order per
+    session. If a write fails the session is dropped from the cache so the next
+    request reloads it from DynamoDB.
+    """
+
+    def __init__(self, max_sessions: int = 256, history_window: int = 40, write_workers: int = 4):
+        """
+        Args:
+            max_sessions: Number of session histories kept in memory
+            history_window: Maximum number of recent messages given to the agent, 0 for all
+            write_workers: Threads writing new messages to DynamoDB
+        """
+        self.max_sessions = max_sessions
+        self.history_window = history_window
+        self._sessions = OrderedDict()  # session_id -> SessionHistory
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="history-writer")
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "writes": 0, "write_failures": 0}
+
+    def _load(self, session_id: str) -> SessionHistory:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self._stats["hits"] += 1
+
+        if session is None:
+            session = SessionHistory(read_messages_by_session(session_id))
+            with self._lock:
+                self._stats["misses"] += 1
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._stats["evictions"] += 1
+        elif session.pending_write is None or session.pending_write.done():
+            # Pick up messages another worker process saved for this session
+            newer = read_messages_by_session(session_id, start_message_id=len(session.messages))
+            session.messages.extend(newer)
+        return session
+
+    def get_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Returns the messages to start the agent with: the most recent
+        history_window messages, beginning with a plain user message.
+
+        Returns:
+            List of message objects, safe for the agent to modify
+        """
+        messages = self._load(session_id).messages
+        if self.history_window and len(messages) > self.history_window:
+            start = len(messages) - self.history_window
+            # The conversation sent to the model has to open with the user's turn
+            while start < len(messages) and not _is_user_text(messages[start]):
+                start += 1
+            messages = messages[start:]
+        return copy.deepcopy(messages)
+
+    def append(self, session_id: str, prompt_uuid: str, new_messages: List[Dict[str, Any]]) -> None:
+        """
+        Adds the messages of a finished turn to the session and persists them in the background.
+
+        Args:
+            session_id: The session identifier
+            prompt_uuid: The UUID of the prompt that produced the messages
+            new_messages: The agent messages added during the turn, unfiltered
+        """
+        messages_to_save = messages_objects_to_strings(new_messages)
+        if not messages_to_save:
+            return
+        session = self._load(session_id)
+        starting_message_id = len(session.messages)
+        session.messages.extend(json.loads(message) for message in messages_to_save)
+
+        previous_write = session.pending_write
+        session.pending_write = self._writer.submit(
+            self._write, session_id, prompt_uuid, starting_message_id, messages_to_save, previous_write
+        )
+
+    def _write(self, session_id, prompt_uuid, starting_message_id, messages_to_save, previous_write) -> None:
+        if previous_write is not None:
+            previous_write.result()  # keep the writes of one session in order
+        if append_messages(session_id, prompt_uuid, starting_message_id, messages_to_save):
+            with self._lock:
+                self._stats["writes"] += 1
+            return
+        with self._lock:
+            self._stats["write_failures"] += 1
+            # DynamoDB is the source of truth; reload the session on its next request
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "sessions": len(self._sessions), "max_sessions": self.max_sessions,
+                    "history_window": self.history_window}
+
+
+def _is_user_text(message: Dict[str, Any]) -> bool:
+    return message.get("role") == "user" and all("text" in item for item in message.get("content", []))
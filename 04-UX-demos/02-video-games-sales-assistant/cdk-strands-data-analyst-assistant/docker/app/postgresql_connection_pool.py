@@ -0,0 +1,273 @@
+from contextlib import contextmanager
+import threading
+import time
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the acquire timeout."""
+
+
+def is_authentication_error(error: Exception) -> bool:
+    """
+    Checks whether a connection error was caused by rejected credentials.
+
+    Args:
+        error: The exception raised by psycopg2.connect
+
+    Returns:
+        bool: True for password or role authentication failures
+    """
+    message = str(error).lower()
+    return "authentication failed" in message or "password" in message
+
+
+class CachedSecret:
+    """
+    Caches the value of a secret for a fixed time to live.
+
+    The secret is fetched on first use and again once the TTL has expired or
+    after invalidate() is called, for example when the database rejects the
+    cached password because it was rotated.
+    """
+
+    def __init__(self, fetch, ttl_seconds: float):
+        """
+        Args:
+            fetch: Callable returning the current secret value as a dict
+            ttl_seconds: How long a fetched value is reused
+        """
+        self._fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self._value = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def get(self) -> dict:
+        with self._lock:
+            if self._value is None or time.monotonic() >= self._expires_at:
+                self._value = self._fetch()
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                self.refreshes += 1
+            return self._value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+
+
+class PostgreSQLConnectionPool:
+    """
+    Process-wide pool of PostgreSQL connections opened with cached credentials.
+
+    Connections are created on demand up to max_connections and kept open for
+    reuse across queries. Every connection runs with a statement timeout and,
+    by default, in read-only transaction mode. Callers that find the pool
+    exhausted wait up to acquire_timeout seconds; the waits are recorded in
+    the pool metrics. A connection that sat idle for longer than
+    liveness_check_after seconds is pinged with SELECT 1 before it is handed
+    out, so one dropped by the server or a proxy is replaced instead of failing
+    the caller's query.
+    """
+
+    def __init__(
+        self,
+        secret: CachedSecret,
+        host: str,
+        database: str,
+        max_connections: int = 5,
+        statement_timeout_ms: int = 30000,
+        read_only: bool = True,
+        acquire_timeout: float = 10.0,
+        connect_timeout: int = 10,
+        liveness_check_after: float = 30.0,
+        connect=psycopg2.connect,
+    ):
+        self.secret = secret
+        self.host = host
+        self.database = database
+        self.max_connections = max_connections
+        self.statement_timeout_ms = statement_timeout_ms
+        self.read_only = read_only
+        self.acquire_timeout = acquire_timeout
+        self.connect_timeout = connect_timeout
+        self.liveness_check_after = liveness_check_after
+        self._connect = connect
+
+        # (connection, monotonic time it was returned), most recently returned last
+        self._idle = []
+        self._lock = threading.Lock()
+        # One slot per connection, so at most max_connections are ever open
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._stats = {
+            "acquired": 0,
+            "opened": 0,
+            "open": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "waited": 0,
+            "wait_seconds_total": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "discarded": 0,
+            "liveness_checks": 0,
+            "stale_discarded": 0,
+        }
+
+    def _session_options(self) -> str:
+        options = f"-c statement_timeout={int(self.statement_timeout_ms)}"
+        if self.read_only:
+            options += " -c default_transaction_read_only=on"
+        return options
+
+    def _open_connection(self):
+        for attempt in range(2):
+            credentials = self.secret.get()
+            try:
+                conn = self._connect(
+                    host=self.host,
+                    database=self.database,
+                    user=credentials["username"],
+                    password=credentials["password"],
+                    connect_timeout=self.connect_timeout,
+                    options=self._session_options(),
+                    application_name="data-analyst-assistant",
+                )
+                break
+            except psycopg2.OperationalError as error:
+                if attempt or not is_authentication_error(error):
+                    raise
+                # The secret was probably rotated: fetch it again and retry once
+                print("PostgreSQL rejected the cached credentials, refreshing the secret")
+                self.secret.invalidate()
+        with self._lock:
+            self._stats["opened"] += 1
+            self._stats["open"] += 1
+        return conn
+
+    def _acquire_slot(self) -> None:
+        if self._slots.acquire(blocking=False):
+            return
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No PostgreSQL connection available after {self.acquire_timeout} seconds"
+            )
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats["waited"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+    def _is_alive(self, conn) -> bool:
+        """Pings an idle connection, leaving no transaction open on it."""
+        with self._lock:
+            self._stats["liveness_checks"] += 1
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error as error:
+            print(f"Discarding a stale pooled PostgreSQL connection: {error}")
+            with self._lock:
+                self._stats["stale_discarded"] += 1
+            return False
+
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._lock:
+            self._stats["open"] -= 1
+            self._stats["discarded"] += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with block.
+
+        Any open transaction is rolled back when the connection is returned, and
+        connections left closed or in an unknown state are discarded.
+
+        Raises:
+            PoolTimeoutError: If no connection is available within acquire_timeout
+        """
+        self._acquire_slot()
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    conn, returned_at = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    conn = self._open_connection()
+                elif conn.closed or (
+                    time.monotonic() - returned_at > self.liveness_check_after
+                    and not self._is_alive(conn)
+                ):
+                    self._discard(conn)
+                    conn = None
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+
+        try:
+            yield conn
+        finally:
+            reusable = (
+                not conn.closed
+                and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_UNKNOWN
+            )
+            if reusable:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    reusable = False
+            with self._lock:
+                self._stats["in_use"] -= 1
+                if reusable:
+                    self._idle.append((conn, time.monotonic()))
+            if not reusable:
+                self._discard(conn)
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        """
+        Reports pool usage and saturation.
+
+        Returns:
+            dict: Connection counts, how often and how long callers waited for a
+                  connection, acquire timeouts, liveness checks of idle
+                  connections and credential refreshes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        stats.update(
+            {
+                "max_connections": self.max_connections,
+                "saturation": round(stats["in_use"] / self.max_connections, 2),
+                "wait_seconds_total": round(stats["wait_seconds_total"], 3),
+                "max_wait_seconds": round(stats["max_wait_seconds"], 3),
+                "credential_refreshes": self.secret.refreshes,
+            }
+        )
+        return stats
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
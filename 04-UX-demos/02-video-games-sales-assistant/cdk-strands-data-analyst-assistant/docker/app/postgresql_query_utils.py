@@ -1,10 +1,13 @@
-from datetime import datetime, date
 import boto3
 import json
 import psycopg2
 import os
+import re
+import threading
 from botocore.exceptions import ClientError
-from decimal import Decimal
+from postgresql_connection_pool import CachedSecret, PoolTimeoutError, PostgreSQLConnectionPool
+from query_result_cache import QueryResultCache
+from query_result_serializer import build_result_json, serialize_rows
 
 # Environment variables
 ENV = {
@@ -13,6 +16,16 @@ ENV = {
     "DATABASE_NAME": os.environ.get("DATABASE_NAME"),
     "QUESTION_ANSWERS_TABLE": os.environ.get("QUESTION_ANSWERS_TABLE"),
     "MAX_RESPONSE_SIZE_BYTES": int(os.environ.get("MAX_RESPONSE_SIZE_BYTES", 25600)),
+    "QUERY_FETCH_SIZE": int(os.environ.get("QUERY_FETCH_SIZE", 500)),
+    "POSTGRESQL_POOL_SIZE": int(os.environ.get("POSTGRESQL_POOL_SIZE", 5)),
+    "POSTGRESQL_POOL_TIMEOUT_SECONDS": float(os.environ.get("POSTGRESQL_POOL_TIMEOUT_SECONDS", 10)),
+    "POSTGRESQL_IDLE_CHECK_SECONDS": float(os.environ.get("POSTGRESQL_IDLE_CHECK_SECONDS", 30)),
+    "POSTGRESQL_STATEMENT_TIMEOUT_MS": int(os.environ.get("POSTGRESQL_STATEMENT_TIMEOUT_MS", 30000)),
+    "POSTGRESQL_READ_ONLY": os.environ.get("POSTGRESQL_READ_ONLY", "true").lower() == "true",
+    "SECRET_CACHE_TTL_SECONDS": int(os.environ.get("SECRET_CACHE_TTL_SECONDS", 3600)),
+    "QUERY_CACHE_TTL_SECONDS": int(os.environ.get("QUERY_CACHE_TTL_SECONDS", 900)),
+    "QUERY_CACHE_MAX_ENTRIES": int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", 256)),
+    "QUERY_CACHE_MAX_BYTES": int(os.environ.get("QUERY_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
     "AWS_REGION": os.environ.get("AWS_REGION", "us-east-1")
 }
 
@@ -88,6 +101,59 @@ def get_postgresql_connection(secret_name: str, aws_region: str, postgresql_host
     return conn
 
 
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+# Results of successful queries, keyed by normalized SQL; QUERY_CACHE_TTL_SECONDS=0 disables it
+query_result_cache = QueryResultCache(
+    ENV["QUERY_CACHE_TTL_SECONDS"],
+    ENV["QUERY_CACHE_MAX_ENTRIES"],
+    ENV["QUERY_CACHE_MAX_BYTES"],
+)
+
+
+def get_connection_pool() -> PostgreSQLConnectionPool:
+    """
+    Returns the process-wide PostgreSQL connection pool, creating it on first use.
+    
+    Database credentials are read from Secrets Manager once and cached for
+    SECRET_CACHE_TTL_SECONDS, or until the database rejects them.
+    
+    Returns:
+        PostgreSQLConnectionPool: The shared connection pool
+    """
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            secret = CachedSecret(
+                lambda: get_secret(ENV["SECRET_NAME"], ENV["AWS_REGION"]),
+                ENV["SECRET_CACHE_TTL_SECONDS"],
+            )
+            _connection_pool = PostgreSQLConnectionPool(
+                secret,
+                ENV["POSTGRESQL_HOST"],
+                ENV["DATABASE_NAME"],
+                max_connections=ENV["POSTGRESQL_POOL_SIZE"],
+                statement_timeout_ms=ENV["POSTGRESQL_STATEMENT_TIMEOUT_MS"],
+                read_only=ENV["POSTGRESQL_READ_ONLY"],
+                acquire_timeout=ENV["POSTGRESQL_POOL_TIMEOUT_SECONDS"],
+                liveness_check_after=ENV["POSTGRESQL_IDLE_CHECK_SECONDS"],
+            )
+        return _connection_pool
+
+
+def get_connection_pool_metrics() -> dict:
+    """
+    Returns usage and saturation metrics of the connection pool.
+    
+    Returns:
+        dict: Pool metrics, or {"initialized": False} before the first query
+    """
+    if _connection_pool is None:
+        return {"initialized": False}
+    return _connection_pool.metrics()
+
+
 def get_size(string: str) -> int:
     """
     Calculates the size of a string in bytes when encoded as UTF-8.
@@ -101,13 +167,93 @@ def get_size(string: str) -> int:
     return len(string.encode("utf-8"))
 
 
+# Statements that can run through a server-side (DECLARE ... CURSOR) cursor
+SERVER_SIDE_CURSOR_QUERY = re.compile(r"^\s*(\(\s*)*(SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+SERVER_SIDE_CURSOR_NAME = "analyst_query_result"
+
+
+def _run_query(connection, sql_query: str) -> str:
+    """
+    Executes a SQL query on a pooled connection and serializes the result.
+    
+    Args:
+        connection: An open psycopg2 connection
+        sql_query: SQL query string to execute
+        
+    Returns:
+        str: JSON string containing query results or error information
+    """
+    message = ""
+    server_side = SERVER_SIDE_CURSOR_QUERY.match(sql_query) is not None
+    if server_side:
+        # Rows stay on the server until fetched, so a huge result is never loaded whole
+        cur = connection.cursor(name=SERVER_SIDE_CURSOR_NAME)
+    else:
+        cur = connection.cursor()
+
+    print(sql_query)
+
+    # Execute a SQL query
+    try:
+        cur.execute(sql_query)
+        serialized = serialize_rows(cur, ENV["MAX_RESPONSE_SIZE_BYTES"], ENV["QUERY_FETCH_SIZE"])
+        records_to_return = serialized["rows"]
+
+        if serialized["truncated"]:
+            if server_side:
+                # Count the rows that were never fetched without transferring them
+                counter = connection.cursor()
+                counter.execute(f'MOVE FORWARD ALL IN "{SERVER_SIDE_CURSOR_NAME}"')
+                total_rows = serialized["fetched_rows"] + counter.rowcount
+                counter.close()
+            else:
+                total_rows = cur.rowcount
+            message = (
+                "The data is too large, it has been truncated from "
+                + str(total_rows)
+                + " to "
+                + str(len(records_to_return))
+                + " rows."
+            )
+            truncation = {
+                "total_rows": total_rows,
+                "returned_rows": len(records_to_return),
+                "returned_bytes": serialized["size_bytes"],
+                "max_bytes": ENV["MAX_RESPONSE_SIZE_BYTES"],
+            }
+
+    except (Exception, psycopg2.Error) as error:
+        print("Error executing SQL query:", error)
+        try:
+            connection.rollback()  # Rollback the transaction if there's an error
+        except psycopg2.Error:
+            pass  # the connection is broken and the pool will discard it
+        return json.dumps({"error": str(error.pgerror) if hasattr(error, 'pgerror') else str(error)})
+    finally:
+        # Close the cursor; the pool rolls back and keeps the connection
+        if not cur.closed:
+            try:
+                cur.close()
+            except psycopg2.Error:
+                pass  # a server-side cursor is already gone after a failed transaction
+        
+    if message != "":
+        return build_result_json(records_to_return, message=message, truncation=truncation)
+    else:
+        return build_result_json(records_to_return)
+
+
 def run_sql_query_on_postgresql(sql_query: str) -> str:
     """
     Executes a SQL query on the PostgreSQL database and returns the results as JSON.
     
     The function handles connection to the database, query execution, and formatting
     of results. Special data types (Decimal, date) are properly converted for JSON.
-    If the result size exceeds MAX_RESPONSE_SIZE_BYTES, it's truncated.
+    Rows are read in batches from a server-side cursor and encoded once each; once
+    the result reaches MAX_RESPONSE_SIZE_BYTES no more rows are fetched, the rest
+    are counted on the server and the response says how many rows were returned.
+    Successful results are cached by normalized SQL text, so repeating a query
+    within QUERY_CACHE_TTL_SECONDS doesn't touch the database.
     
     Args:
         sql_query: SQL query string to execute
@@ -116,73 +262,27 @@ def run_sql_query_on_postgresql(sql_query: str) -> str:
         str: JSON string containing query results or error information
     """
     print(sql_query)
+    cached_result = query_result_cache.get(sql_query)
+    if cached_result is not None:
+        print("Query result served from cache")
+        return cached_result
+
     try:
         # Validate environment variables before proceeding
         validate_environment()
         
-        connection = get_postgresql_connection(
-            ENV["SECRET_NAME"], 
-            ENV["AWS_REGION"], 
-            ENV["POSTGRESQL_HOST"], 
-            ENV["DATABASE_NAME"]
-        )
-
-        if connection == False:
+        try:
+            with get_connection_pool().connection() as connection:
+                result = _run_query(connection, sql_query)
+            # Only results are cached, never errors
+            if result.startswith('{"result": '):
+                query_result_cache.put(sql_query, result)
+            return result
+        except (PoolTimeoutError, psycopg2.Error) as error:
+            print("Error connecting to the PostgreSQL database:", error)
             return json.dumps({
                 "error": "Something went wrong connecting to the database, ask the user to try again later."
             })
-
-        print("connected")
-
-        message = ""
-        cur = connection.cursor()
-        records = []
-        records_to_return = []
-
-        print(sql_query)
-
-        # Execute a SQL query
-        try:
-            cur.execute(sql_query)
-            rows = cur.fetchall()
-            column_names = [desc[0] for desc in cur.description]
-            for item in rows:
-                record = {}
-                for x, value in enumerate(item):
-                    if type(value) is Decimal:
-                        record[column_names[x]] = float(value)
-                    elif isinstance(value, date):
-                        record[column_names[x]] = str(value)
-                    else:
-                        record[column_names[x]] = value
-                records.append(record)
-            if get_size(json.dumps(records)) > ENV["MAX_RESPONSE_SIZE_BYTES"]:
-                for item in records:
-                    if get_size(json.dumps(records_to_return)) <= ENV["MAX_RESPONSE_SIZE_BYTES"]:
-                        records_to_return.append(item)
-                message = (
-                    "The data is too large, it has been truncated from "
-                    + str(len(records))
-                    + " to "
-                    + str(len(records_to_return))
-                    + " rows."
-                )
-            else:
-                records_to_return = records
-
-        except (Exception, psycopg2.Error) as error:
-            print("Error executing SQL query:", error)
-            connection.rollback()  # Rollback the transaction if there's an error
-            return json.dumps({"error": str(error.pgerror) if hasattr(error, 'pgerror') else str(error)})
-        finally:
-            # Close the cursor and the connection
-            cur.close()
-            connection.close()
-            
-        if message != "":
-            return json.dumps({"result": records_to_return, "message": message})
-        else:
-            return json.dumps({"result": records_to_return})
             
     except EnvironmentError as e:
         return json.dumps({"error": str(e)})
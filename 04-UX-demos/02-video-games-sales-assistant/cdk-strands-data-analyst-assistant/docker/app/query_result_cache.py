@@ -0,0 +1,144 @@
+from collections import OrderedDict
+import re
+import threading
+import time
+
+# Literals (including E'...' strings with backslash escapes) and quoted identifiers
+# are kept verbatim, comments and whitespace become a single space and everything
+# else is case folded
+SQL_TOKEN = re.compile(
+    r"""
+    (?P<literal>(?<![\w$])[Ee]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*'|"(?:[^"]|"")*"|\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<space>\s+)
+    |(?P<other>.)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+# Whitespace next to these characters carries no meaning
+PUNCTUATION = set("(),;=<>+*/-")
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Normalizes SQL text so that equivalent queries share a cache key.
+
+    Whitespace and comments collapse to single spaces (and are dropped around
+    punctuation), keywords and unquoted identifiers are lower-cased and a
+    trailing semicolon is removed. String literals (including E'...' escape
+    strings), quoted identifiers and dollar-quoted strings are left untouched,
+    so queries that differ only in a literal value never share a key.
+
+    Args:
+        sql_query: The SQL text to normalize
+
+    Returns:
+        str: The normalized SQL text
+    """
+    parts = []
+    pending_space = False
+    for match in SQL_TOKEN.finditer(sql_query):
+        literal = match.group("literal")
+        if literal is None and match.group("other") is None:
+            pending_space = True  # whitespace or a comment
+            continue
+        text = literal if literal is not None else match.group().lower()
+        if pending_space and parts and parts[-1][-1] not in PUNCTUATION and text[0] not in PUNCTUATION:
+            parts.append(" ")
+        parts.append(text)
+        pending_space = False
+    return "".join(parts).rstrip(";")
+
+
+class QueryResultCache:
+    """
+    Least-recently-used cache of serialized query results keyed by normalized SQL.
+
+    Entries expire after ttl_seconds and the least recently used entries are
+    evicted once the cache holds more than max_entries results or max_bytes of
+    JSON. The cache lives in one worker process; invalidate() is the hook to
+    call when the underlying tables are reloaded.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # normalized SQL -> (expires_at, result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, sql_query: str):
+        """
+        Returns the cached result for a query, or None if missing or expired.
+        """
+        if not self.enabled:
+            return None
+        key = normalize_sql(sql_query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, sql_query: str, result: str) -> None:
+        """
+        Stores a serialized query result, evicting least recently used entries as needed.
+        """
+        if not self.enabled or len(result) > self.max_bytes:
+            return
+        key = normalize_sql(sql_query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._bytes += len(result)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, table: str = None) -> int:
+        """
+        Drops cached results, for example after a table has been reloaded.
+
+        Args:
+            table: Only drop queries that mention this table; all entries if None
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if table is None:
+                keys = list(self._entries)
+            else:
+                pattern = re.compile(rf"\b{re.escape(table.lower())}\b")
+                keys = [key for key in self._entries if pattern.search(key)]
+            for key in keys:
+                self._remove(key)
+            self._stats["invalidations"] += 1
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, result = self._entries.pop(key)
+        self._bytes -= len(result)
@@ -0,0 +1,83 @@
+from decimal import Decimal
+import json
+
+# Rows requested from the cursor per fetchmany() call
+FETCH_BATCH_SIZE = 500
+
+
+def json_default(value):
+    """
+    Converts database values that the json module can't encode natively.
+
+    Decimals become floats, dates and datetimes become strings, and anything
+    else falls back to its string representation.
+    """
+    if type(value) is Decimal:
+        return float(value)
+    # date and datetime values, and any other type, as their string form
+    return str(value)
+
+
+_encode = json.JSONEncoder(default=json_default).encode
+
+
+def serialize_rows(cursor, max_bytes: int, fetch_size: int = FETCH_BATCH_SIZE) -> dict:
+    """
+    Encodes the rows of an executed cursor as JSON objects within a byte budget.
+
+    Rows are fetched in batches and each row is encoded exactly once. The running
+    size is that of the JSON array the encoded rows form, so the first row that
+    would push the array past max_bytes ends the scan and no further batches are
+    fetched from the cursor.
+
+    Args:
+        cursor: A DB-API cursor on which a query returning rows has been executed
+        max_bytes: Maximum size in bytes of the JSON array of rows
+        fetch_size: Number of rows to request per fetchmany() call
+
+    Returns:
+        dict: "rows" (list of JSON-encoded row objects), "size_bytes" (size of the
+              JSON array), "fetched_rows" (rows read from the cursor, including the
+              unused rest of the last batch) and "truncated"
+    """
+    # Server-side cursors only describe their columns after the first fetch
+    batch = cursor.fetchmany(fetch_size)
+    column_names = [desc[0] for desc in cursor.description]
+    rows = []
+    size = 2  # the enclosing []
+    fetched = 0
+    truncated = False
+
+    while batch and not truncated:
+        fetched += len(batch)
+        for row in batch:
+            encoded = _encode(dict(zip(column_names, row)))
+            # json.dumps escapes non-ASCII characters, so characters are bytes
+            row_size = len(encoded) + (2 if rows else 0)  # ", " separator
+            if size + row_size > max_bytes:
+                truncated = True
+                break
+            rows.append(encoded)
+            size += row_size
+        if not truncated:
+            batch = cursor.fetchmany(fetch_size)
+
+    return {"rows": rows, "size_bytes": size, "fetched_rows": fetched, "truncated": truncated}
+
+
+def build_result_json(rows: list, **fields) -> str:
+    """
+    Builds the {"result": [...], ...} response from already encoded rows.
+
+    Args:
+        rows: JSON-encoded row objects, as returned by serialize_rows
+        **fields: Additional top-level keys, encoded with json.dumps
+
+    Returns:
+        str: The JSON response string
+    """
+    parts = ['{"result": [', ", ".join(rows), "]"]
+    for key, value in fields.items():
+        parts.append(f", {json.dumps(key)}: {json.dumps(value, default=json_default)}")
+    parts.append("}")
+    return "".join(parts)
@@ -53,28 +53,47 @@ def save_raw_query_result(user_prompt_uuid, user_prompt, sql_query, sql_query_de
         return {"success": False, "error": str(e)}
 
 
+_conversation_table = None
+
+
+def get_conversation_table():
+    """
+    Return the DynamoDB conversation table resource, created once per process.
+    """
+    global _conversation_table
+    if _conversation_table is None:
+        dynamodb_resource = boto3.resource('dynamodb', region_name=ENV["AWS_REGION"])
+        _conversation_table = dynamodb_resource.Table(ENV["CONVERSATION_TABLE_NAME"])
+    return _conversation_table
+
+
 def read_messages_by_session(
-    session_id: str
+    session_id: str,
+    start_message_id: int = 0
 ) -> List[Dict[str, Any]]:
     """
     Read messages from a table by session_id with pagination.
     
     Args:
         session_id: The session ID to query for
+        start_message_id: Only read messages with this message_id or later
         
     Returns:
         List of message objects containing only message attribute
     """
     
-    dynamodb_resource = boto3.resource('dynamodb', region_name=ENV["AWS_REGION"])
-    table = dynamodb_resource.Table(ENV["CONVERSATION_TABLE_NAME"])
+    table = get_conversation_table()
     
     messages = []
     last_evaluated_key = None
     
+    key_condition = Key('session_id').eq(session_id)
+    if start_message_id > 0:
+        key_condition = key_condition & Key('message_id').gte(start_message_id)
+    
     while True:
         query_params = {
-            'KeyConditionExpression': Key('session_id').eq(session_id),
+            'KeyConditionExpression': key_condition,
             'ProjectionExpression': 'message',
             'Limit': 100
         }
@@ -166,8 +185,7 @@ def save_messages(session_id: str, prompt_uuid: str, starting_message_id: int,
 
     print("Final messages length: " + str(len(messages_to_save)))
 
-    dynamodb = boto3.resource('dynamodb', region_name=ENV["AWS_REGION"])
-    table = dynamodb.Table(ENV["CONVERSATION_TABLE_NAME"])
+    table = get_conversation_table()
     try:
         with table.batch_writer() as batch:
             for i, message_text in enumerate(messages_to_save):
@@ -186,4 +204,39 @@ def save_messages(session_id: str, prompt_uuid: str, starting_message_id: int,
         return True
     except Exception as e:
         print(f"Error writing messages: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def append_messages(session_id: str, prompt_uuid: str, starting_message_id: int,
+                    messages_to_save: List[str]) -> bool:
+    """
+    Write already filtered messages to a session, numbered from starting_message_id.
+    
+    Unlike save_messages, the messages are not filtered again, so only the new
+    messages of a turn need to be passed in.
+    
+    Args:
+        session_id (str): The UUID of the session
+        prompt_uuid (str): The UUID of the prompt
+        starting_message_id (int): The message_id of the first message
+        messages_to_save (List[str]): Messages as JSON strings, as returned by messages_objects_to_strings
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    table = get_conversation_table()
+    try:
+        with table.batch_writer() as batch:
+            for offset, message_text in enumerate(messages_to_save):
+                batch.put_item(
+                    Item={
+                        'session_id': session_id,
+                        'message_id': starting_message_id + offset,
+                        'prompt_uuid': prompt_uuid,
+                        'message': message_text
+                    }
+                )
+        return True
+    except Exception as e:
+        print(f"Error writing messages: {e}")
+        return False
@@ -0,0 +1,125 @@
+"""
+Benchmark for the byte-budgeted query result serializer
+
+Generates synthetic video game sales rows (text, integer, Decimal and date
+columns) behind an in-memory DB-API cursor and compares the previous
+fetchall-then-truncate loop of run_sql_query_on_postgresql with
+serialize_rows. No database, AWS credentials or psycopg2 are needed. The
+legacy loop is quadratic, so the 50k-row case takes tens of seconds.
+
+Usage:
+    python benchmark_query_serializer.py --rows 1000 10000 50000 --max-bytes 25600
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from query_result_serializer import build_result_json, serialize_rows  # noqa: E402
+
+COLUMNS = ["title", "platform", "genre", "publisher", "year", "total_units", "release_date"]
+
+
+class SyntheticCursor:
+    """Produces rows on demand, like a server-side cursor, and counts what was fetched"""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.position = 0
+        self.description = [(name,) for name in COLUMNS]
+
+    def _row(self, i: int):
+        return (
+            f"Game Title {i}",
+            ("PS4", "XOne", "Switch", "PC")[i % 4],
+            ("Action", "Sports", "Shooter", "Role-Playing", "Puzzle")[i % 5],
+            f"Publisher {i % 97}",
+            2000 + i % 24,
+            Decimal(f"{(i * 7919) % 100000 / 100:.2f}"),
+            date(2000, 1, 1) + timedelta(days=i % 9000),
+        )
+
+    def fetchmany(self, size: int):
+        end = min(self.position + size, self.rows)
+        batch = [self._row(i) for i in range(self.position, end)]
+        self.position = end
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(self.rows - self.position)
+
+
+def legacy_serialize(cursor, max_bytes: int) -> str:
+    """The previous implementation: fetchall, convert, then re-encode the kept rows for every row"""
+    rows = cursor.fetchall()
+    column_names = [desc[0] for desc in cursor.description]
+    records = []
+    records_to_return = []
+    for item in rows:
+        record = {}
+        for x, value in enumerate(item):
+            if type(value) is Decimal:
+                record[column_names[x]] = float(value)
+            elif isinstance(value, date):
+                record[column_names[x]] = str(value)
+            else:
+                record[column_names[x]] = value
+        records.append(record)
+    if len(json.dumps(records).encode("utf-8")) > max_bytes:
+        for item in records:
+            if len(json.dumps(records_to_return).encode("utf-8")) <= max_bytes:
+                records_to_return.append(item)
+        message = f"The data is too large, it has been truncated from {len(records)} to {len(records_to_return)} rows."
+        return json.dumps({"result": records_to_return, "message": message})
+    return json.dumps({"result": records_to_return or records})
+
+
+def streaming_serialize(cursor, max_bytes: int) -> str:
+    serialized = serialize_rows(cursor, max_bytes)
+    if serialized["truncated"]:
+        # The server would count the remaining rows with MOVE FORWARD ALL
+        total_rows = serialized["fetched_rows"] + cursor.rows - cursor.position
+        message = (
+            f"The data is too large, it has been truncated from {total_rows} "
+            f"to {len(serialized['rows'])} rows."
+        )
+        return build_result_json(serialized["rows"], message=message)
+    return build_result_json(serialized["rows"])
+
+
+def timed(fn, rows: int, max_bytes: int):
+    cursor = SyntheticCursor(rows)
+    started = time.perf_counter()
+    output = fn(cursor, max_bytes)
+    return time.perf_counter() - started, output, cursor.position
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the query result serializer")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--max-bytes", type=int, default=25600, help="MAX_RESPONSE_SIZE_BYTES")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'legacy':>10} {'streaming':>10} {'speedup':>8} {'returned':>9} {'fetched':>8}")
+    for rows in args.rows:
+        legacy_time, legacy_output, _ = timed(legacy_serialize, rows, args.max_bytes)
+        stream_time, stream_output, fetched = timed(streaming_serialize, rows, args.max_bytes)
+        returned = len(json.loads(stream_output)["result"])
+        assert len(json.loads(legacy_output)["result"]) >= returned
+        print(
+            f"{rows:>8} {legacy_time * 1000:8.1f}ms {stream_time * 1000:8.1f}ms "
+            f"{legacy_time / stream_time:7.0f}x {returned:>9} {fetched:>8}"
+        )
+        message = json.loads(stream_output).get("message")
+        if message:
+            print(f"{'':>8} {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Unit tests for the PostgreSQL connection pool.
+
+A stand-in connect callable returns fake connections, so no database is
+needed; psycopg2 must be installed.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+import psycopg2
+from psycopg2 import extensions
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from postgresql_connection_pool import CachedSecret, PoolTimeoutError, PostgreSQLConnectionPool  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        if self.conn.dropped:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    def __init__(self, password):
+        self.password = password
+        self.closed = 0
+        self.dropped = False
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        self.executed = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.transaction_status
+
+    def rollback(self):
+        if self.dropped:
+            raise psycopg2.OperationalError("connection already closed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    """Stands in for psycopg2.connect, rejecting the passwords listed in reject"""
+
+    def __init__(self, reject=(), error=None):
+        self.reject = set(reject)
+        self.error = error
+        self.calls = []
+        self.connections = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        if kwargs["password"] in self.reject:
+            raise psycopg2.OperationalError(
+                f'FATAL:  password authentication failed for user "{kwargs["user"]}"'
+            )
+        conn = FakeConnection(kwargs["password"])
+        self.connections.append(conn)
+        return conn
+
+
+def make_secret(passwords=("secret",)):
+    remaining = list(passwords)
+
+    def fetch():
+        password = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        return {"username": "analyst", "password": password}
+
+    return CachedSecret(fetch, ttl_seconds=3600)
+
+
+def make_pool(connect, secret=None, **kwargs):
+    return PostgreSQLConnectionPool(
+        secret or make_secret(), "db.example.com", "video_games", connect=connect, **kwargs
+    )
+
+
+class TestPostgreSQLConnectionPool(unittest.TestCase):
+    def test_connections_are_reused(self):
+        connect = FakeConnect()
+        pool = make_pool(connect)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(connect.calls), 1)
+        self.assertIn("default_transaction_read_only=on", connect.calls[0]["options"])
+        self.assertEqual(first.rollbacks, 2)
+        metrics = pool.metrics()
+        self.assertEqual((metrics["opened"], metrics["acquired"], metrics["idle"]), (1, 2, 1))
+
+    def test_waits_for_a_returned_connection(self):
+        connect = FakeConnect()
+        pool = make_pool(connect, max_connections=1, acquire_timeout=5)
+        borrowed = threading.Event()
+
+        def hold():
+            with pool.connection():
+                borrowed.set()
+                time.sleep(0.2)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        borrowed.wait()
+        started = time.monotonic()
+        with pool.connection() as conn:
+            waited = time.monotonic() - started
+        holder.join()
+
+        self.assertGreaterEqual(waited, 0.1)
+        self.assertIs(conn, connect.connections[0])
+        self.assertEqual(len(connect.calls), 1)
+        self.assertEqual(pool.metrics()["waited"], 1)
+
+    def test_times_out_when_exhausted(self):
+        pool = make_pool(FakeConnect(), max_connections=1, acquire_timeout=0.05)
+
+        with pool.connection():
+            with self.assertRaises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+
+        self.assertEqual(pool.metrics()["timeouts"], 1)
+        # The slot of the timed-out caller was never taken, the holder's is free again
+        with pool.connection():
+            pass
+
+    def test_refreshes_the_secret_after_an_authentication_failure(self):
+        connect = FakeConnect(reject={"rotated-out"})
+        secret = make_secret(["rotated-out", "current"])
+        pool = make_pool(connect, secret=secret)
+
+        with pool.connection() as conn:
+            self.assertEqual(conn.password, "current")
+
+        self.assertEqual([call["password"] for call in connect.calls], ["rotated-out", "current"])
+        self.assertEqual(pool.metrics()["credential_refreshes"], 2)
+
+    def test_other_connection_errors_are_not_retried(self):
+        connect = FakeConnect(error=psycopg2.OperationalError("could not translate host name"))
+        secret = make_secret()
+        pool = make_pool(connect, secret=secret, max_connections=1, acquire_timeout=0.05)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection():
+                pass
+
+        self.assertEqual(len(connect.calls), 1)
+        self.assertEqual(secret.refreshes, 1)
+        # The failed open gave its slot back
+        connect.error = None
+        with pool.connection():
+            pass
+
+    def test_broken_connections_are_discarded(self):
+        connect = FakeConnect()
+        pool = make_pool(connect)
+
+        with pool.connection() as conn:
+            conn.close()
+        with pool.connection() as conn:
+            conn.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        with pool.connection() as conn:
+            conn.dropped = True
+        with pool.connection() as conn:
+            pass
+
+        self.assertEqual(len(connect.calls), 4)
+        self.assertIs(conn, connect.connections[3])
+        metrics = pool.metrics()
+        self.assertEqual((metrics["discarded"], metrics["open"], metrics["in_use"]), (3, 1, 0))
+
+    def test_idle_connection_closed_while_pooled_is_replaced(self):
+        connect = FakeConnect()
+        pool = make_pool(connect)
+
+        with pool.connection() as first:
+            pass
+        first.close()
+        with pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.metrics()["discarded"], 1)
+
+    def test_recently_used_connections_skip_the_liveness_check(self):
+        pool = make_pool(FakeConnect(), liveness_check_after=60)
+
+        with pool.connection() as conn:
+            pass
+        with pool.connection():
+            pass
+
+        self.assertEqual(conn.executed, [])
+        self.assertEqual(pool.metrics()["liveness_checks"], 0)
+
+    def test_stale_idle_connections_are_pinged_and_replaced(self):
+        connect = FakeConnect()
+        pool = make_pool(connect, liveness_check_after=0)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as conn:
+            self.assertIs(conn, first)
+        self.assertEqual(first.executed, ["SELECT 1"])
+
+        first.dropped = True
+        with pool.connection() as conn:
+            self.assertIsNot(conn, first)
+
+        metrics = pool.metrics()
+        self.assertEqual(len(connect.calls), 2)
+        self.assertTrue(first.closed)
+        self.assertEqual((metrics["liveness_checks"], metrics["stale_discarded"], metrics["open"]), (2, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
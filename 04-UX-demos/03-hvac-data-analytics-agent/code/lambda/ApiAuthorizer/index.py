@@ -18,10 +18,11 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 '''
 
+from collections import OrderedDict
 from jose import jwt
 import requests
 from jose import jwk
-import json
+import hashlib
 import time
 import boto3
 import os
@@ -29,39 +30,88 @@ import os
 
 REGION = os.environ.get('AWS_REGION', '')
 USER_POOL_ID = os.environ.get('USER_POOL_ID', '')
-CLIENT_ID = os.environ.get('CLIENT_ID', '') 
-    
+CLIENT_ID = os.environ.get('CLIENT_ID', '')
+# How long the Cognito JWKS is reused before it is fetched again
+JWKS_CACHE_TTL_SECONDS = int(os.environ.get('JWKS_CACHE_TTL_SECONDS', 3600))
+# Minimum time between refreshes triggered by a token with an unknown key ID
+JWKS_MIN_REFRESH_SECONDS = int(os.environ.get('JWKS_MIN_REFRESH_SECONDS', 30))
+# Number of verified tokens remembered until they expire
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 1024))
+
+# Module-level state survives between warm invocations of the same container
+http_session = requests.Session()
+jwks_cache = {
+    'keys': {},  # kid -> constructed RS256 public key
+    'fetched_at': 0.0
+}
+verified_tokens = OrderedDict()  # sha256 of the token -> (exp, claims)
+
 
 def get_cognito_public_keys(region, user_pool_id):
     """Fetch public keys from Cognito"""
     
     keys_url = f'https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json'
     try:
-        response = requests.get(keys_url)
+        response = http_session.get(keys_url, timeout=3)
         response.raise_for_status()  # Raises an HTTPError for bad responses
         return response.json()['keys']
     except Exception as e:
         raise Exception(f"Failed to fetch public keys: {str(e)}")
 
+def refresh_public_keys(region, user_pool_id):
+    """Fetch the JWKS and replace the cached keys"""
+    keys = get_cognito_public_keys(region, user_pool_id)
+    jwks_cache['keys'] = {k['kid']: jwk.construct(k, 'RS256') for k in keys}
+    jwks_cache['fetched_at'] = time.monotonic()
+
 def get_public_key(token, region, user_pool_id):
     """Get the public key that matches the token's key ID"""
     # Get the key ID from the token header
     headers = jwt.get_unverified_header(token)
     kid = headers['kid']
     
-    # Find the matching public key
-    keys = get_cognito_public_keys(region, user_pool_id)
-    key = next((k for k in keys if k['kid'] == kid), None)
+    age = time.monotonic() - jwks_cache['fetched_at']
+    if not jwks_cache['keys'] or age > JWKS_CACHE_TTL_SECONDS:
+        refresh_public_keys(region, user_pool_id)
+    elif kid not in jwks_cache['keys'] and age > JWKS_MIN_REFRESH_SECONDS:
+        # Cognito may have rotated its signing keys since the last fetch
+        refresh_public_keys(region, user_pool_id)
+    
+    key = jwks_cache['keys'].get(kid)
     if not key:
         raise Exception('Public key not found')
-    
-    print(key)
-    # Convert the public key to PEM format
-    return json.dumps(key)
+    return key
+
+def get_cached_claims(token_hash):
+    """Return the claims of a previously verified token that has not expired yet"""
+    entry = verified_tokens.get(token_hash)
+    if entry is None:
+        return None
+    exp, claims = entry
+    if exp <= time.time():
+        del verified_tokens[token_hash]
+        return None
+    verified_tokens.move_to_end(token_hash)
+    return claims
+
+def cache_claims(token_hash, claims):
+    """Remember verified claims until the token expires"""
+    verified_tokens[token_hash] = (claims['exp'], claims)
+    while len(verified_tokens) > TOKEN_CACHE_MAX_ENTRIES:
+        verified_tokens.popitem(last=False)
 
 def verify_token(token, region, user_pool_id, client_id):
     """Verify the JWT token"""
     try:
+        # Tokens seen before skip the signature check until they expire
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        claims = get_cached_claims(token_hash)
+        if claims is not None:
+            return {
+                'isValid': True,
+                'claims': claims
+            }
+
         # Get the public key
         public_key = get_public_key(token, region, user_pool_id)
         
@@ -78,6 +128,7 @@ def verify_token(token, region, user_pool_id, client_id):
             audience=client_id,
             issuer=f'https://cognito-idp.{region}.amazonaws.com/{user_pool_id}'
         )
+        cache_claims(token_hash, claims)
         
         return {
             'isValid': True,
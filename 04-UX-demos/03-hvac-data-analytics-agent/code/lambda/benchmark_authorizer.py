@@ -0,0 +1,167 @@
+"""
+Benchmark for the JWKS and verified-token caches of the authorizer Lambdas
+
+Serves a generated RS256 key set from a local stub JWKS server (with an
+artificial round-trip delay standing in for Cognito) and times warm
+invocations of ApiAuthorizer's lambda_handler against the previous flow,
+which fetched the JWKS and verified the signature on every invocation. No
+AWS account is needed; python-jose, requests and cryptography must be
+installed.
+
+Usage:
+    python benchmark_authorizer.py --invocations 200 --delay-ms 40
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+REGION = "us-east-1"
+USER_POOL_ID = "us-east-1_benchmark"
+CLIENT_ID = "benchmark-client"
+ISSUER = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}"
+METHOD_ARN = "arn:aws:execute-api:us-east-1:123456789012:api/$connect"
+
+
+def generate_key(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": kid, "use": "sig"})
+    public_jwk = {k: v.decode() if isinstance(v, bytes) else v for k, v in public_jwk.items()}
+    return private_pem, public_jwk
+
+
+def start_jwks_server(jwks: dict, delay_seconds: float):
+    """Serves the key set on a random local port, counting requests"""
+    stats = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            stats["requests"] += 1
+            time.sleep(delay_seconds)
+            body = json.dumps(jwks).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json", stats
+
+
+def issue_token(private_pem: str, kid: str, subject: str) -> str:
+    now = int(time.time())
+    claims = {"sub": subject, "aud": CLIENT_ID, "iss": ISSUER, "token_use": "id", "iat": now, "exp": now + 3600}
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": kid})
+
+
+def load_authorizer(jwks_url: str):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ApiAuthorizer", "index.py")
+    spec = importlib.util.spec_from_file_location("api_authorizer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.REGION, module.USER_POOL_ID, module.CLIENT_ID = REGION, USER_POOL_ID, CLIENT_ID
+
+    def get_stub_public_keys(region, user_pool_id):
+        response = module.http_session.get(jwks_url, timeout=3)
+        response.raise_for_status()
+        return response.json()["keys"]
+
+    module.get_cognito_public_keys = get_stub_public_keys
+    return module
+
+
+def legacy_handler(jwks_url: str, token: str) -> bool:
+    """The previous flow: fetch the JWKS, pick the key and verify on every invocation"""
+    kid = jwt.get_unverified_header(token)["kid"]
+    keys = requests.get(jwks_url).json()["keys"]
+    key = next(k for k in keys if k["kid"] == kid)
+    jwt.decode(token, json.dumps(key), algorithms=["RS256"], audience=CLIENT_ID, issuer=ISSUER)
+    return True
+
+
+def timed(fn, tokens):
+    samples = []
+    for token in tokens:
+        started = time.perf_counter()
+        fn(token)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(name: str, samples, requests_made: int):
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{name:<34} {statistics.mean(samples):8.3f}ms {statistics.median(samples):8.3f}ms "
+        f"{p95:8.3f}ms {requests_made:>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the authorizer caches")
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=40, help="Simulated JWKS round-trip time")
+    parser.add_argument("--users", type=int, default=20, help="Distinct tokens in the mixed workload")
+    args = parser.parse_args()
+
+    private_pem, public_jwk = generate_key("key-1")
+    _, other_jwk = generate_key("key-2")
+    server, jwks_url, server_stats = start_jwks_server({"keys": [other_jwk, public_jwk]}, args.delay_ms / 1000)
+
+    same_token = [issue_token(private_pem, "key-1", "user-0")] * args.invocations
+    user_tokens = [issue_token(private_pem, "key-1", f"user-{i}") for i in range(args.users)]
+    mixed_tokens = [user_tokens[i % args.users] for i in range(args.invocations)]
+    # Every token is new, so each invocation verifies a signature with the cached JWKS
+    fresh_tokens = [issue_token(private_pem, "key-1", f"fresh-{i}") for i in range(args.invocations)]
+
+    print(f"{'scenario':<34} {'mean':>10} {'median':>10} {'p95':>10} {'JWKS':>6}")
+
+    scenarios = (
+        ("same token", same_token),
+        (f"{args.users} users, round robin", mixed_tokens),
+        ("new token every time", fresh_tokens),
+    )
+    for name, tokens in scenarios:
+        server_stats["requests"] = 0
+        report(f"legacy, {name}", timed(lambda t: legacy_handler(jwks_url, t), tokens), server_stats["requests"])
+
+        authorizer = load_authorizer(jwks_url)
+        authorizer.lambda_handler({"queryStringParameters": {"jwt": tokens[0]}, "methodArn": METHOD_ARN}, None)
+        server_stats["requests"] = 0
+
+        def handle(token):
+            event = {"queryStringParameters": {"jwt": token}, "methodArn": METHOD_ARN}
+            response = authorizer.lambda_handler(event, None)
+            assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+
+        report(f"cached, {name}", timed(handle, tokens), server_stats["requests"])
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+First-turn overhead of creating a triage session agent
+
+Compares building a fresh BedrockModel and Agent for every new session (the
+old get_or_create_session_agent behaviour) with building the session agent
+on a per-model prototype that shares the model client and tool registry.
+Tools come from the stub MCP servers, and a BedrockModel only creates its
+boto3 client, so no AWS credentials or network access are needed.
+
+Usage:
+    cd backend
+    python benchmarks/bench_agent_creation.py --sessions 200
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from bench_chat_load import percentile, write_stub_mcp_config
+
+
+def measure(build: Callable[[int], object], sessions: int, memory_sample: int):
+    """Per-session build times, and memory held per agent over a smaller traced sample"""
+    timings: List[float] = []
+    agents = []
+    for i in range(sessions):
+        start = time.perf_counter()
+        agents.append(build(i))
+        timings.append(time.perf_counter() - start)
+    agents.clear()
+
+    # tracemalloc slows allocation-heavy construction down a lot, so it is not timed
+    tracemalloc.start()
+    agents = [build(i) for i in range(memory_sample)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, retained / memory_sample
+
+
+def report(label: str, timings: List[float], retained_per_session: float) -> None:
+    print(f"{label:<10} p50 {percentile(timings, 50) * 1000:7.2f} ms  p95 {percentile(timings, 95) * 1000:7.2f} ms  "
+          f"max {max(timings) * 1000:7.2f} ms  total {sum(timings):6.2f} s  "
+          f"memory/session {retained_per_session / 1024:7.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session agent construction")
+    parser.add_argument("--sessions", type=int, default=200, help="session agents to build per strategy")
+    parser.add_argument("--memory-sample", type=int, default=10, help="session agents traced for memory per strategy")
+    args = parser.parse_args()
+
+    os.environ["MCP_CONFIG_PATH"] = write_stub_mcp_config()
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            import main as backend
+            from strands import Agent
+            from strands.models import BedrockModel
+
+            tools = backend.get_cached_tools()
+            model_id = backend.AVAILABLE_MODELS[0]["id"]
+
+            def build_fresh(_: int):
+                model = BedrockModel(model_id=model_id, temperature=0.7)
+                return Agent(model=model, system_prompt=backend.SESSION_SYSTEM_PROMPT, tools=tools)
+
+            def build_from_prototype(_: int):
+                return backend.build_session_agent(model_id)
+
+            # Warm imports and the prototype itself, which is built once per model
+            build_fresh(0)
+            start = time.perf_counter()
+            backend.get_agent_prototype(model_id)
+            prototype_build = time.perf_counter() - start
+
+            fresh = measure(build_fresh, args.sessions, args.memory_sample)
+            prototype = measure(build_from_prototype, args.sessions, args.memory_sample)
+            backend.mcp_manager.shutdown()
+    finally:
+        os.unlink(os.environ["MCP_CONFIG_PATH"])
+
+    print(f"Sessions: {args.sessions}  tools per agent: {len(tools)}  model: {model_id}")
+    report("fresh", *fresh)
+    report("prototype", *prototype)
+    print(f"One-time prototype build: {prototype_build * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
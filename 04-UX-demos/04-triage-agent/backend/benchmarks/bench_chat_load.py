@@ -0,0 +1,229 @@
+"""
+Load generator and latency benchmark for the triage /chat SSE endpoint
+
+Runs the FastAPI app in-process (uvicorn on a local port) with a deterministic
+FakeBedrockModel and stub MCP servers, so no AWS credentials or network access
+are needed. N concurrent sessions each walk the decision tree for a number of
+turns, and the run reports:
+
+- time to first byte and inter-chunk latency of the SSE stream
+- p50/p95/p99 turn latency
+- RSS growth of the process
+- event-loop lag of the server loop (the client shares the process and the
+  GIL, so occasional spikes can come from the load generator itself)
+
+Usage:
+    cd backend
+    python benchmarks/bench_chat_load.py --sessions 20 --turns 5 --tokens-per-second 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+USER_MESSAGES = [
+    "I have pain in my knee since yesterday",
+    "I am 34 years old",
+    "It started after running",
+    "The pain is moderate, about 5 out of 10",
+    "No swelling, but it hurts on the stairs",
+    "Continue with assessment",
+]
+
+
+def write_stub_mcp_config() -> str:
+    """Write an mcp.json that points every server at the stub MCP server"""
+    stub = os.path.join(BENCHMARK_DIR, "stub_mcp_server.py")
+    config = {
+        "mcpServers": {
+            name: {"command": sys.executable, "args": [stub, name], "enabled": True}
+            for name in ("weather", "calendar")
+        }
+    }
+    fd, path = tempfile.mkstemp(prefix="triage-bench-mcp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(config, f)
+    return path
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        # Peak RSS (KB on Linux, bytes on macOS) where /proc is not available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_turn(client, url: str, session_id: str, model_id: str, message: str, metrics: Dict[str, list]) -> None:
+    """Send one chat turn and record its stream timings"""
+    start = time.perf_counter()
+    first_chunk = None
+    last_chunk = None
+
+    payload = {"message": message, "model_id": model_id, "session_id": session_id}
+    async with client.stream("POST", url, json=payload, headers={"Accept": "text/event-stream"}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            now = time.perf_counter()
+            if first_chunk is None:
+                first_chunk = now
+                metrics["ttfb"].append(now - start)
+            else:
+                metrics["inter_chunk"].append(now - last_chunk)
+            last_chunk = now
+
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            if '"node_changed"' in data:
+                metrics["node_changes"].append(json.loads(data).get("node_id"))
+            elif '"content": "Error: ' in data:
+                metrics["errors"].append(json.loads(data)["content"])
+
+    metrics["turn"].append(time.perf_counter() - start)
+
+
+async def run_session(client, url: str, session_index: int, turns: int, model_id: str, metrics: Dict[str, list]) -> None:
+    session_id = f"bench-{session_index}-{int(time.time() * 1000)}"
+    for turn in range(turns):
+        try:
+            await run_turn(client, url, session_id, model_id, USER_MESSAGES[turn % len(USER_MESSAGES)], metrics)
+        except Exception as e:
+            metrics["errors"].append(str(e))
+
+
+async def drive_load(base_url: str, sessions: int, turns: int, model_id: str) -> Dict[str, list]:
+    import httpx
+
+    metrics = {"ttfb": [], "inter_chunk": [], "turn": [], "node_changes": [], "errors": []}
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        await asyncio.gather(*(
+            run_session(client, f"{base_url}/chat", i, turns, model_id, metrics) for i in range(sessions)
+        ))
+    return metrics
+
+
+def format_ms(values: List[float]) -> str:
+    return (f"p50 {percentile(values, 50) * 1000:8.1f} ms  p95 {percentile(values, 95) * 1000:8.1f} ms  "
+            f"p99 {percentile(values, 99) * 1000:8.1f} ms  max {max(values or [0]) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the triage /chat SSE endpoint with a stubbed model")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="turns per session")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="fake model token rate (0 = unthrottled)")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="tokens per fake answer")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="event-loop lag probe interval in seconds")
+    args = parser.parse_args()
+
+    os.environ["MCP_CONFIG_PATH"] = write_stub_mcp_config()
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    import uvicorn
+    import main as backend
+    from fake_bedrock import FakeBedrockModel
+
+    backend.BedrockModel = lambda model_id, **kwargs: FakeBedrockModel(
+        model_id=model_id,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )
+
+    # Measure how late the server loop wakes up from a short sleep
+    lag_samples: List[float] = []
+
+    async def probe_event_loop_lag():
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(args.lag_interval)
+            lag_samples.append(max(0.0, loop.time() - start - args.lag_interval))
+
+    backend.app.router.on_startup.append(lambda: asyncio.get_running_loop().create_task(probe_event_loop_lag()))
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(backend.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    model_id = backend.AVAILABLE_MODELS[0]["id"]
+
+    try:
+        # Warm up MCP sessions and imports before measuring
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(drive_load(base_url, 1, 1, model_id))
+        lag_samples.clear()
+        rss_before = current_rss_mb()
+
+        # Agents echo streamed text to stdout; keep it out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            metrics = asyncio.run(drive_load(base_url, args.sessions, args.turns, model_id))
+            elapsed = time.perf_counter() - started
+        rss_after = current_rss_mb()
+
+        import httpx
+        server_metrics = httpx.get(f"{base_url}/metrics/event-loop").json()
+    finally:
+        server.should_exit = True
+        server_thread.join(timeout=10)
+        os.unlink(os.environ["MCP_CONFIG_PATH"])
+
+    completed = len(metrics["turn"])
+    print(f"Sessions: {args.sessions}  turns/session: {args.turns}  fake token rate: {args.tokens_per_second}/s")
+    print(f"Completed turns: {completed}  errors: {len(metrics['errors'])}  "
+          f"node changes: {len(metrics['node_changes'])}  wall time: {elapsed:.2f} s  "
+          f"throughput: {completed / elapsed:.1f} turns/s")
+    print(f"Time to first byte:  {format_ms(metrics['ttfb'])}")
+    print(f"Inter-chunk latency: {format_ms(metrics['inter_chunk'])}")
+    print(f"Turn latency:        {format_ms(metrics['turn'])}")
+    print(f"Event-loop lag:      {format_ms(lag_samples)}")
+    server_lag = server_metrics["lag_ms"]
+    print(f"Server-reported lag: p50 {server_lag['p50']:8.1f} ms  p95 {server_lag['p95']:8.1f} ms  "
+          f"p99 {server_lag['p99']:8.1f} ms  max {server_lag['max']:8.1f} ms  (/metrics/event-loop)")
+    print(f"RSS: {rss_before:.1f} MB -> {rss_after:.1f} MB ({rss_after - rss_before:+.1f} MB)")
+    if metrics["errors"]:
+        print(f"First error: {metrics['errors'][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: incremental tag scanner vs. regex over the accumulated response
+
+Simulates a streamed triage answer of ~10k tokens (~4 chars per token) split into
+small deltas, and compares the per-response cost of the previous approach
+(re.search over the whole accumulated text on every delta) with TagStreamScanner.
+
+Usage:
+    cd backend
+    python benchmarks/bench_tag_scanner.py [--tokens 10000] [--delta-chars 4] [--runs 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tag_scanner import TagStreamScanner
+
+DECISION_TREE_PATTERN = re.compile(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>')
+
+TAIL = """
+<decision_tree_status next_node="pain_location" action="Moving to next assessment step" />
+<available_options>
+<option urgency="normal">Head or neck</option>
+<option urgency="normal">Chest or back</option>
+<option urgency="high">Severe pain, call 911</option>
+<option urgency="normal">Other</option>
+</available_options>"""
+
+
+def build_deltas(tokens: int, delta_chars: int):
+    """Build a response of the requested size and split it into stream deltas"""
+    filler = "Please describe **where** the pain is located and how long it has lasted. "
+    body = (filler * (tokens * 4 // len(filler) + 1))[:tokens * 4]
+    response = body + TAIL
+    return [response[i:i + delta_chars] for i in range(0, len(response), delta_chars)]
+
+
+def run_regex(deltas):
+    """Previous approach: re-search the accumulated response on every delta"""
+    accumulated_response = ""
+    next_node = None
+    for delta in deltas:
+        accumulated_response += delta
+        if next_node is None:
+            match = DECISION_TREE_PATTERN.search(accumulated_response)
+            if match:
+                next_node = match.group(1)
+    return next_node
+
+
+def run_scanner(deltas):
+    """New approach: feed each delta to the incremental scanner once"""
+    scanner = TagStreamScanner()
+    next_node = None
+    for delta in deltas:
+        _, events = scanner.feed(delta)
+        for event in events:
+            if event["tag"] == "decision_tree_status" and next_node is None:
+                next_node = event["attributes"].get("next_node")
+    scanner.flush()
+    return next_node
+
+
+def time_it(func, deltas, runs):
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(deltas)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark control tag detection in streamed responses")
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--delta-chars", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    deltas = build_deltas(args.tokens, args.delta_chars)
+    regex_time, regex_node = time_it(run_regex, deltas, args.runs)
+    scanner_time, scanner_node = time_it(run_scanner, deltas, args.runs)
+
+    assert regex_node == scanner_node == "pain_location"
+
+    print(f"Response: {args.tokens} tokens, {len(deltas)} deltas of {args.delta_chars} chars")
+    print(f"regex over accumulated response: {regex_time * 1000:9.2f} ms")
+    print(f"incremental TagStreamScanner:    {scanner_time * 1000:9.2f} ms")
+    print(f"speedup: {regex_time / scanner_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Deterministic stand-in for BedrockModel used by the offline benchmarks
+
+Streams a canned triage answer as Bedrock-style stream events at a configurable
+token rate. The answer ends with the <decision_tree_status> and
+<available_options> tags, choosing the first next node offered in the prompt,
+so sessions walk through the decision tree exactly as with a real model.
+"""
+
+import re
+import asyncio
+import typing
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from pydantic import BaseModel
+from strands.models import Model
+
+NEXT_NODE_PATTERN = re.compile(r'next_node="([^"]+)"')
+AVAILABLE_NODE_PATTERN = re.compile(r'Available next nodes:\s*\n- ([^:\n]+):')
+
+CANNED_ANSWER = (
+    "Thank you for sharing that. **Based on what you described**, I would like to ask a few more "
+    "questions so I can guide you to the right level of care. Please answer as precisely as you can. "
+)
+
+
+class FakeBedrockModel(Model):
+    """Streams canned deltas instead of calling Amazon Bedrock"""
+
+    def __init__(self, model_id: str = "fake", tokens_per_second: float = 200.0,
+                 answer_tokens: int = 120, chars_per_token: int = 4, **kwargs: Any):
+        self.config = {
+            "model_id": model_id,
+            "tokens_per_second": tokens_per_second,
+            "answer_tokens": answer_tokens,
+            "chars_per_token": chars_per_token,
+        }
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def _build_answer(self, prompt: str) -> str:
+        """Canned answer of the configured size followed by the control tags"""
+        # Multi-choice prompts list the candidates; direct prompts name the next node
+        match = AVAILABLE_NODE_PATTERN.search(prompt) or NEXT_NODE_PATTERN.search(prompt)
+        next_node = match.group(1).strip() if match else "start"
+        size = self.config["answer_tokens"] * self.config["chars_per_token"]
+        body = (CANNED_ANSWER * (size // len(CANNED_ANSWER) + 1))[:size]
+        return (
+            f'{body}\n<decision_tree_status next_node="{next_node}" action="Moving to next assessment step" />\n'
+            '<available_options>\n<option urgency="normal">Continue with assessment</option>\n'
+            '<option urgency="normal">Other</option>\n</available_options>'
+        )
+
+    async def stream(self, messages: List[Dict[str, Any]], tool_specs: Optional[List[Any]] = None,
+                     system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        prompt = ""
+        for block in messages[-1].get("content", []) if messages else []:
+            if "text" in block:
+                prompt += block["text"]
+
+        answer = self._build_answer(prompt)
+        step = self.config["chars_per_token"]
+        delay = 1.0 / self.config["tokens_per_second"] if self.config["tokens_per_second"] > 0 else 0
+
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        for i in range(0, len(answer), step):
+            if delay:
+                await asyncio.sleep(delay)
+            yield {"contentBlockDelta": {"delta": {"text": answer[i:i + step]}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": len(prompt) // 4,
+                    "outputTokens": len(answer) // step,
+                    "totalTokens": len(prompt) // 4 + len(answer) // step,
+                },
+                "metrics": {"latencyMs": 0},
+            }
+        }
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {"output": canned_instance(output_model)}
+
+
+def canned_instance(output_model):
+    """Instance of a pydantic model built from field defaults, else a canned value of each field's type"""
+    canned = {str: CANNED_ANSWER.strip(), int: 0, float: 0.0, bool: False, list: [], dict: {}}
+    values = {}
+    for name, field in output_model.model_fields.items():
+        if not field.is_required():
+            continue
+        annotation = typing.get_origin(field.annotation) or field.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            values[name] = canned_instance(annotation)
+        else:
+            values[name] = canned.get(annotation)
+    return output_model(**values)
@@ -0,0 +1,30 @@
+"""
+Stub MCP server for offline benchmarks
+
+Answers instantly without any network access, so benchmark runs measure the
+backend rather than external weather or calendar APIs. The server name passed
+on the command line prefixes the tool names, so several stubs can be loaded
+into one agent without clashing.
+
+Usage:
+    python benchmarks/stub_mcp_server.py <server_name>
+"""
+
+import sys
+from mcp.server.fastmcp import FastMCP
+
+server_name = sys.argv[1] if len(sys.argv) > 1 else "stub"
+mcp = FastMCP(server_name)
+
+@mcp.tool(name=f"{server_name}_lookup", description=f"Look up canned {server_name} information")
+def lookup(query: str) -> str:
+    """Return a fixed answer for any query."""
+    return f"{server_name} result for '{query}': all clear"
+
+@mcp.tool(name=f"{server_name}_status", description=f"Get the canned {server_name} service status")
+def status() -> str:
+    """Return a fixed status."""
+    return f"{server_name} service is available"
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
@@ -0,0 +1,121 @@
+"""
+Fixed-capacity structured log store for the triage backend
+
+Each server gets a ring buffer (collections.deque with maxlen), so appending
+never copies the log list. Records below the configured level are dropped
+before anything is allocated, and timestamps and details are only formatted
+when a record is actually read. Appends rely on deque/itertools operations
+being atomic, so logging from worker threads needs no lock.
+"""
+
+import os
+import asyncio
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+SERVER_LOG_CAPACITY = int(os.environ.get("SERVER_LOG_CAPACITY", "50"))
+SERVER_LOG_LEVEL = os.environ.get("SERVER_LOG_LEVEL", "info")
+
+Details = Union[Dict[str, Any], Callable[[], Dict[str, Any]], None]
+
+
+class LogRecord:
+    """A log entry whose timestamp and details are formatted lazily"""
+
+    __slots__ = ("seq", "created", "server", "level", "message", "_details")
+
+    def __init__(self, seq: int, server: str, level: str, message: str, details: Details):
+        self.seq = seq
+        self.created = time.time()
+        self.server = server
+        self.level = level
+        self.message = message
+        self._details = details
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        if callable(self._details):
+            self._details = self._details()
+        return self._details or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.seq,
+            "timestamp": datetime.fromtimestamp(self.created).isoformat(),
+            "server": self.server,
+            "level": self.level,
+            "message": self.message,
+            "details": self.details
+        }
+
+
+class ServerLogStore:
+    """Per-server ring buffers of log records with change notification for streaming tails"""
+
+    def __init__(self, capacity: int = SERVER_LOG_CAPACITY, min_level: str = SERVER_LOG_LEVEL):
+        self.capacity = capacity
+        self.min_level = LOG_LEVELS.get(min_level, LOG_LEVELS["info"])
+        self._buffers: Dict[str, deque] = {}
+        self._seq = itertools.count(1)
+        self._subscribers: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+
+    def enabled_for(self, level: str) -> bool:
+        """Check whether records of this level are kept"""
+        return LOG_LEVELS.get(level, LOG_LEVELS["info"]) >= self.min_level
+
+    def add(self, server: str, message: str, level: str = "info", details: Details = None) -> Optional[LogRecord]:
+        """Append a record; details may be a dict or a callable evaluated when the record is read"""
+        if not self.enabled_for(level):
+            return None
+
+        buffer = self._buffers.get(server)
+        if buffer is None:
+            buffer = self._buffers.setdefault(server, deque(maxlen=self.capacity))
+
+        # Prevent duplicate consecutive messages (but allow tool executions)
+        if buffer and not message.startswith("Executing ") and buffer[-1].message == message:
+            return None
+
+        record = LogRecord(next(self._seq), server, level, message, details)
+        buffer.append(record)
+        self._notify()
+        return record
+
+    def _notify(self) -> None:
+        """Wake streaming subscribers, which may live on another thread's loop"""
+        for event, loop in list(self._subscribers.items()):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                self._subscribers.pop(event, None)
+
+    def subscribe(self) -> asyncio.Event:
+        """Register an event that is set whenever a record is added"""
+        event = asyncio.Event()
+        self._subscribers[event] = asyncio.get_running_loop()
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        self._subscribers.pop(event, None)
+
+    def since(self, seq: int, server: Optional[str] = None, min_level: str = "debug") -> List[LogRecord]:
+        """Records newer than seq, oldest first"""
+        threshold = LOG_LEVELS.get(min_level, LOG_LEVELS["debug"])
+        buffers = [self._buffers.get(server, ())] if server else list(self._buffers.values())
+        records = [
+            record for buffer in buffers for record in list(buffer)
+            if record.seq > seq and LOG_LEVELS.get(record.level, 0) >= threshold
+        ]
+        records.sort(key=lambda record: record.seq)
+        return records
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """All buffered records, formatted, grouped by server"""
+        return {server: [record.to_dict() for record in list(buffer)] for server, buffer in list(self._buffers.items())}
+
+    def clear(self) -> None:
+        self._buffers.clear()
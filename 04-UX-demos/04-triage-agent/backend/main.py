@@ -23,71 +23,190 @@ import logging
 import asyncio
 import time
 import uuid
+import threading
+import re
+import hashlib
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from dataclasses import dataclass, asdict, field
-import re
 
 # Strands imports
 from strands import Agent
 from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
+from strands.tools.registry import ToolRegistry
 from mcp import StdioServerParameters, stdio_client
-from mcpmanager import mcp_manager
+from mcpmanager import mcp_manager, MCP_CONFIG_PATH
+from tag_scanner import TagStreamScanner
+from session_store import SessionStore, create_spill_store
+from log_store import ServerLogStore, Details, LOG_LEVELS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store server logs
-server_logs: Dict[str, List[str]] = {}
+# Store server logs (fixed-size ring buffer per server)
+server_log_store = ServerLogStore()
 mcp_servers = {}  # Initialize early to avoid loading issues
 mcp_clients = {}  # Store MCP client instances
 
-def add_server_log(server_name: str, message: str, level: str = "info", details: Dict = None):
-    """Add a structured log entry for a server"""
-    timestamp = datetime.now().isoformat()
-    
-    # Create structured log entry
-    log_entry = {
-        "timestamp": timestamp,
-        "server": server_name,
-        "level": level,
-        "message": message,
-        "details": details or {}
-    }
-    
-    if server_name not in server_logs:
-        server_logs[server_name] = []
-    
-    # Prevent duplicate consecutive messages (but allow tool executions)
-    if server_logs[server_name] and not message.startswith("Executing "):
-        last_log = server_logs[server_name][-1]
-        if isinstance(last_log, dict) and last_log.get("message") == message:
-            return  # Skip duplicate message
+def add_server_log(server_name: str, message: str, level: str = "info", details: Details = None):
+    """Add a structured log entry for a server
+
+    details may be a dict or a zero-argument callable; a callable is only evaluated
+    when the entry is read, so hot paths avoid building dicts nobody looks at.
+    """
+    server_log_store.add(server_name, message, level, details)
+
+# Shared on-disk store for evicted sessions (None unless SESSION_SPILL_PATH is set)
+session_spill_store = create_spill_store()
+
+# Global agent cache - session-based, bounded LRU/TTL with lazy rehydration
+session_agents = SessionStore(
+    "agents",
+    spill=session_spill_store,
+    dump=lambda agent: agent.messages,
+    load=lambda agent_key, messages: rehydrate_session_agent(agent_key, messages)
+)
+
+# Execution model: blocking agent and MCP work runs on a bounded thread pool so the
+# event loop keeps serving every other streaming session
+BLOCKING_WORKERS = int(os.environ.get("TRIAGE_BLOCKING_WORKERS", "16"))
+BLOCKING_CALL_TIMEOUT = float(os.environ.get("TRIAGE_BLOCKING_CALL_TIMEOUT", "60"))
+AGENT_CALL_TIMEOUT = float(os.environ.get("TRIAGE_AGENT_CALL_TIMEOUT", "300"))
+MAX_CONCURRENT_TURNS = int(os.environ.get("TRIAGE_MAX_CONCURRENT_TURNS", "64"))
+TURN_QUEUE_TIMEOUT = float(os.environ.get("TRIAGE_TURN_QUEUE_TIMEOUT", "10"))
+
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="triage-blocking")
+chat_turn_slots = asyncio.Semaphore(MAX_CONCURRENT_TURNS)
+active_turns = 0
+
+# Event-loop lag samples (ms), filled by monitor_event_loop_lag
+EVENT_LOOP_LAG_INTERVAL = 0.05
+event_loop_lag_ms = deque(maxlen=1200)
+event_loop_monitor_task = None
+
+async def run_blocking(func, *args, timeout: float = BLOCKING_CALL_TIMEOUT, **kwargs):
+    """Run a blocking call on the bounded thread pool with a timeout"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs)),
+        timeout
+    )
+
+async def stream_with_deadline(stream, timeout: float):
+    """Yield the events of an async stream, raising TimeoutError once timeout seconds have passed
+
+    One task consumes the stream, so context variables such as tracing spans stay the
+    same across events, and every wait for the next event is bounded by the deadline,
+    so a stream that stalls between events times out as well.
+    """
+    queue = asyncio.Queue(maxsize=1)
+    finished = object()
+
+    async def pump():
+        try:
+            async for event in stream:
+                await queue.put((event, None))
+            await queue.put((finished, None))
+        except Exception as error:
+            await queue.put((finished, error))
+
+    pump_task = asyncio.create_task(pump())
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            event, error = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0))
+            if event is finished:
+                if error is not None:
+                    raise error
+                return
+            yield event
+    finally:
+        pump_task.cancel()
+        await asyncio.gather(pump_task, return_exceptions=True)
+
+@asynccontextmanager
+async def mcp_active_context():
+    """Borrow warm MCP sessions without blocking the event loop on server start-up"""
+    loop = asyncio.get_running_loop()
+    acquire = loop.run_in_executor(blocking_executor, mcp_manager.acquire_active_sessions)
+    try:
+        contexts = await asyncio.wait_for(asyncio.shield(acquire), BLOCKING_CALL_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        # The acquire keeps running on its thread; give back whatever it borrows
+        def release_when_done(future):
+            if not future.cancelled() and future.exception() is None:
+                mcp_manager.release_sessions(future.result())
+        acquire.add_done_callback(release_when_done)
+        raise
+    try:
+        yield contexts
+    finally:
+        mcp_manager.release_sessions(contexts)
+
+async def with_chat_turn_slot(stream, busy_chunk: str):
+    """Run a response stream under the concurrent turn limit (backpressure)"""
+    global active_turns
     
-    server_logs[server_name].append(log_entry)
+    try:
+        await asyncio.wait_for(chat_turn_slots.acquire(), TURN_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        add_server_log("system", f"Chat turn rejected: {MAX_CONCURRENT_TURNS} turns already running", level="warning")
+        yield busy_chunk
+        return
     
-    # Keep only last 50 logs per server
-    if len(server_logs[server_name]) > 50:
-        server_logs[server_name] = server_logs[server_name][-50:]
-
-# Global agent cache - session-based
-session_agents = {}
+    active_turns += 1
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        active_turns -= 1
+        chat_turn_slots.release()
+        await stream.aclose()
+
+async def monitor_event_loop_lag():
+    """Record how late the event loop wakes up from a short sleep"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL)
+        event_loop_lag_ms.append(max(0.0, (loop.time() - start - EVENT_LOOP_LAG_INTERVAL) * 1000))
 
 # Global tools cache
 cached_tools = []
 tools_last_updated = None
 
+@dataclass
+class AgentPrototype:
+    """Model client and tool registry shared by every session agent of one model"""
+    model: Any
+    tool_registry: Any
+    created_at: float = field(default_factory=time.time)
+
+# model_id -> prototype; rebuilt whenever the tools cache is refreshed
+agent_prototypes: Dict[str, AgentPrototype] = {}
+agent_prototypes_lock = threading.Lock()
+
 # Session token tracking
 session_token_usage = {}  # session_id -> {"total_input": int, "total_output": int}
 
 # Global decision tree instance
 decision_tree = None
+DECISION_TREE_FILE = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
+
+# Remove <decision_tree_status> / <available_options> tags from streamed content.
+# Off by default because the frontend parses the options block out of the content.
+STRIP_CONTROL_TAGS = os.environ.get("TRIAGE_STRIP_CONTROL_TAGS", "false").lower() == "true"
 
 # --- Start of Inlined Decision Tree Logic ---
 
@@ -129,14 +248,36 @@ class ConversationState:
     last_updated: datetime = field(default_factory=datetime.now)
     last_user_input: str = ""
 
+def conversation_to_dict(state: ConversationState) -> Dict[str, Any]:
+    """Serialize a conversation state for the session spill store"""
+    data = asdict(state)
+    data["created_at"] = state.created_at.isoformat()
+    data["last_updated"] = state.last_updated.isoformat()
+    return data
+
+def conversation_from_dict(session_id: str, data: Dict[str, Any]) -> ConversationState:
+    """Rebuild a conversation state from the session spill store"""
+    data = dict(data)
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    data["last_updated"] = datetime.fromisoformat(data["last_updated"])
+    return ConversationState(**data)
+
+KEYWORD_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
 class DecisionTree:
     """Manages the decision tree logic and conversation states, self-contained within main.py."""
     
     def __init__(self, data_file: str):
         self.nodes: Dict[str, DecisionNode] = {}
-        self.conversations: Dict[str, ConversationState] = {}
+        self.conversations = SessionStore(
+            "conversations",
+            spill=session_spill_store,
+            dump=conversation_to_dict,
+            load=conversation_from_dict
+        )
         self.data_file = data_file
         self.load_data()
+        self.compile()
     
     def load_data(self):
         """Load decision tree data from JSON file"""
@@ -152,6 +293,96 @@ class DecisionTree:
             logger.error(f"Failed to load decision tree data: {e}")
             raise
 
+    def compile(self):
+        """Validate the loaded tree and precompute read-only routing indexes and API payloads"""
+        if "start" not in self.nodes:
+            raise ValueError("Decision tree has no 'start' node")
+        
+        # Dangling children are tolerated (the LLM may still be routed there) but reported
+        parents: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        dangling = set()
+        for node_id, node in self.nodes.items():
+            for child_id in node.children:
+                if child_id in parents:
+                    parents[child_id].append(node_id)
+                else:
+                    dangling.add(child_id)
+        if dangling:
+            logger.warning(f"Decision tree references {len(dangling)} undefined child nodes")
+        
+        # Breadth-first depth from the entry point
+        depths = {"start": 0}
+        queue = ["start"]
+        for node_id in queue:
+            for child_id in self.nodes[node_id].children:
+                if child_id in self.nodes and child_id not in depths:
+                    depths[child_id] = depths[node_id] + 1
+                    queue.append(child_id)
+        unreachable = [node_id for node_id in self.nodes if node_id not in depths]
+        if unreachable:
+            logger.warning(f"Decision tree nodes unreachable from start: {unreachable}")
+        
+        # Keyword -> child index for nodes whose response options map one-to-one to children.
+        # The earliest option wins, as in the original option-by-option scan.
+        keyword_index = {}
+        for node_id, node in self.nodes.items():
+            if len(node.children) > 1 and len(node.children) == len(node.response_options):
+                token_map: Dict[str, int] = {}
+                for i, option in enumerate(node.response_options):
+                    for token in KEYWORD_TOKEN_PATTERN.findall(option.lower()):
+                        token_map.setdefault(token, i)
+                keyword_index[node_id] = MappingProxyType(token_map)
+        
+        self.nodes = MappingProxyType(self.nodes)
+        self.parents = MappingProxyType({node_id: tuple(ids) for node_id, ids in parents.items()})
+        self.children = MappingProxyType({node_id: tuple(node.children) for node_id, node in self.nodes.items()})
+        self.depths = MappingProxyType(depths)
+        self.keyword_index = MappingProxyType(keyword_index)
+        
+        # Pre-serialized payloads for the visualization and status APIs
+        tree_data = {
+            node_id: {
+                "id": node.id,
+                "topic": node.topic,
+                "question": node.question,
+                "ui_display": node.ui_display,
+                "response_options": node.response_options,
+                "children": node.children,
+                "is_terminal": node.is_terminal,
+                "outcome": node.outcome
+            }
+            for node_id, node in self.nodes.items()
+        }
+        self.tree_json = json.dumps({
+            "nodes": tree_data,
+            "total_nodes": len(tree_data),
+            "entry_point": "start"
+        }).encode("utf-8")
+        self.tree_etag = f'"{hashlib.sha256(self.tree_json).hexdigest()[:32]}"'
+        self.status_tree = {
+            "nodes": {
+                node_id: {key: data[key] for key in ("id", "topic", "question", "children", "is_terminal", "outcome")}
+                for node_id, data in tree_data.items()
+            }
+        }
+        
+        logger.info(f"Compiled decision tree: max depth {max(depths.values())}, {len(keyword_index)} keyword-routed nodes")
+
+    def route_by_keywords(self, node_id: str, user_message: str) -> Optional[str]:
+        """Return the child whose response option shares a keyword with the message, in O(message length)"""
+        token_map = self.keyword_index.get(node_id)
+        if not token_map:
+            return None
+        
+        best = None
+        for token in KEYWORD_TOKEN_PATTERN.findall(user_message.lower()):
+            option_index = token_map.get(token)
+            if option_index is not None and (best is None or option_index < best):
+                best = option_index
+                if best == 0:
+                    break
+        return self.nodes[node_id].children[best] if best is not None else None
+
     def start_session(self, session_id: str, chat_mode: bool = False) -> None:
         """Start a new decision tree session."""
         if session_id in self.conversations:
@@ -171,11 +402,10 @@ class DecisionTree:
             self.conversations[session_id].current_node_id = node_id
             self.conversations[session_id].last_updated = datetime.now()
             logger.info(f"Session {session_id} current node manually set to {node_id}")
-            add_server_log("triage", f"NODE TRANSITION: {session_id} - {old_node} -> {node_id}", level="info", details={
+            add_server_log("triage", f"NODE TRANSITION: {session_id} - {old_node} -> {node_id}", level="info", details=lambda: {
                 "session_id": session_id,
                 "old_node": old_node,
-                "new_node": node_id,
-                "timestamp": datetime.now().isoformat()
+                "new_node": node_id
             })
             return True
         logger.warning(f"Failed to set node for session {session_id} to {node_id}. Session or node not found.")
@@ -189,12 +419,12 @@ class DecisionTree:
 
 # --- End of Inlined Decision Tree Logic ---
 
-def refresh_tools_cache():
-    """Refresh the global tools cache"""
+def refresh_tools_cache(refresh: bool = True):
+    """Refresh the global tools cache; with refresh=False only servers without cached tools are listed"""
     global cached_tools, tools_last_updated
     
     try:
-        cached_tools = mcp_manager.get_all_tools(active_only=True)
+        cached_tools = mcp_manager.get_all_tools(active_only=True, refresh=refresh)
         tools_last_updated = datetime.now()
         add_server_log("system", f"Tools cache refreshed: {len(cached_tools)} tools loaded", level="info", details={"tool_count": len(cached_tools)})
     except Exception as e:
@@ -206,7 +436,7 @@ def get_cached_tools():
     global cached_tools
     
     if not cached_tools:
-        refresh_tools_cache()
+        refresh_tools_cache(refresh=False)
     
     return cached_tools
 
@@ -215,18 +445,9 @@ mcp_manager.initialize_default_clients()
 add_server_log("system", f"MCP Manager initialized with clients: {mcp_manager.get_active_clients()}", level="info", details={"active_clients": mcp_manager.get_active_clients()})
 
 # Pre-load tools cache
-refresh_tools_cache()
+refresh_tools_cache(refresh=False)
 
-def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
-    """Get or create a cached agent for the given session and model"""
-    agent_key = f"{session_id}:{model_id}"
-    
-    if agent_key not in session_agents:
-        model = BedrockModel(model_id=model_id, temperature=0.7)
-        tools = get_cached_tools()
-        
-        # General purpose prompt. Specific instructions will be provided in each call.
-        system_prompt = """You are a helpful and empathetic AI Triage Assistant.
+SESSION_SYSTEM_PROMPT = """You are a helpful and empathetic AI Triage Assistant.
 Your goal is to guide users through a structured assessment.
 You must follow the specific instructions given in each prompt precisely.
 Always provide your response in a clear, conversational, and professional manner.
@@ -238,22 +459,68 @@ FORMATTING GUIDELINES:
 - Highlight urgent situations with appropriate emphasis
 - Make important medical advice stand out visually
 """
-        
-        agent = Agent(model=model, system_prompt=system_prompt, tools=tools)
+
+def build_tool_registry() -> ToolRegistry:
+    """A new tool registry holding the currently cached tools"""
+    tool_registry = ToolRegistry()
+    tool_registry.process_tools(get_cached_tools())
+    return tool_registry
+
+def get_agent_prototype(model_id: str) -> AgentPrototype:
+    """Get the shared model client and tool registry for a model, building them once"""
+    prototype = agent_prototypes.get(model_id)
+    if prototype is not None:
+        return prototype
+    
+    with agent_prototypes_lock:
+        prototype = agent_prototypes.get(model_id)
+        if prototype is None:
+            model = BedrockModel(model_id=model_id, temperature=0.7)
+            prototype = AgentPrototype(model=model, tool_registry=build_tool_registry())
+            agent_prototypes[model_id] = prototype
+            add_server_log("system", f"Agent prototype built for {model_id}",
+                           details=lambda: {"tools": len(prototype.tool_registry.registry)})
+    return prototype
+
+def build_session_agent(model_id: str, messages: Optional[List[Dict]] = None) -> Agent:
+    """Build a session agent on the model's prototype, optionally restoring an earlier message history
+    
+    The model client and tool registry are shared; each session only gets its
+    own message history and per-invocation state.
+    """
+    prototype = get_agent_prototype(model_id)
+    
+    # General purpose prompt. Specific instructions will be provided in each call.
+    agent = Agent(model=prototype.model, system_prompt=SESSION_SYSTEM_PROMPT, messages=messages)
+    agent.tool_registry = prototype.tool_registry
+    return agent
+
+def rehydrate_session_agent(agent_key: str, messages: List[Dict]) -> Agent:
+    """Rebuild an evicted session agent from its spilled message history"""
+    _, model_id = agent_key.split(":", 1)
+    add_server_log("system", f"Session agent rehydrated for {agent_key}", details={"messages": len(messages)})
+    return build_session_agent(model_id, messages=messages)
+
+def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
+    """Get or create a cached agent for the given session and model"""
+    agent_key = f"{session_id}:{model_id}"
+    
+    agent = session_agents.get(agent_key)
+    if agent is None:
+        agent = build_session_agent(model_id)
         session_agents[agent_key] = agent
         add_server_log("system", f"Session agent cached for {session_id}:{model_id}")
     
-    return session_agents[agent_key]
+    return agent
 
 def get_session_messages_for_ui(session_id: str, model_id: str) -> List[Dict]:
     """Get session messages formatted for UI from the actual agent"""
     agent_key = f"{session_id}:{model_id}"
     
-    if agent_key not in session_agents:
+    agent = session_agents.get(agent_key)
+    if agent is None:
         return []
     
-    agent = session_agents[agent_key]
-    
     # Get messages from agent.messages
     if not hasattr(agent, 'messages') or not agent.messages:
         return []
@@ -308,10 +575,46 @@ def refresh_agents():
     # Refresh tools cache first
     refresh_tools_cache()
     
-    # Clear agent cache so they get recreated with new tools
+    # Clear prototypes and agents so they get recreated with new tools
+    with agent_prototypes_lock:
+        agent_prototypes.clear()
     session_agents.clear()
     add_server_log("system", "Tools and agent cache refreshed - agents will recreate with new tools", level="info", details={"cleared_sessions": len(session_agents)})
 
+def apply_server_toggle(server_name: str, enabled: bool):
+    """Re-list only the toggled server and swap new tool registries into the prototypes and cached agents
+    
+    Registries may be in use by running turns, so they are replaced rather than
+    edited in place; a turn never sees a registry that is halfway through an update.
+    """
+    if enabled:
+        server_tools = mcp_manager.list_server_tools(server_name, refresh=True)
+    else:
+        server_tools = mcp_manager.get_cached_tools(server_name)
+    
+    # Every other server is served from the per-server tool cache
+    refresh_tools_cache(refresh=False)
+    
+    tool_names = [tool.tool_name for tool in server_tools]
+    
+    # Session agents share their model's prototype registry, so build one replacement per registry
+    replacements = {}
+    with agent_prototypes_lock:
+        for model_id, prototype in list(agent_prototypes.items()):
+            tool_registry = build_tool_registry()
+            replacements[id(prototype.tool_registry)] = tool_registry
+            agent_prototypes[model_id] = AgentPrototype(model=prototype.model, tool_registry=tool_registry)
+    for _, agent in session_agents.items():
+        tool_registry = replacements.get(id(agent.tool_registry))
+        if tool_registry is None:
+            tool_registry = replacements[id(agent.tool_registry)] = build_tool_registry()
+        agent.tool_registry = tool_registry
+    updated = len(replacements)
+    
+    action = "added to" if enabled else "removed from"
+    add_server_log("system", f"{len(tool_names)} {server_name} tools {action} {updated} agent tool registries", level="info",
+                   details={"server": server_name, "tools": tool_names, "registries_replaced": updated})
+
 def load_mcp_config():
     """Load MCP configuration from mcp.json file"""
     global mcp_servers
@@ -319,8 +622,7 @@ def load_mcp_config():
         return mcp_servers
         
     try:
-        config_path = os.path.join(os.path.dirname(__file__), 'mcp.json')
-        with open(config_path, 'r') as f:
+        with open(MCP_CONFIG_PATH, 'r') as f:
             config = json.load(f)
             
         # Transform config to our internal format
@@ -351,10 +653,8 @@ def load_mcp_config():
 def save_mcp_config(servers_config):
     """Save MCP configuration to mcp.json file"""
     try:
-        config_path = os.path.join(os.path.dirname(__file__), 'mcp.json')
-        
         # Load existing config
-        with open(config_path, 'r') as f:
+        with open(MCP_CONFIG_PATH, 'r') as f:
             config = json.load(f)
         
         # Get the correct servers key
@@ -366,7 +666,7 @@ def save_mcp_config(servers_config):
                 config[servers_key][server_name]['enabled'] = server_info.get('enabled', True)
         
         # Save updated config
-        with open(config_path, 'w') as f:
+        with open(MCP_CONFIG_PATH, 'w') as f:
             json.dump(config, f, indent=2)
             
         add_server_log("system", "Configuration saved")
@@ -640,7 +940,18 @@ async def stream_plain_text_response_generator(text: str, model_id: str, tokens:
     yield f"data: {json.dumps(stop_chunk)}\n\n"
 
 async def stream_ai_response_with_images(message: str, model_id: str, session_id: str = "default", images: List[ImageData] = None, history: List[Dict[str, Any]] = None):
-    """Complete streaming with decision tree, XML processing, and node updates"""
+    """Complete streaming with decision tree, XML processing, and node updates
+    
+    The session's agent and conversation state are pinned for the whole turn,
+    so the session stores can't evict (and spill a stale snapshot of) them
+    while the turn is still changing them.
+    """
+    with session_agents.pinned(f"{session_id}:{model_id}"), decision_tree.conversations.pinned(session_id):
+        async for chunk in stream_triage_turn(message, model_id, session_id, images, history):
+            yield chunk
+
+async def stream_triage_turn(message: str, model_id: str, session_id: str, images: List[ImageData] = None, history: List[Dict[str, Any]] = None):
+    """Run one triage turn: decision tree routing, agent streaming and XML processing"""
     global decision_tree
     
     try:
@@ -649,10 +960,9 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
         # Ensure session exists
         if session_id not in decision_tree.conversations:
             decision_tree.start_session(session_id, chat_mode=True)
-            add_server_log("triage", f"NEW SESSION STARTED: {session_id}", level="info", details={
+            add_server_log("triage", f"NEW SESSION STARTED: {session_id}", level="info", details=lambda: {
                 "session_id": session_id,
-                "initial_node": "start",
-                "timestamp": datetime.now().isoformat()
+                "initial_node": "start"
             })
             # Send initial UI reload signal for left sidebar
             yield f"data: {json.dumps({'type': 'session_started', 'session_id': session_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
@@ -661,7 +971,7 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
         state = decision_tree.conversations[session_id]
         current_node = decision_tree.nodes[state.current_node_id]
         
-        add_server_log("triage", f"PROCESSING MESSAGE: {session_id} at node {current_node.id}", level="info", details={
+        add_server_log("triage", f"PROCESSING MESSAGE: {session_id} at node {current_node.id}", level="info", details=lambda: {
             "session_id": session_id,
             "current_node": current_node.id,
             "current_topic": current_node.topic,
@@ -670,21 +980,24 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
             "should_reason": current_node.should_reason
         })
         
-        add_server_log("triage", f"GETTING MCP CONTEXT: {session_id}", level="info", details={
+        active_clients = mcp_manager.get_active_clients()
+        add_server_log("triage", f"GETTING MCP CONTEXT: {session_id}", level="info", details=lambda: {
             "session_id": session_id,
-            "active_clients": mcp_manager.get_active_clients() if hasattr(mcp_manager, 'get_active_clients') else []
+            "active_clients": active_clients
         })
         
-        with mcp_manager.get_active_context():
+        async with mcp_active_context():
             add_server_log("triage", f"MCP CONTEXT ACQUIRED: {session_id}", level="info")
             
-            agent = get_or_create_session_agent(session_id, model_id)
+            agent = await run_blocking(get_or_create_session_agent, session_id, model_id)
             
-            add_server_log("triage", f"AGENT ACQUIRED: {session_id}", level="info", details={
+            agent_type = type(agent).__name__
+            agent_tools_count = len(agent.tools) if hasattr(agent, 'tools') else 0
+            add_server_log("triage", f"AGENT ACQUIRED: {session_id}", level="info", details=lambda: {
                 "session_id": session_id,
-                "agent_type": type(agent).__name__,
-                "has_tools": hasattr(agent, 'tools'),
-                "tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0
+                "agent_type": agent_type,
+                "has_tools": agent_tools_count > 0,
+                "tools_count": agent_tools_count
             })
             
             # Dynamic next node selection based on decision tree structure
@@ -702,12 +1015,10 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
                         # Single child - go to that child
                         return current_node.children[0]
                     elif len(current_node.children) == len(current_node.response_options):
-                        # Each response option maps to a child
-                        for i, option in enumerate(current_node.response_options):
-                            if any(keyword.lower() in user_message.lower() for keyword in option.lower().split()):
-                                return current_node.children[i]
+                        # Each response option maps to a child (precomputed keyword index)
+                        matched_child = decision_tree.route_by_keywords(current_node.id, user_message)
                         # Default to first child if no match
-                        return current_node.children[0]
+                        return matched_child or current_node.children[0]
                     else:
                         # Complex routing - let AI decide based on reasoning
                         children_info = []
@@ -818,50 +1129,57 @@ IMPORTANT FORMATTING RULES:
 Respond with guidance followed by EXACTLY this XML format:
 <decision_tree_status next_node="{next_node_candidate}" action="Moving to next assessment step" />{available_options_xml}"""
             
-            accumulated_response = ""
-            
-            add_server_log("triage", f"STARTING LLM STREAM: {session_id}", level="info", details={
+            prompt_length = len(unified_prompt)
+            add_server_log("triage", f"STARTING LLM STREAM: {session_id}", level="info", details=lambda: {
                 "session_id": session_id,
-                "prompt_length": len(unified_prompt),
-                "agent_tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0,
+                "prompt_length": prompt_length,
+                "agent_tools_count": agent_tools_count,
                 "next_node_candidate": str(next_node_candidate)
             })
             
-            # Simplified Strands streaming - process events as they come
+            # Scan each delta once for control tags instead of re-searching the whole response
             xml_processed = False
-            xml_buffer = ""  # Buffer to handle XML tags split across chunks
+            tag_scanner = TagStreamScanner()
             try:
-                async for event in agent.stream_async(unified_prompt):
+                async for event in stream_with_deadline(agent.stream_async(unified_prompt), AGENT_CALL_TIMEOUT):
                     if "data" in event:
                         text_data = event["data"]
-                        accumulated_response += text_data
+                        visible_text, tag_events = tag_scanner.feed(text_data)
 
-                        # Add to XML buffer for processing
-                        xml_buffer += text_data
-
-                        # Check for XML in accumulated response for node transitions
-                        if not xml_processed:
-                            decision_tree_match = re.search(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>', accumulated_response)
-                            if decision_tree_match:
+                        for tag_event in tag_events:
+                            if tag_event["tag"] == "decision_tree_status" and not xml_processed:
+                                next_node_id = tag_event["attributes"].get("next_node")
+                                if not next_node_id:
+                                    continue
                                 xml_processed = True
-                                next_node_id = decision_tree_match.group(1)
 
                                 add_server_log("triage", f"XML DETECTED: {session_id} -> {next_node_id}", level="info")
 
                                 if next_node_id in decision_tree.nodes:
                                     decision_tree.set_current_node(session_id, next_node_id)
                                     yield f"data: {json.dumps({'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
+                            elif tag_event["tag"] == "available_options":
+                                yield f"data: {json.dumps({'type': 'options', 'options': tag_event['options']})}\n\n"
 
-                        # Send all text - let frontend handle filtering
-                        if text_data.strip():
-                            yield f"data: {json.dumps({'type': 'content', 'content': text_data})}\n\n"
+                        # Send raw text unless control tags are stripped server-side
+                        content = visible_text if STRIP_CONTROL_TAGS else text_data
+                        if content.strip():
+                            yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
 
                     elif "current_tool_use" in event and event["current_tool_use"].get("name"):
                         tool_name = event["current_tool_use"]["name"]
                         yield f"data: {json.dumps({'type': 'tool_use', 'tool_name': tool_name})}\n\n"
 
+                # Release text held back for an unterminated tag
+                remainder = tag_scanner.flush()
+                if STRIP_CONTROL_TAGS and remainder.strip():
+                    yield f"data: {json.dumps({'type': 'content', 'content': remainder})}\n\n"
+
                 add_server_log("triage", f"STREAM COMPLETE: {session_id}", level="info")
 
+            except TimeoutError:
+                add_server_log("triage", f"LLM STREAM TIMEOUT: {session_id} after {AGENT_CALL_TIMEOUT}s", level="error")
+                yield f"data: {json.dumps({'type': 'content', 'content': 'Error: the response timed out'})}\n\n"
             except Exception as llm_error:
                 add_server_log("triage", f"LLM STREAM ERROR: {session_id} - {str(llm_error)}", level="error")
                 yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(llm_error)}'})}\n\n"
@@ -878,24 +1196,23 @@ async def stream_plain_response(message: str, model_id: str):
     add_server_log("system", f"Starting plain text streaming for: {message[:50]}...")
     
     try:
-        # Create simple Strands agent
-        model = BedrockModel(
-            model_id=model_id,
-            temperature=0.7
-        )
+        # Reuse the model's shared client; building it creates a boto3 client, so keep it off the event loop
+        prototype = await run_blocking(get_agent_prototype, model_id)
+        model = prototype.model
         
         # Get tools from MCP manager
-        tools = mcp_manager.get_all_tools(active_only=True)
+        tools = await run_blocking(mcp_manager.get_all_tools, active_only=True)
         
-        agent = Agent(
+        agent = await run_blocking(
+            Agent,
             model=model,
             system_prompt="You are a helpful AI assistant. Use available tools when needed to answer user questions.",
             tools=tools
         )
         
-        with mcp_manager.get_active_context():
-            # Execute agent and get response
-            response = agent(message)
+        async with mcp_active_context():
+            # Execute agent and get response without blocking the event loop
+            response = await asyncio.wait_for(agent.invoke_async(message), AGENT_CALL_TIMEOUT)
             response_text = str(response)
             
             # Stream response in chunks
@@ -949,25 +1266,63 @@ async def toggle_mcp_server(server_name: str, request: ToggleRequest):
     mcp_servers[server_name]["status"] = "ready" if enabled else "disabled"
     
     # Save to configuration file
-    save_mcp_config(mcp_servers)
+    await run_blocking(save_mcp_config, mcp_servers)
     
-    # Update MCP client active state and refresh agent cache
-    mcp_manager.set_client_active(server_name, enabled)
-    refresh_agents()
+    # Update MCP client active state and re-list only this server's tools
+    await run_blocking(mcp_manager.set_client_active, server_name, enabled)
+    await run_blocking(apply_server_toggle, server_name, enabled)
     
     action = "enabled" if enabled else "disabled"
     add_server_log(server_name, f"Server {action}")
     
     return {"success": True, "server": server_name, "enabled": enabled}
 
+@app.get("/mcp/pool")
+async def get_mcp_pool_status():
+    """Get the state of the warm MCP session pool"""
+    return {
+        "sessions": mcp_manager.get_pool_status(),
+        "tool_cache": mcp_manager.get_tool_cache_status(),
+        "tools_version": mcp_manager.tools_version,
+        "idle_timeout": mcp_manager.idle_timeout,
+        "health_check_interval": mcp_manager.health_check_interval
+    }
+
 @app.get("/mcp/logs")
 async def get_mcp_logs():
-    return server_logs
+    return server_log_store.snapshot()
+
+@app.get("/mcp/logs/stream")
+async def stream_mcp_logs(request: Request, server: Optional[str] = None, level: str = "debug", since: int = 0):
+    """Tail server logs as Server-Sent Events instead of polling /mcp/logs"""
+    if level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown log level: {level}")
+    
+    async def log_event_stream():
+        last_seq = since
+        log_event = server_log_store.subscribe()
+        try:
+            while not await request.is_disconnected():
+                log_event.clear()
+                for record in server_log_store.since(last_seq, server, level):
+                    last_seq = record.seq
+                    yield f"id: {record.seq}\ndata: {json.dumps(record.to_dict())}\n\n"
+                try:
+                    await asyncio.wait_for(log_event.wait(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            server_log_store.unsubscribe(log_event)
+    
+    return StreamingResponse(
+        log_event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.delete("/mcp/logs")
 async def clear_mcp_logs():
-    global server_logs
-    server_logs.clear()
+    server_log_store.clear()
     add_server_log("system", "Logs cleared")
     return {"message": "Logs cleared"}
 
@@ -975,9 +1330,9 @@ async def clear_mcp_logs():
 async def initialize_mcp():
     """Initialize all MCP servers"""
     try:
-        initialize_mcp_servers()
-        mcp_manager.initialize_default_clients()
-        refresh_agents()  # This will refresh tools cache and clear agents
+        await run_blocking(initialize_mcp_servers)
+        await run_blocking(mcp_manager.initialize_default_clients)
+        await run_blocking(refresh_agents)  # This will refresh tools cache and clear agents
         return {"message": "MCP servers initialized", "status": "success"}
     except Exception as e:
         add_server_log("system", f"Initialization error: {str(e)}")
@@ -987,7 +1342,7 @@ async def initialize_mcp():
 async def get_mcp_tools_endpoint():
     """Get all available MCP tools from cache"""
     try:
-        tools = get_cached_tools()
+        tools = await run_blocking(get_cached_tools)
         tool_info = []
         
         for tool in tools:
@@ -1007,6 +1362,28 @@ async def get_mcp_tools_endpoint():
     except Exception as e:
         return {"error": str(e), "tools": [], "count": 0}
 
+@app.get("/metrics/event-loop")
+async def get_event_loop_metrics():
+    """Event-loop lag and blocking work pool metrics"""
+    samples = sorted(event_loop_lag_ms)
+    
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 2) if samples else 0.0
+    
+    return {
+        "lag_ms": {
+            "samples": len(samples),
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(samples[-1], 2) if samples else 0.0
+        },
+        "probe_interval_ms": EVENT_LOOP_LAG_INTERVAL * 1000,
+        "blocking_workers": BLOCKING_WORKERS,
+        "active_turns": active_turns,
+        "max_concurrent_turns": MAX_CONCURRENT_TURNS
+    }
+
 @app.get("/agents/status")
 async def get_agents_status():
     """Get cached session agents status"""
@@ -1022,13 +1399,16 @@ async def get_agents_status():
     
     return {
         "session_agents": agents_info,
-        "count": len(session_agents)
+        "count": len(agents_info),
+        "store": session_agents.stats(),
+        "prototypes": list(agent_prototypes.keys()),
+        "conversation_store": decision_tree.conversations.stats() if decision_tree else None
     }
 
 @app.post("/agents/refresh")
 async def refresh_agents_endpoint():
     """Refresh all cached agents"""
-    refresh_agents()
+    await run_blocking(refresh_agents)
     return {"message": "Agent cache refreshed", "status": "success"}
 
 @app.delete("/sessions/{session_id}")
@@ -1037,8 +1417,8 @@ async def clear_session(session_id: str):
     global session_agents, decision_tree
     
     # Remove all agents for this session
-    keys_to_remove = [key for key in session_agents.keys() if key.startswith(f"{session_id}:")]
-    for key in keys_to_remove:
+    keys_to_remove = [key for key in session_agents.keys() + session_agents.spilled_keys() if key.startswith(f"{session_id}:")]
+    for key in set(keys_to_remove):
         del session_agents[key]
     
     # Remove triage session if exists
@@ -1068,7 +1448,7 @@ async def get_session_history(session_id: str, model_id: str = "us.anthropic.cla
     # Check if the session exists in our in-memory store
     try:
         # Get messages from the actual agent
-        messages = get_session_messages_for_ui(session_id, model_id)
+        messages = await run_blocking(get_session_messages_for_ui, session_id, model_id)
         
         agent_key = f"{session_id}:{model_id}"
         exists = agent_key in session_agents
@@ -1087,6 +1467,11 @@ async def get_session_history(session_id: str, model_id: str = "us.anthropic.cla
         add_server_log("system", f"Error getting session history: {str(e)}")
         return {"messages": [], "session_id": session_id, "exists": False, "error": str(e)}
 
+SERVER_BUSY_SSE = (
+    f"data: {json.dumps({'type': 'content', 'content': 'Error: server busy, please retry'})}\n\n"
+    "data: [DONE]\n\n"
+)
+
 @app.post("/chat")
 async def chat_endpoint(chat_message: ChatMessage, request: Request):
     """Chat endpoint using Strands Agent with streaming"""
@@ -1101,12 +1486,15 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
         if "text/event-stream" in accept_header:
             # Return SSE streaming response
             return StreamingResponse(
-                stream_ai_response_with_images(
-                    chat_message.message, 
-                    chat_message.model_id, 
-                    chat_message.session_id,
-                    chat_message.images,
-                    chat_message.history
+                with_chat_turn_slot(
+                    stream_ai_response_with_images(
+                        chat_message.message, 
+                        chat_message.model_id, 
+                        chat_message.session_id,
+                        chat_message.images,
+                        chat_message.history
+                    ),
+                    SERVER_BUSY_SSE
                 ),
                 media_type="text/event-stream",
                 headers={
@@ -1119,18 +1507,24 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
         elif "text/plain" in accept_header:
             # Return plain text streaming
             return StreamingResponse(
-                stream_plain_response(chat_message.message, chat_message.model_id),
+                with_chat_turn_slot(
+                    stream_plain_response(chat_message.message, chat_message.model_id),
+                    "Error: server busy, please retry"
+                ),
                 media_type="text/plain"
             )
         else:
             # Default SSE streaming
             return StreamingResponse(
-                stream_ai_response_with_images(
-                    chat_message.message, 
-                    chat_message.model_id, 
-                    chat_message.session_id,
-                    chat_message.images,
-                    chat_message.history
+                with_chat_turn_slot(
+                    stream_ai_response_with_images(
+                        chat_message.message, 
+                        chat_message.model_id, 
+                        chat_message.session_id,
+                        chat_message.images,
+                        chat_message.history
+                    ),
+                    SERVER_BUSY_SSE
                 ),
                 media_type="text/event-stream",
                 headers={
@@ -1147,31 +1541,20 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
 
 # Decision Tree Graph and Triage APIs
 @app.get("/api/decision-tree")
-async def get_decision_tree():
+async def get_decision_tree(request: Request):
     """Get the decision tree structure for visualization"""
+    global decision_tree
+    
     try:
-        tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
-        decision_tree = DecisionTree(tree_file)
+        if not decision_tree:
+            decision_tree = DecisionTree(DECISION_TREE_FILE)
         
-        # Convert decision tree to JSON-serializable format
-        tree_data = {}
-        for node_id, node in decision_tree.nodes.items():
-            tree_data[node_id] = {
-                "id": node.id,
-                "topic": node.topic,
-                "question": node.question,
-                "ui_display": node.ui_display,
-                "response_options": node.response_options,
-                "children": node.children,
-                "is_terminal": node.is_terminal,
-                "outcome": node.outcome
-            }
+        # The tree is compiled once, so the payload and its ETag never change while running
+        headers = {"ETag": decision_tree.tree_etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == decision_tree.tree_etag:
+            return Response(status_code=304, headers=headers)
         
-        return {
-            "nodes": tree_data,
-            "total_nodes": len(tree_data),
-            "entry_point": "start"
-        }
+        return Response(content=decision_tree.tree_json, media_type="application/json", headers=headers)
         
     except Exception as e:
         add_server_log("triage", f"Error getting decision tree: {str(e)}", level="error")
@@ -1256,24 +1639,12 @@ async def get_triage_system_status():
                 "tree": None
             }
         
-        # Convert decision tree to JSON-serializable format for visualization
-        tree_data = {}
-        for node_id, node in decision_tree.nodes.items():
-            tree_data[node_id] = {
-                "id": node.id,
-                "topic": node.topic,
-                "question": node.question,
-                "children": node.children,
-                "is_terminal": node.is_terminal,
-                "outcome": node.outcome
-            }
-        
         add_server_log("triage", f"Status returned: {len(decision_tree.nodes)} nodes loaded", level="info")
         
         return {
             "status": "online",
             "nodes_loaded": len(decision_tree.nodes) if decision_tree.nodes else 0,
-            "tree": {"nodes": tree_data},
+            "tree": decision_tree.status_tree,
             "message": "AI Triage Agent system ready"
         }
         
@@ -1289,7 +1660,9 @@ async def get_triage_system_status():
 @app.on_event("startup")
 async def startup_event():
     """Initialize MCP servers and decision tree on startup"""
-    global decision_tree
+    global decision_tree, event_loop_monitor_task
+    
+    event_loop_monitor_task = asyncio.get_running_loop().create_task(monitor_event_loop_lag())
     
     try:
         initialize_mcp_servers()
@@ -1299,8 +1672,7 @@ async def startup_event():
     
     # Initialize decision tree
     try:
-        tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
-        decision_tree = DecisionTree(tree_file)
+        decision_tree = DecisionTree(DECISION_TREE_FILE)
         add_server_log("system", f"Decision Tree initialized: {len(decision_tree.nodes)} nodes loaded", level="info")
     except Exception as e:
         add_server_log("system", f"Decision Tree initialization failed: {str(e)}", level="error")
@@ -1310,7 +1682,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup MCP servers on shutdown"""
     add_server_log("system", "Shutting down MCP servers...")
-    # Clean shutdown for stdio-based servers happens automatically
+    # Stop the warm MCP session pool; other stdio servers shut down automatically
+    mcp_manager.shutdown()
+    blocking_executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,24 +1,128 @@
 from mcp.server import FastMCP
-from typing import List, Dict, Optional
+from typing import List, Optional
 import json
 import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import calendar as cal
 
-# Simple calendar storage (in production, integrate with Google Calendar API)
+# Calendar storage: SQLite with an index on start time (in production, integrate with Google Calendar API)
+CALENDAR_DB = os.environ.get("CALENDAR_DB_PATH", "calendar_events.db")
+# Legacy JSON store, imported once into an empty database (recorded in calendar_meta)
 CALENDAR_FILE = "calendar_events.json"
 
-def load_events() -> List[Dict]:
-    """Load calendar events from file or return empty list."""
-    if os.path.exists(CALENDAR_FILE):
-        with open(CALENDAR_FILE, 'r') as f:
-            return json.load(f)
-    return []
+EVENT_COLUMNS = "id, title, start_datetime, end_datetime, description, created_at"
 
-def save_events(events: List[Dict]) -> None:
-    """Save calendar events to file."""
-    with open(CALENDAR_FILE, 'w') as f:
-        json.dump(events, f, indent=2, default=str)
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def get_connection() -> sqlite3.Connection:
+    """Open this thread's connection to the calendar database, creating the schema on first use."""
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # WAL lets readers run alongside a writer; the busy timeout makes concurrent writers
+        # (other threads or other server processes) wait for the lock instead of failing
+        conn = sqlite3.connect(CALENDAR_DB, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        _local.conn = conn
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        start_datetime TEXT NOT NULL,
+                        end_datetime TEXT NOT NULL,
+                        description TEXT NOT NULL DEFAULT '',
+                        created_at TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_datetime);
+                    CREATE TABLE IF NOT EXISTS calendar_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                """)
+                import_legacy_events(conn)
+                _schema_ready = True
+    return conn
+
+@contextmanager
+def write_transaction(conn: sqlite3.Connection):
+    """Run writes in one transaction that takes the database write lock up front."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def import_legacy_events(conn: sqlite3.Connection) -> None:
+    """Copy events from the old JSON file into an empty database, keeping their IDs where they are unique.
+    
+    The import is recorded in calendar_meta so that it happens at most once; otherwise
+    deleting every event and restarting would bring the old JSON events back.
+    """
+    if not os.path.exists(CALENDAR_FILE):
+        return
+    with write_transaction(conn):
+        if conn.execute("SELECT 1 FROM calendar_meta WHERE key = 'legacy_json_imported'").fetchone():
+            return
+        # A database that already has events was filled before the import was recorded
+        if conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None:
+            with open(CALENDAR_FILE, 'r') as f:
+                events = json.load(f)
+            for event in events:
+                event_id = event.get("id")
+                if event_id is not None and conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone():
+                    event_id = None  # duplicate ID in the JSON file: let SQLite assign a new one
+                insert_event(conn, event_id, event["title"], datetime.fromisoformat(event["start_datetime"]),
+                             datetime.fromisoformat(event["end_datetime"]), event.get("description", ""),
+                             event.get("created_at", datetime.now().isoformat()))
+        conn.execute("INSERT INTO calendar_meta (key, value) VALUES ('legacy_json_imported', 1)")
+
+def insert_event(conn: sqlite3.Connection, event_id: Optional[int], title: str, start: datetime, end: datetime,
+                 description: str, created_at: str) -> int:
+    """Insert an event and widen the longest-event bound used by overlap queries (transaction must be open)."""
+    cursor = conn.execute(
+        f"INSERT INTO events ({EVENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+        (event_id, title, start.isoformat(), end.isoformat(), description, created_at)
+    )
+    duration = int((end - start).total_seconds() // 60) + 1
+    conn.execute(
+        "INSERT INTO calendar_meta (key, value) VALUES ('max_duration_minutes', ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+        (duration,)
+    )
+    return cursor.lastrowid
+
+def events_between(start: datetime, end: datetime) -> List[sqlite3.Row]:
+    """Events starting in [start, end], ordered by start time (index range scan)."""
+    return get_connection().execute(
+        f"SELECT {EVENT_COLUMNS} FROM events WHERE start_datetime >= ? AND start_datetime <= ? ORDER BY start_datetime",
+        (start.isoformat(), end.isoformat())
+    ).fetchall()
+
+def overlapping_events(start: datetime, end: datetime) -> List[sqlite3.Row]:
+    """Events overlapping [start, end), ordered by start time.
+    
+    No event is longer than max_duration_minutes, so an overlapping event must
+    start within that distance before the window; the start-time index turns
+    this into a range scan of O(log n + k) instead of reading every event.
+    """
+    conn = get_connection()
+    row = conn.execute("SELECT value FROM calendar_meta WHERE key = 'max_duration_minutes'").fetchone()
+    if row is None:
+        return []
+    earliest_start = start - timedelta(minutes=row["value"])
+    return conn.execute(
+        f"SELECT {EVENT_COLUMNS} FROM events "
+        "WHERE start_datetime > ? AND start_datetime < ? AND end_datetime > ? ORDER BY start_datetime",
+        (earliest_start.isoformat(), end.isoformat(), start.isoformat())
+    ).fetchall()
 
 def get_next_weekday(weekday_name: str) -> str:
     """Get the next occurrence of a weekday as YYYY-MM-DD string."""
@@ -63,8 +167,6 @@ def weekday_to_date(weekday_name: str) -> str:
 @mcp.tool(description="Add a new calendar event")
 def add_event(title: str, date: str, time: str, duration_minutes: int = 60, description: str = "") -> str:
     """Add a new calendar event with title, date (YYYY-MM-DD or weekday name), time (HH:MM), and optional description."""
-    events = load_events()
-    
     try:
         # Try to convert weekday name to date if needed
         actual_date = date
@@ -80,18 +182,10 @@ def add_event(title: str, date: str, time: str, duration_minutes: int = 60, desc
         event_datetime = datetime.strptime(f"{actual_date} {time}", "%Y-%m-%d %H:%M")
         end_datetime = event_datetime + timedelta(minutes=duration_minutes)
         
-        event_id = len(events) + 1
-        new_event = {
-            "id": event_id,
-            "title": title,
-            "start_datetime": event_datetime.isoformat(),
-            "end_datetime": end_datetime.isoformat(),
-            "description": description,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        events.append(new_event)
-        save_events(events)
+        # IDs come from the AUTOINCREMENT sequence, so they are never reused after a delete
+        conn = get_connection()
+        with write_transaction(conn):
+            insert_event(conn, None, title, event_datetime, end_datetime, description, datetime.now().isoformat())
         
         return f"📅 Event '{title}' scheduled for {event_datetime.strftime('%A, %B %d, %Y at %I:%M %p')} (Duration: {duration_minutes} minutes)"
         
@@ -101,27 +195,16 @@ def add_event(title: str, date: str, time: str, duration_minutes: int = 60, desc
 @mcp.tool(description="List upcoming calendar events")
 def list_events(days_ahead: int = 7) -> str:
     """List calendar events for the next N days (default: 7)."""
-    events = load_events()
-    
-    if not events:
-        return "📅 No events found."
-    
-    # Filter events for the specified time period
+    # Filter events for the specified time period, already sorted by date
     now = datetime.now()
     end_date = now + timedelta(days=days_ahead)
-    
-    upcoming_events = []
-    for event in events:
-        event_date = datetime.fromisoformat(event["start_datetime"])
-        if now <= event_date <= end_date:
-            upcoming_events.append(event)
+    upcoming_events = events_between(now, end_date)
     
     if not upcoming_events:
+        if get_connection().execute("SELECT 1 FROM events LIMIT 1").fetchone() is None:
+            return "📅 No events found."
         return f"📅 No events found for the next {days_ahead} days."
     
-    # Sort by date
-    upcoming_events.sort(key=lambda x: x["start_datetime"])
-    
     result = f"📅 Upcoming Events (Next {days_ahead} days):\n"
     for event in upcoming_events:
         start_time = datetime.fromisoformat(event["start_datetime"])
@@ -131,7 +214,7 @@ def list_events(days_ahead: int = 7) -> str:
         result += f"\n🕐 {event['title']}\n"
         result += f"   📆 {start_time.strftime('%A, %B %d, %Y')}\n"
         result += f"   ⏰ {start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')} ({duration} min)\n"
-        if event.get("description"):
+        if event["description"]:
             result += f"   📝 {event['description']}\n"
     
     return result
@@ -139,21 +222,12 @@ def list_events(days_ahead: int = 7) -> str:
 @mcp.tool(description="Check for scheduling conflicts")
 def check_conflicts(date: str, start_time: str, duration_minutes: int = 60) -> str:
     """Check if there are any scheduling conflicts for a proposed meeting time."""
-    events = load_events()
-    
     try:
         # Parse proposed time
         proposed_start = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
         proposed_end = proposed_start + timedelta(minutes=duration_minutes)
         
-        conflicts = []
-        for event in events:
-            event_start = datetime.fromisoformat(event["start_datetime"])
-            event_end = datetime.fromisoformat(event["end_datetime"])
-            
-            # Check for overlap
-            if (proposed_start < event_end and proposed_end > event_start):
-                conflicts.append(event)
+        conflicts = overlapping_events(proposed_start, proposed_end)
         
         if not conflicts:
             return f"✅ No conflicts found for {proposed_start.strftime('%B %d, %Y at %I:%M %p')} ({duration_minutes} minutes)"
@@ -172,26 +246,17 @@ def check_conflicts(date: str, start_time: str, duration_minutes: int = 60) -> s
 @mcp.tool(description="Find available time slots")
 def find_available_slots(date: str, duration_minutes: int = 60, start_hour: int = 9, end_hour: int = 17) -> str:
     """Find available time slots on a specific date within business hours."""
-    events = load_events()
-    
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
         
-        # Get events for the target date
-        day_events = []
-        for event in events:
-            event_start = datetime.fromisoformat(event["start_datetime"])
-            if event_start.date() == target_date:
-                day_events.append(event)
-        
-        # Sort events by start time
-        day_events.sort(key=lambda x: x["start_datetime"])
-        
         # Generate time slots
         available_slots = []
         current_time = datetime.combine(target_date, datetime.min.time()) + timedelta(hours=start_hour)
         end_time = datetime.combine(target_date, datetime.min.time()) + timedelta(hours=end_hour)
         
+        # Events overlapping business hours, sorted by start time
+        day_events = overlapping_events(current_time, end_time)
+        
         for event in day_events:
             event_start = datetime.fromisoformat(event["start_datetime"])
             event_end = datetime.fromisoformat(event["end_datetime"])
@@ -227,15 +292,15 @@ def find_available_slots(date: str, duration_minutes: int = 60, start_hour: int
 @mcp.tool(description="Delete a calendar event")
 def delete_event(event_id: int) -> str:
     """Delete a calendar event by its ID."""
-    events = load_events()
-    
-    for i, event in enumerate(events):
-        if event["id"] == event_id:
-            deleted_event = events.pop(i)
-            save_events(events)
-            return f"🗑️ Event '{deleted_event['title']}' deleted successfully!"
+    conn = get_connection()
+    with write_transaction(conn):
+        deleted_event = conn.execute("SELECT title FROM events WHERE id = ?", (event_id,)).fetchone()
+        if deleted_event is not None:
+            conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
     
-    return f"❌ Event with ID {event_id} not found."
+    if deleted_event is None:
+        return f"❌ Event with ID {event_id} not found."
+    return f"🗑️ Event '{deleted_event['title']}' deleted successfully!"
 
 if __name__ == "__main__":
     print("📅 Starting Calendar Integration MCP Server...")
@@ -5,30 +5,109 @@ Based on Strands official documentation examples
 
 import os
 import json
+import time
 import logging
-from contextlib import contextmanager, ExitStack
-from typing import Dict, List, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Any
 from mcp import stdio_client, StdioServerParameters
 from strands.tools.mcp import MCPClient
 
 logger = logging.getLogger(__name__)
 
+# Warm pool tuning (seconds)
+MCP_IDLE_TIMEOUT = float(os.environ.get("MCP_IDLE_TIMEOUT", "600"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.environ.get("MCP_HEALTH_CHECK_INTERVAL", "30"))
+MCP_REAPER_INTERVAL = float(os.environ.get("MCP_REAPER_INTERVAL", "30"))
+
+# Tool discovery: per-server list_tools timeout (seconds) and parallelism
+MCP_DISCOVERY_TIMEOUT = float(os.environ.get("MCP_DISCOVERY_TIMEOUT", "30"))
+MCP_DISCOVERY_WORKERS = int(os.environ.get("MCP_DISCOVERY_WORKERS", "8"))
+
+# MCP server configuration file (overridable, e.g. to point benchmarks at stub servers)
+MCP_CONFIG_PATH = os.environ.get("MCP_CONFIG_PATH", os.path.join(os.path.dirname(__file__), 'mcp.json'))
+
+@dataclass
+class PooledSession:
+    """A long-lived MCP server session kept warm by the manager
+    
+    A draining session (its client was deactivated) and a retired session (it
+    was replaced after a failed health check) take no new borrowers and are
+    stopped when their last borrower gives them back.
+    """
+    name: str
+    client: MCPClient
+    running: bool = False
+    draining: bool = False
+    retired: bool = False
+    borrowers: int = 0
+    restarts: int = 0
+    started_at: Optional[float] = None
+    last_used: float = field(default_factory=time.monotonic)
+    last_health_check: float = 0.0
+    last_error: Optional[str] = None
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+@dataclass
+class ToolCacheEntry:
+    """Tools listed from one server, tagged with the discovery version that produced them"""
+    tools: List[Any]
+    version: int
+    fetched_at: float = field(default_factory=time.time)
+
 class MCPClientManager:
-    def __init__(self):
+    def __init__(self, idle_timeout: float = MCP_IDLE_TIMEOUT,
+                 health_check_interval: float = MCP_HEALTH_CHECK_INTERVAL):
         self.clients: Dict[str, MCPClient] = {}
+        self.client_factories: Dict[str, Callable[[], MCPClient]] = {}
         self.active_clients: List[str] = []
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._sessions: Dict[str, PooledSession] = {}
+        self._retired: List[PooledSession] = []
+        # Lock order: a session's lock may be held while taking _lock, never the other way round
+        self._lock = threading.RLock()
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self._tool_cache: Dict[str, ToolCacheEntry] = {}
+        self.tools_version = 0
+        self._discovery_executor = ThreadPoolExecutor(
+            max_workers=MCP_DISCOVERY_WORKERS, thread_name_prefix="mcp-discovery"
+        )
+        
+    def add_client(self, name: str, client: MCPClient, factory: Optional[Callable[[], MCPClient]] = None):
+        """Add an MCP client
         
-    def add_client(self, name: str, client: MCPClient):
-        """Add an MCP client"""
-        self.clients[name] = client
+        The factory builds another client for the same server; it lets a
+        crashed session be replaced while requests still hold the old one.
+        """
+        with self._lock:
+            previous = self._sessions.get(name)
+            self.clients[name] = client
+            if factory:
+                self.client_factories[name] = factory
+            else:
+                self.client_factories.pop(name, None)
+            self._sessions[name] = PooledSession(name=name, client=client)
+            self._tool_cache.pop(name, None)
+        if previous:
+            self._stop_session(name, previous)
         if name not in self.active_clients:
             self.active_clients.append(name)
         logger.info(f"Added MCP client: {name}")
     
     def remove_client(self, name: str):
         """Remove an MCP client"""
+        with self._lock:
+            session = self._sessions.pop(name, None)
+            self._tool_cache.pop(name, None)
+        if session:
+            self._stop_session(name, session)
         if name in self.clients:
             del self.clients[name]
+        self.client_factories.pop(name, None)
         if name in self.active_clients:
             self.active_clients.remove(name)
         logger.info(f"Removed MCP client: {name}")
@@ -42,13 +121,25 @@ class MCPClientManager:
         return self.active_clients.copy()
     
     def set_client_active(self, name: str, active: bool):
-        """Set a client as active or inactive"""
+        """Set a client as active or inactive
+        
+        Deactivating a client whose session is borrowed only marks it draining;
+        the session is stopped when the last borrower releases it.
+        """
         if name in self.clients:
+            session = self._sessions.get(name)
             if active and name not in self.active_clients:
                 self.active_clients.append(name)
+                if session:
+                    with session.lock:
+                        session.draining = False
                 logger.info(f"Activated MCP client: {name}")
             elif not active and name in self.active_clients:
                 self.active_clients.remove(name)
+                if session:
+                    with session.lock:
+                        session.draining = True
+                    self._stop_if_unused(session)
                 logger.info(f"Deactivated MCP client: {name}")
         else:
             logger.warning(f"Client {name} not found")
@@ -56,11 +147,12 @@ class MCPClientManager:
     def initialize_default_clients(self):
         """Initialize default MCP clients from config"""
         try:
-            config_path = os.path.join(os.path.dirname(__file__), 'mcp.json')
-            with open(config_path, 'r') as f:
+            with open(MCP_CONFIG_PATH, 'r') as f:
                 config = json.load(f)
             
-            # Clear existing clients
+            # Clear existing clients (stopping any warm sessions first)
+            self.shutdown()
+            self.invalidate_tools()
             self.clients.clear()
             self.active_clients.clear()
             
@@ -74,18 +166,19 @@ class MCPClientManager:
                     args = server_config.get('args', [])
                     
                     # Create MCPClient with lambda function as per Strands docs
-                    mcp_client = MCPClient(
-                        lambda cmd=command, arguments=args: stdio_client(
-                            StdioServerParameters(
-                                command=cmd,
-                                args=arguments,
-                                cwd=os.path.dirname(__file__),
-                                env=os.environ
+                    def build_client(cmd=command, arguments=args) -> MCPClient:
+                        return MCPClient(
+                            lambda: stdio_client(
+                                StdioServerParameters(
+                                    command=cmd,
+                                    args=arguments,
+                                    cwd=os.path.dirname(__file__),
+                                    env=os.environ
+                                )
                             )
                         )
-                    )
                     
-                    self.add_client(server_name, mcp_client)
+                    self.add_client(server_name, build_client(), factory=build_client)
                     
                     # Set active state based on config
                     enabled = server_config.get('enabled', True)
@@ -102,48 +195,303 @@ class MCPClientManager:
         except Exception as e:
             logger.error(f"Failed to initialize MCP clients: {e}")
     
-    def get_all_tools(self, active_only: bool = True) -> List[Any]:
-        """Get all tools from active MCP clients"""
-        all_tools = []
+    def list_server_tools(self, name: str, refresh: bool = False) -> List[Any]:
+        """Get the tools of one server, listing them only if they are not cached yet"""
+        if not refresh:
+            entry = self._tool_cache.get(name)
+            if entry is not None:
+                return entry.tools
         
+        # Borrow the warm session instead of spawning a new process
+        with self.borrow(name) as client:
+            tools = client.list_tools_sync() or []
+        
+        with self._lock:
+            self.tools_version += 1
+            self._tool_cache[name] = ToolCacheEntry(tools=tools, version=self.tools_version)
+        logger.info(f"Loaded {len(tools)} tools from {name}")
+        return tools
+    
+    def get_all_tools(self, active_only: bool = True, refresh: bool = False,
+                      timeout: float = MCP_DISCOVERY_TIMEOUT) -> List[Any]:
+        """Get all tools from active MCP clients
+        
+        Servers without cached tools (or all servers when refresh is set) are
+        listed concurrently; a server that does not answer within the timeout is
+        skipped so one slow server cannot stall discovery for the others.
+        """
         clients_to_use = self.active_clients if active_only else list(self.clients.keys())
+        names = [name for name in list(clients_to_use) if name in self.clients]
         
-        for client_name in clients_to_use:
-            if client_name not in self.clients:
-                continue
-                
-            client = self.clients[client_name]
-            
+        pending = {
+            name: self._discovery_executor.submit(self.list_server_tools, name, True)
+            for name in names
+            if refresh or name not in self._tool_cache
+        }
+        if pending:
+            wait(pending.values(), timeout=timeout)
+        
+        all_tools = []
+        for name in names:
+            future = pending.get(name)
+            if future is None:
+                all_tools.extend(self._tool_cache[name].tools)
+            elif not future.done():
+                logger.error(f"Timed out after {timeout}s loading tools from {name}")
+            elif future.exception():
+                logger.error(f"Error loading tools from {name}: {future.exception()}")
+            else:
+                all_tools.extend(future.result())
+        
+        return all_tools
+    
+    def get_cached_tools(self, name: str) -> List[Any]:
+        """Tools last listed from a server, without contacting it"""
+        entry = self._tool_cache.get(name)
+        return entry.tools if entry else []
+    
+    def invalidate_tools(self, name: Optional[str] = None) -> None:
+        """Drop cached tools for one server, or for all servers"""
+        with self._lock:
+            if name is None:
+                self._tool_cache.clear()
+            else:
+                self._tool_cache.pop(name, None)
+    
+    def get_tool_cache_status(self) -> Dict[str, Dict[str, Any]]:
+        """Version, size and age of each server's cached tool list"""
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    "version": entry.version,
+                    "tool_count": len(entry.tools),
+                    "age_seconds": round(now - entry.fetched_at, 1)
+                }
+                for name, entry in self._tool_cache.items()
+            }
+    
+    # --- Warm session pool ---
+    
+    def _start_session(self, session: PooledSession) -> None:
+        """Start the server process for a pooled session (session lock must be held)"""
+        session.client.start()
+        session.running = True
+        session.started_at = time.monotonic()
+        session.last_health_check = session.started_at
+        # A session restarted after an idle reap must not look idle to the reaper
+        session.last_used = session.started_at
+        session.last_error = None
+        logger.info(f"Started warm MCP session: {session.name}")
+    
+    def _stop_session(self, name: str, session: Optional[PooledSession] = None) -> None:
+        """Stop the server process for a pooled session (_lock must not be held)"""
+        session = session or self._sessions.get(name)
+        if not session:
+            return
+        with session.lock:
+            if not session.running:
+                return
             try:
-                # Use client in context to get tools (Strands way)
-                with client:
-                    tools = client.list_tools_sync()
-                    if tools:
-                        all_tools.extend(tools)
-                        logger.info(f"Loaded {len(tools)} tools from {client_name}")
+                session.client.stop(None, None, None)
             except Exception as e:
-                logger.error(f"Error loading tools from {client_name}: {e}")
+                logger.warning(f"Error stopping MCP session {name}: {e}")
+            session.running = False
+            session.started_at = None
+        logger.info(f"Stopped warm MCP session: {name}")
+    
+    def _stop_if_unused(self, session: PooledSession) -> None:
+        """Stop a draining or retired session once nobody borrows it (_lock must not be held)"""
+        with session.lock:
+            with self._lock:
+                if session.borrowers > 0 or not (session.draining or session.retired):
+                    return
+                if session in self._retired:
+                    self._retired.remove(session)
+            self._stop_session(session.name, session)
+    
+    def _is_healthy(self, session: PooledSession) -> bool:
+        """Ping a running session, at most once per health check interval (session lock must be held)"""
+        now = time.monotonic()
+        if now - session.last_health_check < self.health_check_interval:
+            return True
+        session.last_health_check = now
+        try:
+            session.client.list_tools_sync()
+            return True
+        except Exception as e:
+            session.last_error = str(e)
+            logger.warning(f"Health check failed for MCP session {session.name}: {e}")
+            return False
+    
+    def _replace_session(self, session: PooledSession) -> PooledSession:
+        """Start a new session in place of a crashed one that is still borrowed (its lock must be held)
         
-        return all_tools
+        The crashed session is retired: new borrowers get the replacement, and
+        the old one is stopped when its last borrower releases it. Cached tools
+        are pointed at the replacement client so agents keep working.
+        """
+        name = session.name
+        replacement = PooledSession(name=name, client=self.client_factories[name](), restarts=session.restarts + 1)
+        with replacement.lock:
+            self._start_session(replacement)
+            with self._lock:
+                session.retired = True
+                self._retired.append(session)
+                self._sessions[name] = replacement
+                self.clients[name] = replacement.client
+                entry = self._tool_cache.get(name)
+                for tool in entry.tools if entry else []:
+                    if getattr(tool, "mcp_client", None) is session.client:
+                        tool.mcp_client = replacement.client
+                replacement.borrowers += 1
+        # Its last borrower may have left before it was retired
+        self._stop_if_unused(session)
+        logger.info(f"Replaced crashed MCP session: {name} (restart #{replacement.restarts}, "
+                    f"{session.borrowers} borrowers left on the old one)")
+        return replacement
     
-    @contextmanager
-    def get_active_context(self):
-        """Get context manager for all active MCP clients"""
-        # Use ExitStack to manage multiple context managers
-        with ExitStack() as stack:
-            contexts = []
+    def _ensure_session(self, name: str) -> PooledSession:
+        """Borrow a running session for the client, starting or restarting it as needed
+        
+        Starting a server only holds that session's lock, so different servers
+        can be started (and listed) concurrently. The borrow is counted before
+        the session lock is released, so the reaper can't stop the session in
+        between; the caller must give it back with release_sessions.
+        """
+        while True:
+            with self._lock:
+                if name not in self.clients:
+                    raise KeyError(f"MCP client {name} not found")
+                session = self._sessions.setdefault(name, PooledSession(name=name, client=self.clients[name]))
+                self._ensure_reaper()
             
-            for client_name in self.active_clients:
-                if client_name in self.clients:
+            with session.lock:
+                if session.retired:
+                    # Replaced while we waited for its lock; borrow the replacement
+                    continue
+                
+                if session.running and not self._is_healthy(session):
+                    if session.borrowers > 0 and name in self.client_factories:
+                        try:
+                            return self._replace_session(session)
+                        except Exception as e:
+                            session.last_error = str(e)
+                            raise
+                    if session.borrowers == 0:
+                        self._stop_session(name, session)
+                        session.restarts += 1
+                        logger.info(f"Restarting crashed MCP session: {name} (restart #{session.restarts})")
+                
+                if not session.running:
                     try:
-                        # Enter context for each client
-                        stack.enter_context(self.clients[client_name])
-                        contexts.append(client_name)
+                        self._start_session(session)
                     except Exception as e:
-                        logger.error(f"Failed to enter context for {client_name}: {e}")
-            
-            logger.info(f"Entering context with active clients: {contexts}")
+                        session.last_error = str(e)
+                        raise
+                
+                with self._lock:
+                    if name in self.active_clients:
+                        session.draining = False
+                    session.borrowers += 1
+                return session
+    
+    @contextmanager
+    def borrow(self, name: str):
+        """Borrow an already-initialized client from the warm pool"""
+        session = self._ensure_session(name)
+        try:
+            yield session.client
+        finally:
+            self.release_sessions([session])
+    
+    def _ensure_reaper(self) -> None:
+        """Start the idle reaper thread once (lock must be held)"""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._reaper_stop.clear()
+        self._reaper = threading.Thread(target=self._reap_idle_sessions, name="mcp-pool-reaper", daemon=True)
+        self._reaper.start()
+    
+    def _reap_idle_sessions(self) -> None:
+        """Stop sessions that have not been borrowed within the idle timeout"""
+        while not self._reaper_stop.wait(min(MCP_REAPER_INTERVAL, self.idle_timeout)):
+            with self._lock:
+                sessions = list(self._sessions.items())
+            for name, session in sessions:
+                # A session whose lock is held is being started or checked; look again next round
+                if not session.lock.acquire(blocking=False):
+                    continue
+                try:
+                    idle = time.monotonic() - session.last_used
+                    if session.running and session.borrowers == 0 and idle > self.idle_timeout:
+                        logger.info(f"MCP session {name} idle for {int(idle)}s, stopping")
+                        self._stop_session(name, session)
+                finally:
+                    session.lock.release()
+    
+    def get_pool_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every pooled MCP session"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "running": session.running,
+                    "active": name in self.active_clients,
+                    "draining": session.draining,
+                    "borrowers": session.borrowers,
+                    "retired_borrowers": sum(old.borrowers for old in self._retired if old.name == name),
+                    "restarts": session.restarts,
+                    "uptime_seconds": round(now - session.started_at, 1) if session.started_at else 0,
+                    "idle_seconds": round(now - session.last_used, 1),
+                    "last_error": session.last_error
+                }
+                for name, session in self._sessions.items()
+            }
+    
+    def shutdown(self) -> None:
+        """Stop all warm sessions and the reaper thread"""
+        self._reaper_stop.set()
+        with self._lock:
+            sessions = list(self._sessions.items()) + [(session.name, session) for session in self._retired]
+            self._retired.clear()
+        for name, session in sessions:
+            self._stop_session(name, session)
+    
+    def acquire_active_sessions(self) -> List[PooledSession]:
+        """Borrow warm sessions for all active clients; blocks while starting or restarting servers"""
+        acquired = []
+        for client_name in list(self.active_clients):
+            if client_name in self.clients:
+                try:
+                    acquired.append(self._ensure_session(client_name))
+                except Exception as e:
+                    logger.error(f"Failed to acquire session for {client_name}: {e}")
+        return acquired
+    
+    def release_sessions(self, sessions: List[PooledSession]) -> None:
+        """Return sessions borrowed with acquire_active_sessions, stopping draining or retired ones left unused"""
+        now = time.monotonic()
+        finished = []
+        with self._lock:
+            for session in sessions:
+                if session.borrowers > 0:
+                    session.borrowers -= 1
+                    session.last_used = now
+                    if session.borrowers == 0 and (session.draining or session.retired):
+                        finished.append(session)
+        for session in finished:
+            self._stop_if_unused(session)
+    
+    @contextmanager
+    def get_active_context(self):
+        """Borrow warm sessions for all active MCP clients"""
+        contexts = self.acquire_active_sessions()
+        try:
+            logger.info(f"Entering context with active clients: {[session.name for session in contexts]}")
             yield contexts
+        finally:
+            self.release_sessions(contexts)
 
 # Global instance
 mcp_manager = MCPClientManager() 
\ No newline at end of file
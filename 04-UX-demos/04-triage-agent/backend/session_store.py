@@ -0,0 +1,275 @@
+"""
+Bounded session store for the triage backend
+
+Holds per-session objects (agents, decision tree conversation states) in an
+LRU with an idle TTL. Evicted entries can optionally be spilled to SQLite and
+are rehydrated lazily the next time the session is used.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORE_MAX_SIZE = int(os.environ.get("SESSION_STORE_MAX_SIZE", "500"))
+SESSION_IDLE_TTL = float(os.environ.get("SESSION_IDLE_TTL", "3600"))
+SESSION_SPILL_PATH = os.environ.get("SESSION_SPILL_PATH", "")
+
+
+class SQLiteSpillStore:
+    """Keeps serialized evicted sessions on disk"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spilled_sessions ("
+            "store TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, spilled_at REAL NOT NULL, "
+            "PRIMARY KEY (store, key))"
+        )
+        self._conn.commit()
+
+    def save(self, store: str, key: str, data: Any) -> None:
+        """Write a serialized session"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spilled_sessions (store, key, data, spilled_at) VALUES (?, ?, ?, ?)",
+                (store, key, json.dumps(data), time.time())
+            )
+            self._conn.commit()
+
+    def load(self, store: str, key: str) -> Optional[Any]:
+        """Read a serialized session, or None if it was never spilled"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM spilled_sessions WHERE store = ? AND key = ?", (store, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def contains(self, store: str, key: str) -> bool:
+        """Check whether a session was spilled"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM spilled_sessions WHERE store = ? AND key = ?", (store, key)
+            ).fetchone()
+        return row is not None
+
+    def delete(self, store: str, key: str) -> None:
+        """Drop a spilled session"""
+        with self._lock:
+            self._conn.execute("DELETE FROM spilled_sessions WHERE store = ? AND key = ?", (store, key))
+            self._conn.commit()
+
+    def clear(self, store: str) -> None:
+        """Drop every spilled session of a store"""
+        with self._lock:
+            self._conn.execute("DELETE FROM spilled_sessions WHERE store = ?", (store,))
+            self._conn.commit()
+
+    def keys(self, store: str) -> List[str]:
+        """List spilled session keys of a store"""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM spilled_sessions WHERE store = ?", (store,)).fetchall()
+        return [row[0] for row in rows]
+
+
+class SessionStore:
+    """Dict-like LRU/TTL store with optional spill-to-disk and lazy rehydration
+
+    dump turns an evicted value into JSON-serializable data, and load(key, data)
+    rebuilds the value when an evicted session is used again. Without a spill
+    store (or without dump/load) evicted sessions are simply dropped.
+
+    Entries pinned for the duration of a turn are never evicted: a snapshot
+    spilled mid-turn would miss the rest of the turn. Their eviction is
+    deferred until they are unpinned and the store is next written or expired.
+    """
+
+    def __init__(self, name: str, max_size: int = SESSION_STORE_MAX_SIZE, idle_ttl: float = SESSION_IDLE_TTL,
+                 spill: Optional[SQLiteSpillStore] = None,
+                 dump: Optional[Callable[[Any], Any]] = None,
+                 load: Optional[Callable[[str, Any], Any]] = None):
+        self.name = name
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.spill = spill if dump and load else None
+        self.dump = dump
+        self.load = load
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "spills": 0, "rehydrations": 0}
+
+    def _evict(self, key: str, reason: str) -> None:
+        """Remove the entry from memory, spilling it to disk if configured (lock must be held)"""
+        value, _ = self._entries.pop(key)
+        self._counters["expirations" if reason == "ttl" else "evictions"] += 1
+        if self.spill:
+            try:
+                self.spill.save(self.name, key, self.dump(value))
+                self._counters["spills"] += 1
+            except Exception as e:
+                logger.error(f"Failed to spill {self.name} session {key}: {e}")
+        logger.info(f"Evicted {self.name} session {key} ({reason})")
+
+    def _expire(self) -> None:
+        """Evict idle entries; the oldest-used entries are at the front (lock must be held)"""
+        if self.idle_ttl <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = []
+        for key, (_, last_used) in self._entries.items():
+            if last_used > cutoff:
+                break
+            if key not in self._pins:
+                expired.append(key)
+        for key in expired:
+            self._evict(key, "ttl")
+
+    def _rehydrate(self, key: str) -> Optional[Any]:
+        """Rebuild a spilled entry and move it back into memory (lock must be held)"""
+        if not self.spill:
+            return None
+        data = self.spill.load(self.name, key)
+        if data is None:
+            return None
+        value = self.load(key, data)
+        self.spill.delete(self.name, key)
+        self._counters["rehydrations"] += 1
+        self._put(key, value)
+        logger.info(f"Rehydrated {self.name} session {key}")
+        return value
+
+    def _put(self, key: str, value: Any) -> None:
+        """Insert as most recently used and enforce the size bound (lock must be held)"""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        excess = len(self._entries) - self.max_size
+        if excess > 0:
+            unpinned = [k for k in self._entries if k not in self._pins]
+            for lru_key in unpinned[:excess]:
+                self._evict(lru_key, "lru")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a session, rehydrating it from disk if it was evicted"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._counters["hits"] += 1
+                self._entries[key] = (entry[0], time.monotonic())
+                self._entries.move_to_end(key)
+                return entry[0]
+
+            self._counters["misses"] += 1
+            value = self._rehydrate(key)
+            return default if value is None else value
+
+    @contextmanager
+    def pinned(self, key: str):
+        """Keep a session in memory while it is in use, e.g. for the length of a turn"""
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._pins.pop(key) - 1
+                if remaining:
+                    self._pins[key] = remaining
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # The turn just used it, so it counts as most recently used
+                    self._entries[key] = (entry[0], time.monotonic())
+                    self._entries.move_to_end(key)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._expire()
+            self._put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            in_memory = self._entries.pop(key, None) is not None
+            spilled = bool(self.spill) and self.spill.contains(self.name, key)
+            if spilled:
+                self.spill.delete(self.name, key)
+            if not in_memory and not spilled:
+                raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                return True
+            return bool(self.spill) and self.spill.contains(self.name, key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> List[str]:
+        """Keys of sessions currently held in memory"""
+        with self._lock:
+            self._expire()
+            return list(self._entries.keys())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Sessions currently held in memory"""
+        with self._lock:
+            self._expire()
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def spilled_keys(self) -> List[str]:
+        """Keys of sessions evicted to disk"""
+        return self.spill.keys(self.name) if self.spill else []
+
+    def clear(self) -> None:
+        """Drop every session, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            if self.spill:
+                self.spill.clear(self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            self._expire()
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "pinned": len(self._pins),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "spill_enabled": self.spill is not None
+            }
+
+
+def create_spill_store() -> Optional[SQLiteSpillStore]:
+    """Create the shared spill store if SESSION_SPILL_PATH is set"""
+    if not SESSION_SPILL_PATH:
+        return None
+    try:
+        return SQLiteSpillStore(SESSION_SPILL_PATH)
+    except Exception as e:
+        logger.error(f"Failed to open session spill store {SESSION_SPILL_PATH}: {e}")
+        return None
@@ -0,0 +1,108 @@
+"""
+Incremental scanner for the triage control tags in streamed LLM output
+
+The model ends each triage answer with a <decision_tree_status ... /> tag and an
+<available_options>...</available_options> block. Instead of re-running a regex
+over the whole accumulated response for every streamed delta, the scanner
+consumes each delta once and reports a tag as soon as it closes.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+STATUS_OPEN = "<decision_tree_status"
+OPTIONS_OPEN = "<available_options>"
+OPTIONS_CLOSE = "</available_options>"
+OPENERS = (STATUS_OPEN, OPTIONS_OPEN)
+MAX_OPENER_LENGTH = max(len(opener) for opener in OPENERS)
+
+ATTRIBUTE_PATTERN = re.compile(r'(\w+)="([^"]*)"')
+OPTION_PATTERN = re.compile(r'<option(?:\s+urgency="([^"]*)")?[^>]*>(.*?)</option>', re.DOTALL)
+
+# Scanner states
+TEXT = "text"
+IN_STATUS = "in_status"
+IN_OPTIONS = "in_options"
+
+
+class TagStreamScanner:
+    """State machine that splits streamed text into user-facing text and tag events"""
+
+    def __init__(self):
+        self.state = TEXT
+        self._pending = ""  # Text held back while a tag may be opening or is still open
+        self._search_from = 0  # Offset in _pending already searched for the closing token
+
+    def feed(self, delta: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """Consume a streamed delta
+
+        Returns the text that is safe to show to the user (control tags removed)
+        and the list of tag events that closed within this delta.
+        """
+        buffer = self._pending + delta
+        visible: List[str] = []
+        events: List[Dict[str, Any]] = []
+        pos = 0
+
+        while pos < len(buffer):
+            if self.state == TEXT:
+                tag_start = buffer.find("<", pos)
+                if tag_start == -1:
+                    visible.append(buffer[pos:])
+                    pos = len(buffer)
+                    break
+
+                visible.append(buffer[pos:tag_start])
+                tail = buffer[tag_start:tag_start + MAX_OPENER_LENGTH]
+
+                if tail.startswith(STATUS_OPEN):
+                    self.state = IN_STATUS
+                    pos = tag_start
+                    self._search_from = len(STATUS_OPEN)
+                elif tail.startswith(OPTIONS_OPEN):
+                    self.state = IN_OPTIONS
+                    pos = tag_start
+                    self._search_from = len(OPTIONS_OPEN)
+                elif any(opener.startswith(tail) for opener in OPENERS):
+                    # Could still become a control tag; wait for more text
+                    self._pending = buffer[tag_start:]
+                    return "".join(visible), events
+                else:
+                    visible.append("<")
+                    pos = tag_start + 1
+            else:
+                closer = ">" if self.state == IN_STATUS else OPTIONS_CLOSE
+                end = buffer.find(closer, pos + self._search_from)
+                if end == -1:
+                    # Only re-search the part that could still contain the closer
+                    self._pending = buffer[pos:]
+                    self._search_from = max(len(self._pending) - len(closer) + 1, self._search_from)
+                    return "".join(visible), events
+
+                end += len(closer)
+                events.append(self._parse_tag(buffer[pos:end]))
+                self.state = TEXT
+                self._search_from = 0
+                pos = end
+
+        self._pending = ""
+        return "".join(visible), events
+
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended"""
+        remainder = self._pending
+        self._pending = ""
+        self._search_from = 0
+        self.state = TEXT
+        return remainder
+
+    def _parse_tag(self, tag: str) -> Dict[str, Any]:
+        """Turn a complete control tag into an event"""
+        if self.state == IN_STATUS:
+            return {"tag": "decision_tree_status", "attributes": dict(ATTRIBUTE_PATTERN.findall(tag))}
+
+        options = [
+            {"text": text.strip(), "urgency": urgency or "normal"}
+            for urgency, text in OPTION_PATTERN.findall(tag)
+        ]
+        return {"tag": "available_options", "options": options}
@@ -1,6 +1,8 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './RightSidebar.css';
 
+const MAX_LOGS_PER_SERVER = 50;
+
 const RightSidebar = ({ onClose }) => {
   const [logs, setLogs] = useState({});
   const [selectedServer, setSelectedServer] = useState('All Servers');
@@ -12,9 +14,49 @@ const RightSidebar = ({ onClose }) => {
   const scrollTimeoutRef = useRef(null);
 
   useEffect(() => {
-    fetchLogs();
-    const interval = setInterval(fetchLogs, 3000); // Increased to 3 seconds
-    return () => clearInterval(interval);
+    const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
+    let source = null;
+    let interval = null;
+    let cancelled = false;
+
+    const startPolling = () => {
+      if (!interval && !cancelled) {
+        interval = setInterval(fetchLogs, 3000);
+      }
+    };
+
+    // Load the current logs once, then tail new entries over SSE
+    const startTail = async () => {
+      const data = await fetchLogs();
+      if (cancelled) return;
+      if (!window.EventSource) {
+        startPolling();
+        return;
+      }
+
+      const lastId = Math.max(0, ...Object.values(data || {}).flat().map((entry) => entry.id || 0));
+      source = new EventSource(`${apiBase}/mcp/logs/stream?since=${lastId}`);
+      source.onmessage = (event) => {
+        const entry = JSON.parse(event.data);
+        setLogs((prev) => ({
+          ...prev,
+          [entry.server]: [...(prev[entry.server] || []), entry].slice(-MAX_LOGS_PER_SERVER)
+        }));
+      };
+      source.onerror = () => {
+        // Fall back to polling if the stream is unavailable
+        source.close();
+        source = null;
+        startPolling();
+      };
+    };
+
+    startTail();
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+      if (interval) clearInterval(interval);
+    };
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
     // CloudWatch-style tail to bottom
@@ -88,10 +130,12 @@ const RightSidebar = ({ onClose }) => {
         if (currentLogsString !== newLogsString) {
           setLogs(data);
         }
+        return data;
       }
     } catch (error) {
       console.error('Error fetching logs:', error);
     }
+    return null;
   };
 
   const clearLogs = async () => {
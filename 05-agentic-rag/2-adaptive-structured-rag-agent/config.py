@@ -37,6 +37,14 @@ def get_config() -> Dict[str, Any]:
         # Knowledge Base Configuration
         "knowledge_base_id": os.environ.get("KNOWLEDGE_BASE_ID", ""),
 
+        # SQLite Configuration
+        "sqlite_database_path": os.environ.get("SQLITE_DATABASE_PATH", "./data/wealthmanagement.db"),
+        "sqlite_pool_size": int(os.environ.get("SQLITE_POOL_SIZE", "4")),
+        # Switch the database to WAL journaling (rewrites the file; for databases that are written to)
+        "sqlite_enable_wal": os.environ.get("SQLITE_ENABLE_WAL", "false").lower() == "true",
+        "sqlite_max_rows": int(os.environ.get("SQLITE_MAX_ROWS", "200")),  # Rows returned to the agent
+        "sqlite_max_bytes": int(os.environ.get("SQLITE_MAX_BYTES", "65536")),  # Approximate result size cap
+
     }
     
     return config
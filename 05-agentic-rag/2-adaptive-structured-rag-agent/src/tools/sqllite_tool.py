@@ -1,35 +1,181 @@
 """
 SQLite Query Tool for executing SQL queries against local SQLite database.
+
+Queries run on a shared pool of read-only connections and results are
+streamed from the cursor until a row or byte cap is reached, so a query
+that selects a large table returns a bounded sample instead of the
+whole table.
 """
 from strands import tool
 import sqlite3
 import logging
-import os
-from typing import Dict, Any, Optional
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Iterator
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Rows pulled from the cursor per fetchmany() call
+FETCH_BATCH_SIZE = 50
+
+
+class SQLiteConnectionPool:
+    """
+    Fixed-size pool of read-only connections to one SQLite database.
+
+    Connections are opened lazily with a mode=ro URI and query_only set, so
+    the agent can never modify the database. With enable_wal the database is
+    switched to WAL journaling once, so readers don't block on a process that
+    writes to it; this rewrites the database file, so it is off by default.
+    """
+
+    def __init__(self, database_path: str, size: int = 4, enable_wal: bool = False):
+        self.database_path = database_path
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        if enable_wal:
+            self._enable_wal()
+
+    def _enable_wal(self) -> None:
+        # journal_mode is stored in the database file, so this only needs
+        # write access the first time the pool is created for a database
+        try:
+            with sqlite3.connect(self.database_path) as conn:
+                mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            logger.info(f"SQLite journal mode: {mode}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not enable WAL for {self.database_path}: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, waiting for one to be returned if all are in use."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _sqlite_config() -> Dict[str, Any]:
+    from config import get_config
+    return get_config()
+
+
+def get_sqlite_pool(database_path: str) -> SQLiteConnectionPool:
+    """Return the process-wide pool for a database, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(database_path)
+        if pool is None:
+            config = _sqlite_config()
+            pool = SQLiteConnectionPool(database_path, config.get('sqlite_pool_size', 4),
+                                        enable_wal=config.get('sqlite_enable_wal', False))
+            _pools[database_path] = pool
+        return pool
+
+
+def _value_size(value: Any) -> int:
+    if value is None:
+        return 4
+    if isinstance(value, (str, bytes)):
+        return len(value) + 2
+    return len(str(value))
+
+
+def _stream_rows(cursor: sqlite3.Cursor, max_rows: int, max_bytes: int) -> Dict[str, Any]:
+    """Read rows from an executed cursor until it is exhausted or a cap is hit."""
+    columns = [description[0] for description in cursor.description]
+    rows = []
+    size = sum(len(column) + 3 for column in columns)
+    truncated_by = None
+
+    while truncated_by is None:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            if len(rows) >= max_rows:
+                truncated_by = "rows"
+                break
+            row_size = sum(_value_size(value) for value in row) + 2 * len(row)
+            if size + row_size > max_bytes:
+                truncated_by = "bytes"
+                break
+            rows.append(row)
+            size += row_size
+
+    result = {
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "truncated": truncated_by is not None,
+    }
+    if truncated_by == "rows":
+        result["truncation"] = (
+            f"Result truncated after {max_rows} rows. "
+            "Use aggregation, a WHERE clause or LIMIT to narrow the query."
+        )
+    elif truncated_by == "bytes":
+        result["truncation"] = (
+            f"Result truncated after {len(rows)} rows at the {max_bytes} byte limit. "
+            "Select fewer or shorter columns, or aggregate."
+        )
+    return result
+
+
 @tool
 def run_sqlite_query(query: str) -> Dict[str, Any]:
     """
-    Execute a SQL query on SQLite database.
-    
-    Uses sqlite3 to execute the query on local SQLite database and returns the results.
-    
+    Execute a read-only SQL query on SQLite database.
+
+    Uses a pooled read-only sqlite3 connection to execute the query on the local
+    SQLite database. Results are returned in columnar form, capped at a maximum
+    number of rows and bytes; when a cap is hit, "truncated" is true and
+    "truncation" explains how to narrow the query.
+
     Args:
         query: SQL query string to execute
-    
+
     Returns:
-        Dict containing either query results or error information
+        Dict containing either query results ("columns", "rows", "row_count",
+        "truncated") or error information
     """
     try:
-        # Get database path from config
-        from config import get_config
-        config = get_config()
-        
+        config = _sqlite_config()
         database_path = config.get('sqlite_database_path', './data/wealthmanagement.db')
-        
+
         # Validate database exists
         db_path = Path(database_path)
         if not db_path.exists():
@@ -39,71 +185,53 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
                 "error": f"Database file not found: {database_path}",
                 "query": query
             }
-        
+
         # Execute query
         logger.info(f"Executing SQLite query: {query}")
-        
-        with sqlite3.connect(database_path) as conn:
-            # Enable row factory for dictionary-like access
-            conn.row_factory = sqlite3.Row
+
+        with get_sqlite_pool(database_path).connection() as conn:
             cursor = conn.cursor()
-            
-            # Execute the query
-            cursor.execute(query)
-            
-            # Handle different query types
-            query_upper = query.strip().upper()
-            if query_upper.startswith(('SELECT', 'WITH')):
-                # For SELECT queries, fetch results
-                rows = cursor.fetchall()
-                
-                # Get column names
-                columns = [description[0] for description in cursor.description] if cursor.description else []
-                
-                # Convert rows to list of dictionaries
-                data = []
-                for row in rows:
-                    item = {}
-                    for column in columns:
-                        value = row[column]
-                        # Handle None values consistently with Athena tool
-                        item[column] = value if value is not None else None
-                    data.append(item)
-                
-                logger.info(f"Query succeeded! Returned {len(data)} rows")
-                
-                return {
-                    "success": True,
-                    "data": data,
-                    "query": query
-                }
-            else:
-                # For INSERT, UPDATE, DELETE queries
-                affected_rows = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Query succeeded! {affected_rows} rows affected")
-                
-                return {
-                    "success": True,
-                    "data": [],
-                    "affected_rows": affected_rows,
-                    "message": f"Query executed successfully. {affected_rows} rows affected.",
-                    "query": query
-                }
-    
+            try:
+                cursor.execute(query)
+
+                if cursor.description is None:
+                    # Statements without a result set, such as PRAGMA assignments
+                    return {
+                        "success": True,
+                        "columns": [],
+                        "rows": [],
+                        "row_count": 0,
+                        "truncated": False,
+                        "query": query
+                    }
+
+                result = _stream_rows(
+                    cursor,
+                    max_rows=config.get('sqlite_max_rows', 200),
+                    max_bytes=config.get('sqlite_max_bytes', 65536),
+                )
+            finally:
+                # Stops the statement early if the result was truncated
+                cursor.close()
+
+        if result["truncated"]:
+            logger.warning(f"Query result truncated: {result['truncation']}")
+        logger.info(f"Query succeeded! Returned {result['row_count']} rows")
+
+        return {"success": True, **result, "query": query}
+
     except sqlite3.Error as e:
         # Handle SQLite-specific errors
         error_message = _format_sqlite_error(str(e))
         logger.error(f"SQLite query failed: {error_message}")
-        
+
         return {
             "success": False,
             "error": error_message,
             "sqlite_error_details": str(e),
             "query": query
         }
-    
+
     except Exception as e:
         logger.exception("Error executing SQLite query")
         return {
@@ -116,15 +244,15 @@ def _format_sqlite_error(error_message: str) -> str:
     """
     Format SQLite error messages for better readability.
     Similar to how Athena tool handles error formatting.
-    
+
     Args:
         error_message: Raw SQLite error message
-        
+
     Returns:
         Formatted error message
     """
     error_lower = error_message.lower()
-    
+
     # Common SQLite error patterns and their user-friendly explanations
     if 'no such table' in error_lower:
         return f"Table does not exist: {error_message}"
@@ -134,6 +262,8 @@ def _format_sqlite_error(error_message: str) -> str:
         return f"SQL syntax error: {error_message}"
     elif 'ambiguous column name' in error_lower:
         return f"Ambiguous column name (specify table): {error_message}"
+    elif 'readonly database' in error_lower or 'query_only' in error_lower:
+        return f"Database is read-only, only SELECT queries are allowed: {error_message}"
     elif 'foreign key constraint failed' in error_lower:
         return f"Foreign key constraint violation: {error_message}"
     elif 'unique constraint failed' in error_lower:
@@ -141,4 +271,4 @@ def _format_sqlite_error(error_message: str) -> str:
     elif 'not null constraint failed' in error_lower:
         return f"NOT NULL constraint violation: {error_message}"
     else:
-        return error_message
\ No newline at end of file
+        return error_message